@@ -8,20 +8,29 @@ import os
 from constants import (
     DEFAULT_QUESTIONNAIRE, DEFAULT_PRODUCTION_VARS,
     DISTRIBUTION_CHANNELS, VIDEO_FORMATS, SPECIAL_REQUIREMENTS,
-    LOCATION_TYPES, PROPS_DESIGN_LEVELS, FOOTAGE_VOLUME_LEVELS
+    LOCATION_TYPES, PROPS_DESIGN_LEVELS, FOOTAGE_VOLUME_LEVELS, SWEEP_DEFAULT_RANGES,
+    BUDGET_SOLVER_OBJECTIVES
 )
-from pricing_logic import load_rates, calculate_quote, generate_line_items
+from pricing_logic import load_rates, compile_rates, compute_quote_cached, save_rates_json, rates_fingerprint
+from safe_io import VersionConflict
+from rate_versions import save_rate_version
+from pricing_graph import IncrementalQuoteEvaluator
+from quote_cache import quote_cache_stats
+from repricing import reprice_quote_history
+from pipeline_aggregates import get_aggregates, rebuild_aggregates, verify_aggregates
 from templates import load_template
 from ui_components import (
     render_header, render_sidebar_user_role, render_sidebar_quote_summary,
     render_rate_card, render_template_buttons, render_questionnaire_form,
     render_production_form, render_detailed_breakdown, render_rates_editor,
     render_customer_form, render_customer_details, render_customer_quotes,
-    render_sidebar_customer_selector, render_customers_table
+    render_sidebar_customer_selector, render_customers_table, render_price_surface_panel,
+    render_risk_simulation_panel, render_budget_solver_panel, render_repricing_report,
+    render_pipeline_dashboard, render_customer_quote_pages, render_batch_export_panel
 )
-from export_utils import get_table_download_link, generate_pdf_html, get_pdf_download_button
+from export_cache import lazy_export, export_cache_stats
 from customer_utils import load_customers, save_customer, get_customer, search_customers, delete_customer
-from quote_utils import add_quote, get_quotes_by_customer, get_quote_by_id, update_quote_status, update_quote
+from quote_utils import add_quote, get_quotes_by_customer, get_quote_by_id, update_quote_status, update_quote, quote_index_stats
 
 # Set page configuration
 st.set_page_config(
@@ -41,6 +50,12 @@ if "production_vars" not in st.session_state:
 if "rates" not in st.session_state:
     st.session_state["rates"] = load_rates()
 
+if "rate_card" not in st.session_state:
+    st.session_state["rate_card"] = compile_rates(st.session_state["rates"])
+
+if "quote_evaluator" not in st.session_state:
+    st.session_state["quote_evaluator"] = IncrementalQuoteEvaluator()
+
 if "selected_customer" not in st.session_state:
     st.session_state.selected_customer = None
 
@@ -54,16 +69,12 @@ if "confirming_delete_customer_id" not in st.session_state:
     st.session_state.confirming_delete_customer_id = None
 
 # Define tabs globally so it's accessible in the __main__ block
-tabs = ["Quote Builder", "Rates"]
+tabs = ["Quote Builder", "Rates", "Pipeline"]
 
 def load_rates_json():
     with open("rates.json", "r") as f:
         return json.load(f)
 
-def save_rates_json(rates):
-    with open("rates.json", "w") as f:
-        json.dump(rates, f, indent=2)
-
 def apply_template(template_type):
     """Apply a template to the session state"""
     template = load_template(template_type)
@@ -189,6 +200,17 @@ def main():
     render_header("Lapis Visuals - Pricing Calculator" + (f" — {selected_customer['name']}" if selected_customer else ""))
     # --- Quote Builder Tab ---
     if st.session_state.active_tab == "Quote Builder":
+        if selected_customer:
+            with st.expander("Saved Quotes"):
+                quote_to_load = render_customer_quote_pages(selected_customer["customer_id"])
+            if quote_to_load:
+                saved = get_quote_by_id(quote_to_load)
+                if saved:
+                    import copy
+                    st.session_state.loaded_quote_id = quote_to_load
+                    st.session_state.questionnaire = copy.deepcopy(saved.get("questionnaire_snapshot") or DEFAULT_QUESTIONNAIRE)
+                    st.session_state.production_vars = copy.deepcopy(saved.get("production_vars_snapshot") or DEFAULT_PRODUCTION_VARS)
+                    st.rerun()
         st.header("Client Questionnaire")
         render_questionnaire_form(
             st.session_state.questionnaire,
@@ -209,9 +231,24 @@ def main():
         # Calculate quote and line items
         q = st.session_state.questionnaire
         p = st.session_state.production_vars
-        rates = st.session_state.rates
-        line_items = generate_line_items(q, p, rates)
-        low_quote, high_quote, recommended = calculate_quote(q, p, rates)
+        evaluator = st.session_state.quote_evaluator
+        evaluations_before = evaluator.evaluations
+        quote_result = compute_quote_cached(q, p, st.session_state.rate_card, evaluate=evaluator.evaluate)
+        line_items = quote_result.line_items
+        low_quote, high_quote, recommended = quote_result.totals
+        cache_stats = quote_cache_stats()
+        eval_stats = evaluator.stats()
+        index_stats = quote_index_stats()
+        export_stats = export_cache_stats()
+        recomputed = eval_stats["last_recomputed"] if evaluator.evaluations > evaluations_before else 0
+        st.sidebar.caption(
+            f"Quote cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['size']}/{cache_stats['maxsize']} cached) | "
+            f"Recomputed {recomputed}/{eval_stats['nodes_total']} pricing nodes"
+            + (f" | Quote index rebuilds: {index_stats['rebuilds']}" if "rebuilds" in index_stats else "")
+            + f" | Export cache: {export_stats['hits']} hits / {export_stats['misses']} builds "
+            f"({export_stats['bytes'] >> 10} KiB)"
+        )
         
         st.markdown("---")
         if st.session_state.get("loaded_quote_id"):
@@ -233,20 +270,15 @@ def main():
                     ],
                 }
                 st.table(pd.DataFrame(comp_data))
-        def pdf_callback():
-            get_pdf_download_button(
-                line_items,
-                st.session_state.questionnaire,
-                st.session_state.production_vars,
-                low_quote, high_quote, recommended
-            )
-        def excel_callback():
-            return get_table_download_link(
-                line_items,
-                st.session_state.questionnaire,
-                st.session_state.production_vars,
-                low_quote, high_quote, recommended
-            )
+        export_inputs = (
+            line_items,
+            st.session_state.questionnaire,
+            st.session_state.production_vars,
+            low_quote, high_quote, recommended,
+            st.session_state.rate_card.fingerprint
+        )
+        pdf_callback = lazy_export("pdf", *export_inputs)
+        excel_callback = lazy_export("excel", *export_inputs)
         st.markdown("---")
         st.subheader("Quote Actions")
         save_col, clear_col, _ = st.columns([1, 1, 2])
@@ -264,7 +296,7 @@ def main():
                             "low_quote": low_quote,
                             "high_quote": high_quote,
                             "recommended_quote": recommended,
-                            "line_items_snapshot": line_items
+                            "rate_version": save_rate_version(st.session_state.rates)
                         }
                         updated = update_quote(st.session_state.loaded_quote_id, updates)
                         if updated:
@@ -279,7 +311,7 @@ def main():
                     if st.session_state.selected_customer:
                         customer_id = st.session_state.selected_customer['customer_id']
                         project_name = st.session_state.questionnaire.get("project_name", "Untitled Project")
-                        new_quote = add_quote(customer_id, project_name, st.session_state.questionnaire, st.session_state.production_vars, low_quote, high_quote, recommended, line_items)
+                        new_quote = add_quote(customer_id, project_name, st.session_state.questionnaire, st.session_state.production_vars, low_quote, high_quote, recommended, st.session_state.rates)
                     else:
                         st.warning("Please select a customer before saving a quote.")
         with clear_col:
@@ -288,14 +320,57 @@ def main():
                     st.session_state.loaded_quote_id = None
                     st.success("Loaded quote cleared. You can now start a new quote.")
         render_detailed_breakdown(line_items, pdf_callback, excel_callback)
+        render_price_surface_panel(q, p, st.session_state.rate_card, SWEEP_DEFAULT_RANGES)
+        render_risk_simulation_panel(q, p, st.session_state.rate_card)
+        solver_choice = render_budget_solver_panel(q, p, st.session_state.rate_card, BUDGET_SOLVER_OBJECTIVES)
+        if solver_choice:
+            st.session_state.production_vars = solver_choice
+            st.rerun()
     # --- Rates Tab ---
     elif st.session_state.active_tab == "Rates":
         st.header("Rate Card Editor")
-        submitted = render_rates_editor(rates)
-        if submitted:
-            save_rates_json(rates)
-            st.success("Rates updated!")
-            st.rerun()
+        updated_rates = render_rates_editor(st.session_state.rates)
+        if updated_rates:
+            try:
+                save_rates_json(updated_rates, expected_fingerprint=rates_fingerprint(st.session_state.rates))
+            except VersionConflict:
+                # Someone else saved the rate card first: show theirs instead of overwriting it
+                st.session_state.rates = load_rates()
+                st.session_state.rate_card = compile_rates(st.session_state.rates)
+                st.error("The rate card was changed by another user. Their rates have been loaded; please re-apply your edits.")
+            else:
+                st.session_state.rates = updated_rates
+                st.session_state.rate_card = compile_rates(updated_rates)
+                st.success("Rates updated!")
+                st.rerun()
+        st.subheader("Pipeline Impact")
+        st.caption("Reprice every saved quote against the current rate card and compare with the saved prices.")
+        if st.button("Reprice Saved Quotes"):
+            with st.spinner("Repricing saved quotes..."):
+                st.session_state.repricing_report = reprice_quote_history(st.session_state.rate_card)
+        if st.session_state.get("repricing_report"):
+            render_repricing_report(
+                st.session_state.repricing_report,
+                {c["customer_id"]: c["name"] for c in customers_data}
+            )
+    # --- Pipeline Tab ---
+    elif st.session_state.active_tab == "Pipeline":
+        st.header("Pipeline Dashboard")
+        render_pipeline_dashboard(get_aggregates(), {c["customer_id"]: c["name"] for c in customers_data})
+        verify_col, rebuild_col, _ = st.columns([1, 1, 2])
+        with verify_col:
+            if st.button("Verify Totals"):
+                problems = verify_aggregates()
+                if problems:
+                    st.warning(f"{len(problems)} totals differ from the saved quotes; rebuild to fix them.")
+                    st.write(problems[:20])
+                else:
+                    st.success("Totals match the saved quotes.")
+        with rebuild_col:
+            if st.button("Rebuild Totals"):
+                rebuild_aggregates()
+                st.rerun()
+        render_batch_export_panel({c["customer_id"]: c["name"] for c in customers_data})
 
 if __name__ == "__main__":
     # Render tabs selector at the top
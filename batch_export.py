@@ -0,0 +1,247 @@
+"""
+Batch PDF/Excel export of saved quotes for the Lapis Visuals Pricing Calculator.
+
+Quotes are selected by customer and status, rendered in parallel by a pool of
+worker processes (FPDF and openpyxl are pure-Python and CPU-bound, so threads
+would serialize on the GIL) and streamed into a ZIP file or a directory as
+they complete. Only a bounded window of chunks is in flight at a time, so
+memory stays flat however many quotes are exported. The "workbook" format
+instead streams every selected quote into a single Excel portfolio, and the
+"report" format renders them all into one HTML document.
+
+Run from the repository root:
+    python batch_export.py --status Quoted [--customer CUST-...] [--format pdf] [--output quotes.zip]
+    python batch_export.py --format workbook --output portfolio.xlsx
+    python batch_export.py --format report --output report.html
+"""
+
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date
+from itertools import islice
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from excel_writer import write_portfolio_workbook
+from export_cache import EXPORT_FORMATS
+from html_report import generate_report_html
+from quote_utils import iter_quotes_matching, query_quotes, quote_line_items
+
+BATCH_CHUNK_SIZE = 16
+BATCH_CHUNKS_PER_WORKER = 2  # In-flight chunks per worker; bounds memory
+
+# Batch formats: one file per quote (EXPORT_FORMATS), or one workbook / HTML report for all of them
+BATCH_FORMATS = ("pdf", "excel", "workbook", "report")
+
+# Fields a batch export reads from each quote
+BATCH_EXPORT_FIELDS = (
+    "quote_id", "customer_id", "project_name", "status", "questionnaire_snapshot", "production_vars_snapshot",
+    "low_quote", "high_quote", "recommended_quote", "rate_version", "line_items_snapshot"
+)
+
+# Questionnaire fields the exporters format as dates
+_DATE_FIELDS = ("shoot_date", "delivery_date")
+
+def count_quotes(customer_id: Optional[str] = None, statuses: Optional[Sequence[str]] = None) -> int:
+    """Number of quotes a batch export with these filters would render (counted by the storage backend)."""
+    return query_quotes(customer_id=customer_id, statuses=statuses, limit=1, fields=("quote_id",))["total"]
+
+def select_quotes(customer_id: Optional[str] = None,
+                  statuses: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Stream the quotes of a customer (None for all) in the given statuses (None for all)."""
+    return iter_quotes_matching(customer_id, statuses, fields=BATCH_EXPORT_FIELDS)
+
+def batch_file_name(quote: Dict[str, Any], kind: str) -> str:
+    """File name of one quote inside a batch export."""
+    project = re.sub(r"[^A-Za-z0-9]+", "_", quote.get("project_name") or "").strip("_")[:40]
+    return f"{quote['quote_id']}_{project or 'quote'}.{EXPORT_FORMATS[kind][1]}"
+
+def _export_inputs(quote: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Arguments of an export builder for a saved quote (stored dates are ISO strings)."""
+    questionnaire = dict(quote.get("questionnaire_snapshot") or {})
+    for field in _DATE_FIELDS:
+        if isinstance(questionnaire.get(field), str):
+            questionnaire[field] = date.fromisoformat(questionnaire[field][:10])
+    return (
+        quote_line_items(quote),
+        questionnaire,
+        quote.get("production_vars_snapshot") or {},
+        quote.get("low_quote", 0),
+        quote.get("high_quote", 0),
+        quote.get("recommended_quote", 0),
+    )
+
+def render_quotes(kind: str, quotes: List[Dict[str, Any]]) -> List[Tuple[str, Optional[bytes], Optional[str]]]:
+    """
+    Render a chunk of quotes (runs in a worker process).
+
+    Returns:
+        (file name, file bytes, None) per rendered quote, or
+        (quote_id, None, error message) per quote that could not be rendered
+    """
+    builder = EXPORT_FORMATS[kind][0]
+    results = []
+    for quote in quotes:
+        try:
+            results.append((batch_file_name(quote, kind), builder(*_export_inputs(quote)), None))
+        except Exception as e:
+            results.append((quote["quote_id"], None, f"{type(e).__name__}: {e}"))
+    return results
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+def _rendered(kind: str, quotes: Iterable[Dict[str, Any]], workers: int,
+              chunk_size: int) -> Iterator[Tuple[str, Optional[bytes], Optional[str]]]:
+    """Yield render_quotes() results in completion order, keeping a bounded window in flight."""
+    chunks = _chunks(quotes, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from render_quotes(kind, chunk)
+        return
+    # Spawned workers don't inherit the caller's threads or locks (Streamlit runs many)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(render_quotes, kind, chunk))
+            if len(pending) >= workers * BATCH_CHUNKS_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in pending:
+            yield from future.result()
+
+def batch_export(quotes: Iterable[Dict[str, Any]], output: str, kind: str = "pdf", workers: Optional[int] = None,
+                 progress: Optional[Callable[[int], None]] = None,
+                 chunk_size: int = BATCH_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Render quotes in parallel and stream the files into a ZIP or a directory.
+
+    Args:
+        quotes: Quote records (at least BATCH_EXPORT_FIELDS), e.g. from select_quotes()
+        output: Path of a .zip file, or of a directory to write the files into
+        kind: Key of BATCH_FORMATS
+        workers: Worker processes (default: CPU count; 1 renders in this process)
+        progress: Called with the number of quotes processed so far
+        chunk_size: Quotes per task sent to a worker
+
+    Returns:
+        Dictionary with "exported" (file count), "failed" ((quote_id, error) pairs),
+        "bytes" (total file size) and "seconds"
+    """
+    if kind == "workbook":
+        return export_workbook(quotes, output, progress)
+    if kind == "report":
+        return export_report(quotes, output, progress)
+    if kind not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {kind}")
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    summary = {"exported": 0, "failed": [], "bytes": 0}
+    to_zip = output.lower().endswith(".zip")
+    if to_zip:
+        archive = zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED)
+    else:
+        os.makedirs(output, exist_ok=True)
+    try:
+        for processed, (name, data, error) in enumerate(_rendered(kind, quotes, workers, chunk_size), 1):
+            if data is None:
+                summary["failed"].append((name, error))
+            elif to_zip:
+                archive.writestr(name, data)
+            else:
+                with open(os.path.join(output, name), "wb") as f:
+                    f.write(data)
+            if data is not None:
+                summary["exported"] += 1
+                summary["bytes"] += len(data)
+            if progress:
+                progress(processed)
+    finally:
+        if to_zip:
+            archive.close()
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+def export_workbook(quotes: Iterable[Dict[str, Any]], output: str,
+                    progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+    """
+    Stream quotes into one Excel portfolio workbook (see excel_writer.write_portfolio_workbook).
+
+    Returns:
+        Same summary as batch_export(); "exported" counts quotes written with their
+        line items, "bytes" is the workbook size
+    """
+    start = time.perf_counter()
+    result = write_portfolio_workbook(output, quotes, progress=progress)
+    return {
+        "exported": result["quotes"] - len(result["failed"]),
+        "failed": result["failed"],
+        "bytes": os.path.getsize(output),
+        "seconds": time.perf_counter() - start,
+    }
+
+def export_report(quotes: Iterable[Dict[str, Any]], output: str,
+                  progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+    """
+    Render quotes into one HTML report (see html_report.generate_report_html).
+
+    Returns:
+        Same summary as batch_export(); "exported" counts quotes rendered with their
+        line items, "bytes" is the report size
+    """
+    start = time.perf_counter()
+    summary = {"exported": 0, "failed": [], "bytes": 0}
+    processed = 0
+    def line_items(quote):
+        nonlocal processed
+        processed += 1
+        if progress:
+            progress(processed)
+        try:
+            items = quote_line_items(quote)
+        except Exception as e:
+            summary["failed"].append((quote["quote_id"], f"{type(e).__name__}: {e}"))
+            return {}
+        summary["exported"] += 1
+        return items
+    data = generate_report_html(quotes, line_items).encode("utf-8")
+    with open(output, "wb") as f:
+        f.write(data)
+    summary["bytes"] = len(data)
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Export saved quotes as PDF or Excel files in parallel")
+    parser.add_argument("--status", action="append", dest="statuses", help="Quote status (repeatable; default: all)")
+    parser.add_argument("--customer", help="Only this customer_id's quotes")
+    parser.add_argument("--format", choices=BATCH_FORMATS, default="pdf")
+    parser.add_argument("--output", default="quotes.zip",
+                        help="ZIP file, or a directory if not ending in .zip (.xlsx for workbook, .html for report)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    total = count_quotes(args.customer, args.statuses)
+    def report(done):
+        if done % 100 == 0 or done == total:
+            print(f"\r{done}/{total} quotes", end="", file=sys.stderr, flush=True)
+    summary = batch_export(select_quotes(args.customer, args.statuses), args.output, args.format,
+                           args.workers, progress=report)
+    print(file=sys.stderr)
+    print(f"Exported {summary['exported']} quotes ({summary['bytes'] / 1e6:.1f} MB) to {args.output} "
+          f"in {summary['seconds']:.1f}s")
+    for quote_id, error in summary["failed"]:
+        print(f"  failed {quote_id}: {error}")
+    sys.exit(1 if summary["failed"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark batch quote export: serial rendering vs a process pool, streamed into a ZIP.
+
+Run from the repository root:
+    python benchmarks/bench_batch_export.py [--quotes 1000] [--format pdf] [--workers 1 2 4 8]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_export import batch_export
+from constants import DEFAULT_QUESTIONNAIRE, DEFAULT_PRODUCTION_VARS, QUOTE_STATUSES
+
+def synthetic_quotes(count: int, seed: int = 1):
+    """Quote records with materialized line items, so no rate versions are needed."""
+    rng = random.Random(seed)
+    for i in range(count):
+        items = {
+            name: {"low": float(rng.randrange(1, 50) * 100_000), "high": float(rng.randrange(50, 100) * 100_000)}
+            for name in ("Pre-production", "Crew Costs", "Equipment", "Talent", "Locations", "Post-production")
+        }
+        low = sum(item["low"] for item in items.values())
+        high = sum(item["high"] for item in items.values())
+        yield {
+            "quote_id": f"QTE-{i:08X}",
+            "customer_id": f"CUST-{rng.randrange(100)}",
+            "project_name": f"Project {i}",
+            "status": rng.choice(QUOTE_STATUSES),
+            "questionnaire_snapshot": dict(DEFAULT_QUESTIONNAIRE, concept=f"Concept for project {i}"),
+            "production_vars_snapshot": DEFAULT_PRODUCTION_VARS,
+            "low_quote": low,
+            "high_quote": high,
+            "recommended_quote": (low + high) / 2,
+            "line_items_snapshot": items,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quotes", type=int, default=1000)
+    parser.add_argument("--format", choices=["pdf", "excel"], default="pdf")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        baseline = None
+        for workers in sorted(set(args.workers)):
+            output = os.path.join(directory, f"quotes-{workers}.zip")
+            summary = batch_export(synthetic_quotes(args.quotes), output, args.format, workers=workers)
+            rate = summary["exported"] / summary["seconds"]
+            baseline = baseline or rate
+            print(f"{workers:>3} workers: {summary['exported']:,} {args.format} files in {summary['seconds']:6.2f}s "
+                  f"({rate:7.1f} quotes/s, {rate / baseline:4.1f}x)  "
+                  f"zip {os.path.getsize(output) / 1e6:.1f} MB, {len(summary['failed'])} failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark calculate_quotes_batch() against the scalar compute_quote() loop.
+
+Run from the repository root:
+    python benchmarks/bench_batch_pricing.py [--rows 1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import DEFAULT_QUESTIONNAIRE, LOCATION_TYPES, PROPS_DESIGN_LEVELS, FOOTAGE_VOLUME_LEVELS
+from pricing_logic import load_rate_card, compute_quote, calculate_quotes_batch
+
+def random_scenarios(rows: int, seed: int = 0):
+    """Build a column dict of random but valid scenarios."""
+    rng = np.random.default_rng(seed)
+    return {
+        "video_length": rng.integers(1, 61, rows) / 2,
+        "deliverables": rng.integers(1, 21, rows),
+        "shooting_days": rng.integers(1, 29, rows) / 2,
+        "crew_size": rng.integers(1, 21, rows),
+        "location": rng.choice(np.array(LOCATION_TYPES), rows),
+        "talent_count": rng.integers(0, 21, rows),
+        "agency_markup": rng.random(rows) < 0.5,
+        "props_design": rng.choice(np.array(PROPS_DESIGN_LEVELS), rows),
+        "footage_volume": rng.choice(np.array(FOOTAGE_VOLUME_LEVELS), rows),
+        "contingency": rng.integers(0, 21, rows),
+    }
+
+def row(columns, i):
+    """Extract row i as (questionnaire, production_vars) dictionaries."""
+    q = dict(DEFAULT_QUESTIONNAIRE, video_length=float(columns["video_length"][i]),
+             deliverables=int(columns["deliverables"][i]))
+    p = {
+        "shooting_days": float(columns["shooting_days"][i]),
+        "crew_size": int(columns["crew_size"][i]),
+        "location": str(columns["location"][i]),
+        "talent_count": int(columns["talent_count"][i]),
+        "agency_markup": bool(columns["agency_markup"][i]),
+        "props_design": str(columns["props_design"][i]),
+        "footage_volume": str(columns["footage_volume"][i]),
+        "contingency": int(columns["contingency"][i]),
+    }
+    return q, p
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--scalar-rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    card = load_rate_card()
+    columns = random_scenarios(args.rows)
+
+    start = time.perf_counter()
+    result = calculate_quotes_batch(columns, card)
+    batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    calculate_quotes_batch(columns, card, arithmetic="fixed")
+    fixed_seconds = time.perf_counter() - start
+
+    scalar_rows = min(args.scalar_rows, args.rows)
+    start = time.perf_counter()
+    scalar = [compute_quote(*row(columns, i), card).totals for i in range(scalar_rows)]
+    scalar_seconds = time.perf_counter() - start
+
+    mismatches = sum(
+        1 for i, totals in enumerate(scalar)
+        if totals != (result["low_quote"][i], result["high_quote"][i], result["recommended_quote"][i])
+    )
+
+    per_million_batch = batch_seconds * 1_000_000 / args.rows
+    per_million_scalar = scalar_seconds * 1_000_000 / scalar_rows
+    print(f"batch:  {args.rows:,} rows in {batch_seconds:.3f}s "
+          f"({args.rows / batch_seconds:,.0f} rows/s, {per_million_batch:.3f}s per million)")
+    print(f"fixed:  {args.rows:,} rows in {fixed_seconds:.3f}s "
+          f"({args.rows / fixed_seconds:,.0f} rows/s, {fixed_seconds * 1_000_000 / args.rows:.3f}s per million)")
+    print(f"scalar: {scalar_rows:,} rows in {scalar_seconds:.3f}s "
+          f"({scalar_rows / scalar_seconds:,.0f} rows/s, {per_million_scalar:.1f}s per million)")
+    print(f"speedup: {per_million_scalar / per_million_batch:,.0f}x, mismatches vs scalar: {mismatches}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark the streaming Excel writer: portfolio workbooks of many quotes and single-quote exports.
+
+Reports time and peak traced Python memory. With openpyxl's write-only mode the
+peak should stay flat as the number of quotes grows. openpyxl serializes much
+faster when lxml is installed.
+
+Run from the repository root:
+    python benchmarks/bench_excel_writer.py [--quotes 1000 10000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_batch_export import synthetic_quotes
+from excel_writer import write_portfolio_workbook
+from export_utils import generate_excel
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quotes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--single", type=int, default=200, help="Single-quote exports to time")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.quotes:
+            output = os.path.join(directory, f"portfolio-{count}.xlsx")
+            write = lambda: write_portfolio_workbook(output, synthetic_quotes(count), line_items=lambda q: q["line_items_snapshot"])
+            start = time.perf_counter()
+            result = write()
+            elapsed = time.perf_counter() - start
+            # Tracing slows everything down, so memory gets its own pass
+            tracemalloc.start()
+            write()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"portfolio {result['quotes']:>7,} quotes: {elapsed:6.2f}s ({result['quotes'] / elapsed:7.0f} quotes/s), "
+                  f"peak {peak / 1e6:5.1f} MB, file {os.path.getsize(output) / 1e6:.1f} MB")
+
+    quote = next(synthetic_quotes(1))
+    inputs = (quote["line_items_snapshot"], quote["questionnaire_snapshot"], quote["production_vars_snapshot"],
+              quote["low_quote"], quote["high_quote"], quote["recommended_quote"])
+    start = time.perf_counter()
+    for _ in range(args.single):
+        generate_excel(*inputs)
+    print(f"single quote: {(time.perf_counter() - start) / args.single * 1000:.2f} ms per workbook")
+
+if __name__ == "__main__":
+    main()
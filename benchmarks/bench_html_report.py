@@ -0,0 +1,107 @@
+"""
+Benchmark HTML quote rendering: fixed f-string renderers vs the previous string-concatenation builder.
+
+The baseline is the builder generate_pdf_html() used before html_report
+(f-string blocks appended with += per row), kept here for comparison and run
+once per quote as a multi-quote report would have had to. It did not escape
+client text, so it is also timed with html.escape() added to each cell, which
+is what a safe report needs.
+
+Run from the repository root:
+    python benchmarks/bench_html_report.py [--quotes 100 1000 10000]
+"""
+
+import argparse
+import datetime
+from html import escape
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_batch_export import synthetic_quotes
+from html_report import generate_report_html
+
+def concatenation_html(line_items, questionnaire, low_quote, high_quote, recommended, esc=str):
+    """Body of the previous generate_pdf_html(): += per row, Rp formatting inline (cells passed through esc)."""
+    low_quote_fmt = f"Rp {low_quote:,.0f}".replace(",", ".")
+    high_quote_fmt = f"Rp {high_quote:,.0f}".replace(",", ".")
+    recommended_fmt = f"Rp {recommended:,.0f}".replace(",", ".")
+    html = f"""
+        <h2>Quote Summary</h2>
+        <div class="summary">
+            <div class="summary-item"><div>Low Estimate</div><div class="summary-value">{low_quote_fmt}</div></div>
+            <div class="summary-item"><div>Recommended</div><div class="summary-value">{recommended_fmt}</div></div>
+            <div class="summary-item"><div>High Estimate</div><div class="summary-value">{high_quote_fmt}</div></div>
+        </div>
+        <h2>Project Details</h2>
+        <table>
+            <tr><th>Item</th><th>Value</th></tr>
+    """
+    for key, value in questionnaire.items():
+        if key in ['distribution', 'special_requirements'] and isinstance(value, list):
+            value = ', '.join(value) if value else 'None'
+        elif key in ['shoot_date', 'delivery_date'] and value is not None:
+            value = value.strftime('%Y-%m-%d')
+        elif value is None or (isinstance(value, list) and not value):
+            value = 'None'
+        html += f"""
+        <tr>
+            <td>{esc(key.replace('_', ' ').title())}</td>
+            <td>{esc(str(value))}</td>
+        </tr>
+        """
+    html += """
+        </table>
+        <h2>Cost Breakdown</h2>
+        <table>
+            <tr><th>Item</th><th>Low (Rp)</th><th>High (Rp)</th></tr>
+    """
+    for item, values in line_items.items():
+        low = f"Rp {values['low']:,.0f}".replace(",", ".")
+        high = f"Rp {values['high']:,.0f}".replace(",", ".")
+        html += f"""
+        <tr>
+            <td>{esc(item)}</td>
+            <td>{low}</td>
+            <td>{high}</td>
+        </tr>
+        """
+    html += "</table>"
+    return html
+
+def concatenation_report(quotes, esc=str):
+    html = f"<html><body><h1>Lapis Visuals - Quote Report</h1><p>Date: {datetime.date.today()}</p>"
+    for quote in quotes:
+        html += f"<h2>{esc(quote['project_name'])} <small>({esc(quote['quote_id'])})</small></h2>"
+        html += concatenation_html(quote["line_items_snapshot"], quote["questionnaire_snapshot"],
+                                   quote["low_quote"], quote["high_quote"], quote["recommended_quote"], esc)
+    return html + "</body></html>"
+
+def timed(run, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(run())
+        best = min(best, time.perf_counter() - start)
+    return best, size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quotes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for count in args.quotes:
+        quotes = list(synthetic_quotes(count))
+        old, old_size = timed(lambda: concatenation_report(quotes), args.repeat)
+        safe, _ = timed(lambda: concatenation_report(quotes, escape), args.repeat)
+        new, new_size = timed(lambda: generate_report_html(quotes, line_items=lambda q: q["line_items_snapshot"]), args.repeat)
+        print(f"{count:>6,} quotes: concatenation {old * 1000:7.1f} ms, escaped {safe * 1000:7.1f} ms "
+              f"({old_size / 1e6:5.1f} MB) | renderers {new * 1000:7.1f} ms ({new_size / 1e6:5.1f} MB) "
+              f"{old / new:4.2f}x / {safe / new:4.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark rupiah formatting of a table column: money.format_rupiah_array vs Series.apply.
+
+The baseline is what the UI tables did before money.py: one f-string and
+str.replace() per cell through pandas' Series.apply. The scalar
+format_rupiah() is timed the same way, then the vectorized column path, in
+exact rupiah and in the abbreviated "jt" and "auto" units.
+
+Run from the repository root:
+    python benchmarks/bench_money.py [--values 100 10000 1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from money import format_rupiah, format_rupiah_array
+
+def legacy_format(value):
+    return f"Rp {value:,.0f}".replace(",", ".")
+
+def timed(run, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--values", type=int, nargs="+", default=[100, 10000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for count in args.values:
+        column = pd.Series(np.round(rng.lognormal(17, 1.5, count), -3))
+        assert list(format_rupiah_array(column)) == [legacy_format(v) for v in column]
+        old = timed(lambda: column.apply(legacy_format), args.repeat)
+        scalar = timed(lambda: column.apply(format_rupiah), args.repeat)
+        results = [(unit, timed(lambda: format_rupiah_array(column, unit), args.repeat)) for unit in ("Rp", "jt", "auto")]
+        print(f"{count:>9,} values: apply {old / count * 1e9:6.0f} ns/value, scalar {scalar / count * 1e9:6.0f} | "
+              + ", ".join(f"{unit} {seconds / count * 1e9:5.0f} ns ({old / seconds:4.1f}x)" for unit, seconds in results))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark the columnar quote archive: build time and memory-mapped aggregations.
+
+Run from the repository root:
+    python benchmarks/bench_quote_archive.py [--quotes 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import QUOTE_STATUSES, VIDEO_FORMATS
+from quote_archive import write_archive, open_archive
+
+def synthetic_quotes(count: int, seed: int = 1):
+    """Quote records with only the fields the archive reads."""
+    rng = random.Random(seed)
+    for i in range(count):
+        recommended = rng.randrange(5_000_000, 500_000_000)
+        yield {
+            "quote_id": f"QTE-{i:08X}",
+            "customer_id": f"CUST-{rng.randrange(5000)}",
+            "status": rng.choice(QUOTE_STATUSES),
+            "creation_date": f"2025-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d} 10:00:00",
+            "low_quote": int(recommended * 0.8),
+            "high_quote": int(recommended * 1.3),
+            "recommended_quote": recommended,
+            "questionnaire_snapshot": {"video_length": rng.randrange(15, 600), "format": rng.choice(VIDEO_FORMATS)},
+            "production_vars_snapshot": {"shooting_days": rng.randrange(1, 15) / 2, "crew_size": rng.randrange(1, 7)},
+        }
+
+def timed(label, run, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = run()
+    print(f"  {label:<28} {(time.perf_counter() - start) / repeat * 1000:8.1f} ms  ({len(result)} groups)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quotes", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        write_archive(synthetic_quotes(args.quotes), directory=directory)
+        print(f"build:  {args.quotes:,} quotes in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        archive = open_archive(directory, sync=False)
+        print(f"open:   {len(archive):,} rows in {(time.perf_counter() - start) * 1000:.1f} ms")
+        timed("sum by status", lambda: archive.group_sum("recommended_quote", "status"))
+        timed("sum by customer", lambda: archive.group_sum("recommended_quote", "customer_id"))
+        timed("sum by format", lambda: archive.group_sum("recommended_quote", "format"))
+        timed("sum by month", lambda: archive.monthly_sum("recommended_quote"))
+        approved = archive.labels["status"].index("Approved")
+        timed("approved by format", lambda: archive.group_sum(
+            "recommended_quote", "format", mask=archive.columns["status"] == approved
+        ))
+
+if __name__ == "__main__":
+    main()
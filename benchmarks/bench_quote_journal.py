@@ -0,0 +1,83 @@
+"""
+Benchmark the append-only quote journal: appends, cold replay and compaction.
+
+Run from the repository root:
+    python benchmarks/bench_quote_journal.py [--quotes 100000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import DEFAULT_QUESTIONNAIRE
+from pricing_logic import load_rate_card, calculate_quotes_batch
+from quote_journal import QuoteJournal
+from bench_batch_pricing import random_scenarios, row
+
+QUOTE_STATUSES = ["Draft", "Sent", "Accepted", "Rejected"]
+
+def build_quotes(count: int):
+    """Priced quote records with random scenarios."""
+    columns = random_scenarios(count, seed=1)
+    priced = calculate_quotes_batch(columns, load_rate_card())
+    for i in range(count):
+        q, p = row(columns, i)
+        yield {
+            "quote_id": f"QTE-{i:08X}",
+            "customer_id": f"CUST-{i % 500}",
+            "project_name": f"Project {i}",
+            "questionnaire_snapshot": dict(DEFAULT_QUESTIONNAIRE, **q),
+            "production_vars_snapshot": p,
+            "low_quote": int(priced["low_quote"][i]),
+            "high_quote": int(priced["high_quote"][i]),
+            "recommended_quote": int(priced["recommended_quote"][i]),
+            "status": "Draft",
+            "creation_date": "2025-01-01 00:00:00",
+            "last_updated_date": "2025-01-01 00:00:00",
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quotes", type=int, default=100_000)
+    parser.add_argument("--patches", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "quotes.jsonl")
+        # Disable automatic compaction so each phase is timed on its own
+        journal = QuoteJournal(path, compaction_min_bytes=float("inf"))
+
+        quotes = list(build_quotes(args.quotes))
+        start = time.perf_counter()
+        for quote in quotes:
+            journal.create(quote)
+        elapsed = time.perf_counter() - start
+        print(f"create:     {args.quotes:,} appends in {elapsed:.2f}s ({elapsed / args.quotes * 1e6:.0f} us each)")
+
+        start = time.perf_counter()
+        for i in range(args.patches):
+            journal.patch(quotes[i * 7 % args.quotes]["quote_id"], {"status": QUOTE_STATUSES[i % 4]})
+        elapsed = time.perf_counter() - start
+        print(f"patch:      {args.patches:,} appends in {elapsed:.2f}s ({elapsed / args.patches * 1e6:.0f} us each)")
+
+        start = time.perf_counter()
+        cold = QuoteJournal(path)
+        count = len(cold.quotes())
+        size = os.path.getsize(path)
+        print(f"replay:     {count:,} quotes from {size / 1e6:.1f} MB in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        journal.compact()
+        print(f"compact:    {os.path.getsize(path) / 1e6:.1f} MB in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        cold = QuoteJournal(path)
+        assert len(cold.quotes()) == count
+        print(f"replay:     {count:,} quotes after compaction in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark full quote loads against the streaming, projecting quote reader.
+
+Run from the repository root:
+    python benchmarks/bench_quote_reader.py [--quotes 50000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import JsonQuoteStore, SqliteDatabase, SqliteQuoteStore
+from bench_quote_journal import build_quotes
+
+SUMMARY_FIELDS = ("quote_id", "status", "recommended_quote")
+
+def measure(label, run):
+    """Print wall time and peak traced allocation of run()."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<34} {elapsed:7.3f}s  peak {peak / 1e6:7.1f} MB  -> {result}")
+
+def bench(name, store, quotes):
+    print(f"{name}: {len(quotes):,} quotes")
+    target = quotes[len(quotes) // 2]["quote_id"]
+    store.list_quotes()  # Warm the journal's view / SQLite page cache
+
+    measure("list_quotes + sum", lambda: sum(q["recommended_quote"] for q in store.list_quotes()))
+    measure("iter_quotes(fields) + sum", lambda: sum(
+        q["recommended_quote"] for q in store.iter_quotes(fields=SUMMARY_FIELDS)
+    ))
+    measure("list_quotes + find", lambda: next(q["quote_id"] for q in store.list_quotes() if q["quote_id"] == target))
+    measure("iter_quotes(where, fields) + next", lambda: next(store.iter_quotes(
+        where=lambda q: q["quote_id"] == target, fields=SUMMARY_FIELDS
+    ))["quote_id"])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quotes", type=int, default=50_000)
+    args = parser.parse_args()
+
+    quotes = list(build_quotes(args.quotes))
+    with tempfile.TemporaryDirectory() as directory:
+        journal_store = JsonQuoteStore(os.path.join(directory, "quotes.jsonl"), os.path.join(directory, "none.json"))
+        journal_store.replace_all(quotes)
+        bench("json", journal_store, quotes)
+
+        database = SqliteDatabase(os.path.join(directory, "lapis.db"))
+        sqlite_store = SqliteQuoteStore(database)
+        sqlite_store.replace_all(quotes)
+        bench("sqlite", sqlite_store, quotes)
+        database.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Stress concurrent writers: many processes saving quotes, customers and rates at once.
+
+Every worker process repeatedly adds a quote and changes its status,
+increments a shared counter quote with an optimistic version check, appends a
+project to a shared customer and increments a counter in the rate card.
+Afterwards no update may be lost, the pipeline totals must match the quotes
+and every file must still parse. Runs in a temporary directory.
+
+Run from the repository root:
+    python benchmarks/stress_concurrent_writes.py [--workers 8] [--iterations 50] [--backend json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from safe_io import VersionConflict
+
+# Low enough that the journal compacts several times during the run
+COMPACTION_MIN_BYTES = 16 << 10
+COMPACTION_RATIO = 1.2
+
+COUNTER_QUOTE = "QTE-COUNTER"
+SHARED_CUSTOMER = "CUST-SHARED"
+
+def increment_counter_quote():
+    """Optimistic read-increment-write of the shared counter quote."""
+    from quote_utils import get_quote_by_id, update_quote
+    while True:
+        quote = get_quote_by_id(COUNTER_QUOTE)
+        try:
+            if update_quote(COUNTER_QUOTE, {"counter": quote["counter"] + 1}, expected_version=quote["version"]):
+                return
+        except VersionConflict:
+            continue
+
+def increment_rates_counter():
+    """Optimistic read-increment-write of a counter in rates.json."""
+    from pricing_logic import load_rates, save_rates_json, rates_fingerprint
+    while True:
+        rates = load_rates()
+        updated = dict(rates, stress_counter=rates.get("stress_counter", 0) + 1)
+        try:
+            save_rates_json(updated, expected_fingerprint=rates_fingerprint(rates))
+            return
+        except VersionConflict:
+            continue
+
+def worker(args):
+    directory, worker_id, iterations = args
+    os.chdir(directory)
+    from storage import get_quote_store, storage_backend
+    from constants import DEFAULT_QUESTIONNAIRE, DEFAULT_PRODUCTION_VARS
+    from quote_utils import add_quote, update_quote_status
+    from customer_utils import add_project_to_customer
+
+    if storage_backend() == "json":
+        journal = get_quote_store().journal
+        journal.compaction_min_bytes = COMPACTION_MIN_BYTES
+        journal.compaction_ratio = COMPACTION_RATIO
+    for i in range(iterations):
+        quote = add_quote(SHARED_CUSTOMER, f"Worker {worker_id} #{i}", DEFAULT_QUESTIONNAIRE, DEFAULT_PRODUCTION_VARS, 1, 2, 2)
+        update_quote_status(quote["quote_id"], "Quoted" if i % 2 else "Approved")
+        increment_counter_quote()
+        if not add_project_to_customer(SHARED_CUSTOMER, {"worker": worker_id, "i": i}):
+            raise RuntimeError("Shared customer disappeared")
+        increment_rates_counter()
+    return worker_id
+
+def setup(directory):
+    """Seed the shared customer, counter quote and rate card."""
+    os.chdir(directory)
+    from constants import DEFAULT_RATES
+    from customer_utils import save_customer
+    from pricing_logic import save_rates_json
+    from quote_utils import save_quotes
+
+    save_customer({"customer_id": SHARED_CUSTOMER, "name": "Shared", "email": "", "company": ""})
+    save_quotes([{"quote_id": COUNTER_QUOTE, "customer_id": "CUST-COUNTER", "counter": 0, "status": "Draft"}])
+    save_rates_json(dict(DEFAULT_RATES, stress_counter=0))
+
+def check(directory, expected):
+    """Verify nothing was lost; return a list of failures."""
+    os.chdir(directory)
+    from customer_utils import get_customer
+    from pipeline_aggregates import verify_aggregates
+    from pricing_logic import load_rates
+    from quote_utils import get_quote_by_id, get_quotes_by_customer, quote_index_stats
+    from storage import storage_backend
+
+    failures = []
+    quotes = get_quotes_by_customer(SHARED_CUSTOMER)
+    if len(quotes) != expected:
+        failures.append(f"quotes: {len(quotes)} != {expected}")
+    counter = get_quote_by_id(COUNTER_QUOTE)["counter"]
+    if counter != expected:
+        failures.append(f"counter quote: {counter} != {expected}")
+    projects = len(get_customer(SHARED_CUSTOMER).get("project_history", []))
+    if projects != expected:
+        failures.append(f"customer projects: {projects} != {expected}")
+    rates_counter = load_rates().get("stress_counter")
+    if rates_counter != expected:
+        failures.append(f"rates counter: {rates_counter} != {expected}")
+    failures.extend(f"pipeline totals: {problem}" for problem in verify_aggregates())
+    # Every JSON file must be complete and parseable
+    for path in ["rates.json", "customers.json", "data/pipeline_aggregates.json"]:
+        if os.path.exists(path):
+            with open(path) as f:
+                json.load(f)
+    if storage_backend() == "json":
+        stats = quote_index_stats()
+        print(f"journal: {stats['events']:,} events, {stats['compactions']} compactions in this process, "
+              f"{stats['corrupt_lines']} corrupt lines")
+        if stats["corrupt_lines"]:
+            failures.append(f"journal: {stats['corrupt_lines']} corrupt lines")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    args = parser.parse_args()
+
+    os.environ["LAPIS_STORAGE_BACKEND"] = args.backend
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        setup(directory)
+        start = time.perf_counter()
+        # Spawned workers start with fresh module state, like separate app processes
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(args.workers) as pool:
+            pool.map(worker, [(directory, w, args.iterations) for w in range(args.workers)])
+        elapsed = time.perf_counter() - start
+        expected = args.workers * args.iterations
+        print(f"{args.workers} workers x {args.iterations} iterations ({args.backend}) in {elapsed:.2f}s")
+        failures = check(directory, expected)
+        os.chdir(cwd)
+    if failures:
+        print("LOST UPDATES:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print(f"ok: {expected} quotes, counter increments, customer projects and rate card increments")
+
+if __name__ == "__main__":
+    main()
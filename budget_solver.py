@@ -0,0 +1,244 @@
+"""
+Budget-constrained configuration search for the Lapis Visuals Pricing Calculator.
+
+Given a brief and a budget window, find the production configurations whose
+recommended price fits, ranked by a configurable objective. The search is a
+branch-and-bound over the discrete production options: every subtree gets a
+lower and upper price bound from the compiled rate card (each cost term is
+monotone in its inputs), subtrees are expanded best-first by the best score
+their bounds allow (so a price objective explores the cheapest or dearest
+subtrees first), subtrees that cannot fit the budget are pruned, and the search
+stops once no remaining subtree can beat the current top-N. Small subtrees are
+priced in one vectorized calculate_quotes_batch() call and ranked with NumPy.
+"""
+
+import heapq
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from constants import BUDGET_SEARCH_SPACE, PRODUCER_FEE_THRESHOLD, RECOMMENDED_PRICE_MARGIN
+from pricing_logic import CompiledRateCard, RatesLike, compile_rates, calculate_quotes_batch
+
+# Subtrees with at most this many configurations are priced directly
+LEAF_BLOCK_SIZE = 4096
+
+# Slack (in rupiah) so float rounding in the bounds never prunes a fitting configuration
+BOUND_SLACK = 1.0
+
+PRICE_OBJECTIVE = "recommended_quote"
+CATEGORICAL_FIELDS = ("location", "props_design", "footage_volume")
+
+def _recommended_from_subtotals(low_subtotal: float, high_subtotal: float, contingency: float,
+                                card: CompiledRateCard) -> float:
+    """Recommended price for given subtotals (monotone in every argument)."""
+    fee = card.producer_fee_percent if low_subtotal >= PRODUCER_FEE_THRESHOLD else 0
+    low_total = low_subtotal + low_subtotal * fee + low_subtotal * (contingency / 100)
+    high_total = high_subtotal + high_subtotal * fee + high_subtotal * (contingency / 100)
+    return ((low_total + high_total) / 2) * RECOMMENDED_PRICE_MARGIN
+
+class _Bounds:
+    """Per-value cost contributions of each searched field, for bounding subtrees."""
+
+    def __init__(self, questionnaire: Dict[str, Any], production_vars: Dict[str, Any], card: CompiledRateCard):
+        self.card = card
+        self.video_length = questionnaire["video_length"]
+        self.markup = 1 if production_vars["agency_markup"] else 0
+        self.fixed_low = card.scriptwriting_low + card.storyboard_low_rate * questionnaire["deliverables"]
+        self.fixed_high = card.scriptwriting_high + card.storyboard_high_rate * questionnaire["deliverables"]
+
+    def _category_costs(self, name: str, values: Sequence[Any]) -> Tuple[List[float], List[float]]:
+        card = self.card
+        if name == "location":
+            costs = [card.location_costs[card.location_index[v]] for v in values]
+            return costs, costs
+        if name == "props_design":
+            positions = [card.props_position(v) for v in values]
+            return [card.props_low_costs[i] for i in positions], [card.props_high_costs[i] for i in positions]
+        positions = [card.footage_position(v) for v in values]
+        return (
+            [self.video_length * card.post_low_per_minute[i] for i in positions],
+            [self.video_length * card.post_high_per_minute[i] for i in positions],
+        )
+
+    def price_range(self, domains: Dict[str, List[Any]]) -> Tuple[float, float]:
+        """Lower and upper bound of the recommended price over every configuration in domains."""
+        card = self.card
+        low_min = low_max = self.fixed_low
+        high_min = high_max = self.fixed_high
+
+        for name in CATEGORICAL_FIELDS:
+            lows, highs = self._category_costs(name, domains[name])
+            low_min += min(lows)
+            low_max += max(lows)
+            high_min += min(highs)
+            high_max += max(highs)
+
+        days = domains["shooting_days"]
+        crew_rates = [card.crew_day_rate(size) for size in domains["crew_size"]]
+        crew_min, crew_max = min(crew_rates) * min(days), max(crew_rates) * max(days)
+        low_min += crew_min + card.equipment_low * min(days)
+        low_max += crew_max + card.equipment_low * max(days)
+        high_min += crew_min * card.crew_high_multiplier + card.equipment_high * min(days)
+        high_max += crew_max * card.crew_high_multiplier + card.equipment_high * max(days)
+
+        talent = domains["talent_count"]
+        low_min += min(talent) * card.talent_low_rates[self.markup]
+        low_max += max(talent) * card.talent_low_rates[self.markup]
+        high_min += min(talent) * card.talent_high_rates[self.markup]
+        high_max += max(talent) * card.talent_high_rates[self.markup]
+
+        contingency = domains["contingency"]
+        return (
+            _recommended_from_subtotals(low_min, high_min, min(contingency), card),
+            _recommended_from_subtotals(low_max, high_max, max(contingency), card),
+        )
+
+def _parse_objective(objective: Sequence[str]) -> List[Tuple[str, int]]:
+    """Turn ["shooting_days", "-recommended_quote"] into [(field, +1), (field, -1)]."""
+    parsed = []
+    for key in objective:
+        sign = -1 if key.startswith("-") else 1
+        name = key.lstrip("-")
+        if name in CATEGORICAL_FIELDS:
+            raise ValueError(f"Cannot optimise categorical field: {name}")
+        if name != PRICE_OBJECTIVE and name not in BUDGET_SEARCH_SPACE:
+            raise ValueError(f"Unknown objective: {key}")
+        parsed.append((name, sign))
+    return parsed
+
+def find_configurations(questionnaire: Dict[str, Any], production_vars: Dict[str, Any], rates: RatesLike,
+                        budget_min: Optional[float] = None, budget_max: Optional[float] = None,
+                        objective: Sequence[str] = ("shooting_days",), top_n: int = 10,
+                        search_space: Optional[Dict[str, Sequence[Any]]] = None) -> Dict[str, Any]:
+    """
+    Find the best production configurations whose recommended price fits the budget.
+
+    Configurations are ranked by the objective keys in order (a leading "-" minimises),
+    then by lower recommended price. Fields missing from the search space keep their
+    current production value; agency_markup is never searched.
+
+    Args:
+        questionnaire: Dictionary containing questionnaire responses
+        production_vars: Dictionary containing current production variables
+        rates: Rates dictionary or CompiledRateCard
+        budget_min: Lowest acceptable recommended price (defaults to questionnaire budget_min)
+        budget_max: Highest acceptable recommended price (defaults to questionnaire budget_max)
+        objective: Field names (or "recommended_quote") to maximise, "-name" to minimise
+        top_n: Number of configurations to return
+        search_space: Values to explore per field (defaults to BUDGET_SEARCH_SPACE)
+
+    Returns:
+        Dictionary with "results" (best first; each has "production_vars" and the
+        low/high/recommended quotes) and "stats" (nodes visited, pruned, rows priced)
+    """
+    card = compile_rates(rates)
+    budget_min = float(budget_min if budget_min is not None else questionnaire.get("budget_min") or 0)
+    budget_max = float(budget_max if budget_max is not None else questionnaire.get("budget_max") or 0)
+    if budget_max <= 0:
+        raise ValueError("A positive budget_max is required")
+
+    space = dict(BUDGET_SEARCH_SPACE if search_space is None else search_space)
+    goals = _parse_objective(objective)
+    domains = {name: list(space.get(name, [production_vars[name]])) for name in BUDGET_SEARCH_SPACE}
+    for name, sign in goals:
+        if name in domains:
+            # Explore the most promising objective values first
+            domains[name] = sorted(domains[name], key=lambda v: -sign * v)
+    order = [name for name, _ in goals if name in domains]
+    order += [name for name in domains if name not in order]
+
+    bounds = _Bounds(questionnaire, production_vars, card)
+    stats = {"nodes": 0, "pruned_budget": 0, "pruned_objective": 0, "leaf_blocks": 0, "rows_priced": 0}
+    best: List[Tuple[Tuple[float, ...], int, Dict[str, Any]]] = []  # Min-heap of (score, tiebreak, entry)
+    counter = [0]
+
+    def best_possible_score(domains_: Dict[str, List[Any]], price_low: float, price_high: float) -> Tuple[float, ...]:
+        # Only configurations inside the budget count, so the price bounds are clamped to it
+        price_low, price_high = max(price_low, budget_min), min(price_high, budget_max)
+        score = []
+        for name, sign in goals:
+            if name == PRICE_OBJECTIVE:
+                score.append(-price_low if sign < 0 else price_high)
+            else:
+                score.append(max(sign * v for v in domains_[name]))
+        return tuple(score) + (-price_low,)
+
+    def price_block(domains_: Dict[str, List[Any]]):
+        stats["leaf_blocks"] += 1
+        names = list(domains_)
+        columns: Dict[str, Any] = {
+            "video_length": questionnaire["video_length"],
+            "deliverables": questionnaire["deliverables"],
+            "agency_markup": production_vars["agency_markup"],
+        }
+        grids = np.meshgrid(*(np.arange(len(domains_[n])) for n in names), indexing="ij")
+        picks = {n: g.ravel() for n, g in zip(names, grids)}
+        for n in names:
+            values = domains_[n]
+            if n in CATEGORICAL_FIELDS:
+                columns[n] = np.asarray(values, dtype=object)[picks[n]]
+            else:
+                columns[n] = np.asarray(values)[picks[n]]
+        result = calculate_quotes_batch(columns, card)
+        recommended = result["recommended_quote"]
+        stats["rows_priced"] += recommended.size
+        fits = np.flatnonzero((recommended >= budget_min) & (recommended <= budget_max))
+        # Rank the fitting rows with NumPy and only score the block's top-N in Python
+        prices = recommended[fits].astype(np.int64)
+        keys = [
+            (-prices if sign < 0 else prices) if name == PRICE_OBJECTIVE else sign * columns[name][fits]
+            for name, sign in goals
+        ] + [-prices]
+        fits = fits[np.lexsort([-key for key in reversed(keys)])[:top_n]]
+        for i in fits:
+            config = {n: domains_[n][picks[n][i]] for n in names}
+            price = int(recommended[i])
+            score = tuple(
+                (-price if sign < 0 else price) if name == PRICE_OBJECTIVE else sign * config[name]
+                for name, sign in goals
+            ) + (-price,)
+            if len(best) >= top_n and score <= best[0][0]:
+                continue
+            entry = {
+                "production_vars": {**production_vars, **config},
+                "low_quote": int(result["low_quote"][i]),
+                "high_quote": int(result["high_quote"][i]),
+                "recommended_quote": price,
+            }
+            counter[0] += 1
+            if len(best) < top_n:
+                heapq.heappush(best, (score, counter[0], entry))
+            else:
+                heapq.heapreplace(best, (score, counter[0], entry))
+
+    def push(domains_: Dict[str, List[Any]], depth: int):
+        stats["nodes"] += 1
+        price_low, price_high = bounds.price_range(domains_)
+        if price_low > budget_max + BOUND_SLACK or price_high < budget_min - BOUND_SLACK:
+            stats["pruned_budget"] += 1
+            return
+        bound = best_possible_score(domains_, price_low, price_high)
+        counter[0] += 1
+        heapq.heappush(frontier, (tuple(-v for v in bound), counter[0], depth, domains_))
+
+    # Best-first: always expand the subtree with the best possible score, so the
+    # top-N fills with near-optimal configurations early and the search can stop
+    # as soon as no remaining subtree could beat it
+    frontier: List[Tuple[Tuple[float, ...], int, int, Dict[str, List[Any]]]] = []
+    push(domains, 0)
+    while frontier:
+        negated, _, depth, domains_ = heapq.heappop(frontier)
+        if len(best) >= top_n and tuple(-v for v in negated) <= best[0][0]:
+            stats["pruned_objective"] += 1 + len(frontier)
+            break
+        size = int(np.prod([len(values) for values in domains_.values()]))
+        if size <= LEAF_BLOCK_SIZE or depth >= len(order):
+            price_block(domains_)
+            continue
+        name = order[depth]
+        for value in domains_[name]:
+            push({**domains_, name: [value]}, depth + 1)
+
+    ranked = [entry for _, _, entry in sorted(best, key=lambda item: (item[0], -item[1]), reverse=True)]
+    return {"results": ranked, "stats": stats}
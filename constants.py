@@ -6,6 +6,19 @@ Constants and default values for the Lapis Visuals Pricing Calculator.
 PRODUCER_FEE_THRESHOLD = 20000000  # Projects < 20M don't get producer fee
 RECOMMENDED_PRICE_MARGIN = 1.12  # 12% margin for recommended price
 
+# Pricing assumptions that are not (yet) part of the editable rate card
+STORYBOARD_SPREAD = {"low": 0.8, "high": 1.2}  # Per-deliverable storyboard multipliers
+CREW_HIGH_MULTIPLIER = 1.2  # High crew estimate over the day rate total
+TALENT_RATES = {"low": 1000000, "high": 2000000}  # Per talent
+TALENT_AGENCY_MARKUP = {"low": 1.1, "high": 1.3}
+PROPS_DESIGN_COSTS = {
+    "basic": {"low": 2000000, "high": 3000000},
+    "custom": {"low": 3000000, "high": 5000000},
+    "elaborate": {"low": 5000000, "high": 8000000}
+}
+FOOTAGE_EDITING_FACTORS = {"low": 0.8, "standard": 1.0, "high": 1.3}
+SPECIAL_REQUIREMENT_COMPLEXITY = {"Motion Graphics": 0.2, "Green Screen": 0.15, "SFX": 0.1, "Aerial Shots": 0.2}
+
 # Default rates (fallback if rates.json is not found)
 DEFAULT_RATES = {
     "scriptwriting": {"base": 2000000, "complexity_factors": {"simple": 0.5, "standard": 1.0, "complex": 1.5}},
@@ -70,4 +83,43 @@ SPECIAL_REQUIREMENTS = ["SFX", "Motion Graphics", "Green Screen", "Aerial Shots"
 LOCATION_TYPES = ["none", "Studio (1.5 M)", "Styled Home (6 M)", "Rooftop Café (4.5 M)"]
 PROPS_DESIGN_LEVELS = ["basic", "custom", "elaborate"]
 FOOTAGE_VOLUME_LEVELS = ["low", "standard", "high"]
-USER_ROLES = ["Account Manager", "Producer / PM", "Finance", "Client"] 
\ No newline at end of file
+USER_ROLES = ["Account Manager", "Producer / PM", "Finance", "Client"] 
+# Default value ranges for the what-if price surface (see pricing_logic.sweep_price_surface)
+SWEEP_DEFAULT_RANGES = {
+    "shooting_days": [days / 2 for days in range(1, 29)],
+    "crew_size": list(range(1, 7)),
+    "location": LOCATION_TYPES,
+    "talent_count": list(range(0, 11)),
+    "agency_markup": [False, True],
+    "props_design": PROPS_DESIGN_LEVELS,
+    "footage_volume": FOOTAGE_VOLUME_LEVELS,
+    "contingency": list(range(0, 21, 5))
+}
+
+# Production options explored by the budget solver (see budget_solver.find_configurations)
+BUDGET_SEARCH_SPACE = {
+    "shooting_days": [days / 2 for days in range(1, 29)],
+    "crew_size": list(range(1, 7)),
+    "location": LOCATION_TYPES,
+    "talent_count": list(range(0, 21)),
+    "props_design": PROPS_DESIGN_LEVELS,
+    "footage_volume": FOOTAGE_VOLUME_LEVELS,
+    "contingency": list(range(0, 21))
+}
+BUDGET_SOLVER_OBJECTIVES = ["shooting_days", "crew_size", "talent_count", "contingency", "-recommended_quote"]
+
+# Maximum customers listed for a sidebar search
+CUSTOMER_SEARCH_LIMIT = 20
+
+# Default unit of amounts shown in the UI: "Rp", "jt", "M" or "auto" (see money.py); exports always use "Rp"
+CURRENCY_DISPLAY_UNIT = "Rp"
+
+# Quotes shown per page of a customer's quote list
+QUOTE_PAGE_SIZE = 20
+
+# Storage backend for quotes and customers: "json" or "sqlite" (see storage.py)
+STORAGE_BACKEND = "json"
+
+# Quote lifecycle; quotes in a final status keep a materialized line-item snapshot
+QUOTE_STATUSES = ["Draft", "Quoted", "Approved", "Rejected", "Invoiced", "Paid", "Archived"]
+FINAL_QUOTE_STATUSES = ["Approved", "Invoiced", "Paid"]
@@ -0,0 +1,145 @@
+"""
+Streaming Excel workbooks of quotes for the Lapis Visuals Pricing Calculator.
+
+Workbooks are written with openpyxl's write-only mode: every row goes straight
+to the sheet's temporary file as it is appended, so a portfolio of thousands
+of quotes is exported in constant memory. No pandas is involved.
+"""
+
+from datetime import date, datetime
+from typing import Dict, Any, BinaryIO, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from quote_utils import quote_line_items
+
+CURRENCY_FORMAT = "#,##0"
+DATE_FORMAT = "yyyy-mm-dd"
+_HEADER_FONT = Font(bold=True)
+
+# Portfolio sheets and their header rows
+PORTFOLIO_SHEETS = {
+    "Summary": ["Quote ID", "Customer ID", "Project Name", "Status", "Created",
+                "Low (Rp)", "Recommended (Rp)", "High (Rp)", "Rate Version"],
+    "Breakdown": ["Quote ID", "Item", "Low (Rp)", "High (Rp)"],
+    "Inputs": ["Quote ID", "Category", "Item", "Value"],
+}
+
+def _cell_value(value: Any) -> Any:
+    """A value Excel can store: lists are joined, unknown types become text."""
+    if isinstance(value, (list, tuple, set)):
+        return ", ".join(str(v) for v in value)
+    if value is None or isinstance(value, (str, int, float, bool, date, datetime)):
+        return value
+    return str(value)
+
+def detail_rows(questionnaire: Dict[str, Any], production_vars: Dict[str, Any]) -> Iterator[Tuple[str, str, Any]]:
+    """(category, item, value) rows describing a quote's inputs."""
+    for category, values in (("Client Brief", questionnaire), ("Production Variables", production_vars)):
+        for key, value in values.items():
+            yield category, key.replace("_", " ").title(), _cell_value(value)
+
+class _Sheet:
+    """Write-only worksheet with a bold header row and per-column number formats."""
+
+    def __init__(self, workbook: Workbook, title: str, headers: List[str], formats: Dict[int, str] = None):
+        self.sheet = workbook.create_sheet(title)
+        self.formats = formats or {}
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(self.sheet, value=header)
+            cell.font = _HEADER_FONT
+            header_cells.append(cell)
+        self.sheet.append(header_cells)
+
+    def append(self, row: Iterable[Any]) -> None:
+        if not self.formats:
+            self.sheet.append(row)
+            return
+        cells = []
+        for column, value in enumerate(row):
+            number_format = self.formats.get(column)
+            if number_format is None:
+                cells.append(value)
+            else:
+                cell = WriteOnlyCell(self.sheet, value=value)
+                cell.number_format = number_format
+                cells.append(cell)
+        self.sheet.append(cells)
+
+def write_quote_workbook(output: Union[str, BinaryIO], line_items: Dict[str, Dict[str, float]],
+                         questionnaire: Dict[str, Any], production_vars: Dict[str, Any],
+                         low_quote: float, high_quote: float, recommended: float) -> None:
+    """
+    Write one quote's workbook (Quote Breakdown, Quote Summary and Project Details sheets).
+
+    Args:
+        output: File path or binary file object
+        line_items: Quote line items
+        questionnaire: Dictionary containing questionnaire responses
+        production_vars: Dictionary containing production variables
+        low_quote, high_quote, recommended: Quote totals
+    """
+    workbook = Workbook(write_only=True)
+    breakdown = _Sheet(workbook, "Quote Breakdown", ["Item", "Low (Rp)", "High (Rp)"], {1: CURRENCY_FORMAT, 2: CURRENCY_FORMAT})
+    for item, values in line_items.items():
+        breakdown.append((item, values["low"], values["high"]))
+    summary = _Sheet(workbook, "Quote Summary", ["Item", "Amount (Rp)"], {1: CURRENCY_FORMAT})
+    for row in (("Low Estimate", low_quote), ("Recommended Price", recommended), ("High Estimate", high_quote)):
+        summary.append(row)
+    details = _Sheet(workbook, "Project Details", ["Category", "Item", "Value"])
+    for row in detail_rows(questionnaire, production_vars):
+        details.append(row)
+    workbook.save(output)
+
+def write_portfolio_workbook(output: Union[str, BinaryIO], quotes: Iterable[Dict[str, Any]],
+                             line_items: Callable[[Dict[str, Any]], Dict[str, Dict[str, float]]] = quote_line_items,
+                             progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+    """
+    Stream many quotes into one workbook with Summary, Breakdown and Inputs sheets.
+
+    Args:
+        output: File path or binary file object
+        quotes: Quote records, streamed once (e.g. from batch_export.select_quotes())
+        line_items: Returns a quote's line items (default: quote_line_items)
+        progress: Called with the number of quotes written so far
+
+    Returns:
+        Dictionary with "quotes" (Summary rows written, including failed quotes) and
+        "failed" ((quote_id, error) pairs of quotes whose line items could not be
+        produced; their Summary row is kept)
+    """
+    workbook = Workbook(write_only=True)
+    money = {column: CURRENCY_FORMAT for column in (5, 6, 7)}
+    summary = _Sheet(workbook, "Summary", PORTFOLIO_SHEETS["Summary"], {4: DATE_FORMAT, **money})
+    breakdown = _Sheet(workbook, "Breakdown", PORTFOLIO_SHEETS["Breakdown"], {2: CURRENCY_FORMAT, 3: CURRENCY_FORMAT})
+    inputs = _Sheet(workbook, "Inputs", PORTFOLIO_SHEETS["Inputs"])
+    result = {"quotes": 0, "failed": []}
+    for quote in quotes:
+        quote_id = quote.get("quote_id")
+        created = quote.get("creation_date")
+        if isinstance(created, str):
+            try:
+                created = datetime.fromisoformat(created)
+            except ValueError:
+                pass
+        summary.append((
+            quote_id, quote.get("customer_id"), quote.get("project_name"), quote.get("status"), _cell_value(created),
+            quote.get("low_quote"), quote.get("recommended_quote"), quote.get("high_quote"), quote.get("rate_version")
+        ))
+        try:
+            items = line_items(quote)
+        except Exception as e:
+            result["failed"].append((quote_id, f"{type(e).__name__}: {e}"))
+            items = {}
+        for item, values in items.items():
+            breakdown.append((quote_id, item, values["low"], values["high"]))
+        for row in detail_rows(quote.get("questionnaire_snapshot") or {}, quote.get("production_vars_snapshot") or {}):
+            inputs.append((quote_id, *row))
+        result["quotes"] += 1
+        if progress:
+            progress(result["quotes"])
+    workbook.save(output)
+    return result
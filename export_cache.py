@@ -0,0 +1,127 @@
+"""
+On-demand, memoized quote exports for the Lapis Visuals Pricing Calculator.
+
+Excel and PDF files are only built when a download is requested. The bytes are
+kept in a process-wide cache bounded by total size and keyed by a content hash
+of everything the file shows (line items, inputs, totals, rate version and
+date), so repeated downloads of the same quote are served without rebuilding.
+"""
+
+import copy
+import datetime
+import hashlib
+import json
+from typing import Dict, Any, Callable, Hashable
+
+from export_utils import generate_excel, generate_pdf_bytes
+from quote_cache import LRUCache
+
+EXPORT_CACHE_BYTES = 64 << 20
+
+# Export kind -> (builder, file extension, MIME type)
+EXPORT_FORMATS = {
+    "excel": (generate_excel, "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "pdf": (generate_pdf_bytes, "pdf", "application/pdf"),
+}
+
+class ByteLRUCache(LRUCache):
+    """LRUCache of bytes values bounded by their total size instead of their count."""
+
+    def __init__(self, maxbytes: int):
+        super().__init__(maxsize=0)
+        self.maxbytes = maxbytes
+        self.bytes = 0
+
+    def put(self, key: Hashable, value: bytes) -> None:
+        """Store a value, evicting the least recently used entries beyond maxbytes."""
+        if len(value) > self.maxbytes:
+            return  # Would evict everything else and still not fit
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= len(previous)
+            self._entries[key] = value
+            self.bytes += len(value)
+            while self.bytes > self.maxbytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters, the current size and bytes held."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "bytes": self.bytes,
+                "maxbytes": self.maxbytes,
+            }
+
+# Shared by every session in the process
+EXPORT_CACHE = ByteLRUCache(EXPORT_CACHE_BYTES)
+
+def export_fingerprint(kind: str, line_items: Dict[str, Dict[str, float]], questionnaire: Dict[str, Any],
+                       production_vars: Dict[str, Any], low_quote: float, high_quote: float,
+                       recommended: float, rate_version: str) -> str:
+    """
+    Return a content hash of everything an export file contains.
+
+    Args:
+        kind: Key of EXPORT_FORMATS
+        line_items: Quote line items
+        questionnaire: Dictionary containing questionnaire responses
+        production_vars: Dictionary containing production variables
+        low_quote, high_quote, recommended: Quote totals
+        rate_version: Fingerprint of the rate card the quote was priced with
+
+    Returns:
+        Hex digest identifying the export
+    """
+    payload = {
+        "kind": kind,
+        "items": line_items,
+        "q": questionnaire,
+        "p": production_vars,
+        "totals": [low_quote, high_quote, recommended],
+        "rates": rate_version,
+        # Exports are dated, so a file is only reused on the day it was built
+        "date": datetime.date.today().isoformat(),
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def lazy_export(kind: str, line_items: Dict[str, Dict[str, float]], questionnaire: Dict[str, Any],
+                production_vars: Dict[str, Any], low_quote: float, high_quote: float,
+                recommended: float, rate_version: str) -> Callable[[], bytes]:
+    """
+    Return a zero-argument provider of an export file's bytes.
+
+    Nothing is built until the provider is called (st.download_button calls it
+    on click, from another thread), so the inputs are copied now.
+
+    Args:
+        Same as export_fingerprint()
+
+    Returns:
+        Callable returning the file bytes, from EXPORT_CACHE when possible
+    """
+    builder = EXPORT_FORMATS[kind][0]
+    inputs = copy.deepcopy((line_items, questionnaire, production_vars, low_quote, high_quote, recommended))
+    key = export_fingerprint(kind, *inputs, rate_version)
+    return lambda: EXPORT_CACHE.get_or_compute(key, lambda: builder(*inputs))
+
+def export_file_name(kind: str) -> str:
+    """Dated download file name for an export kind."""
+    return f"lapis_quote_{datetime.datetime.now().strftime('%Y%m%d')}.{EXPORT_FORMATS[kind][1]}"
+
+def export_cache_stats() -> Dict[str, int]:
+    """Return the shared export cache's counters."""
+    return EXPORT_CACHE.stats()
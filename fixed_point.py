@@ -0,0 +1,223 @@
+"""
+Fixed-point integer pricing for the Lapis Visuals Pricing Calculator.
+
+Money is held as integer sen (1/100 rupiah) and multipliers/fractional quantities
+as integer millionths, so batch results are exact and bit-reproducible on any
+machine. There is one rounding policy, round half up, used both when inputs
+and rates are scaled to integers and whenever a scaled product is brought back
+to its unit ((n + d // 2) // d). Final quotes are rounded half up to whole
+rupiah (the float engine truncates).
+
+Intermediate values stay within int64 for amounts up to roughly Rp 70 billion.
+"""
+
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Any, Mapping, Tuple
+
+import numpy as np
+
+from constants import PRODUCER_FEE_THRESHOLD, RECOMMENDED_PRICE_MARGIN
+from pricing_logic import CompiledRateCard, RatesLike, compile_rates, prepare_batch_columns
+
+MONEY_SCALE = 100  # Sen per rupiah
+RATIO_SCALE = 1_000_000  # Multipliers and fractional quantities in millionths
+PERCENT_SCALE = 100  # Contingency percent in hundredths of a percent
+
+@dataclass(frozen=True)
+class FixedRateCard:
+    """Integer copy of a CompiledRateCard: money in sen, multipliers in millionths."""
+    fingerprint: str
+    scriptwriting_low: int
+    scriptwriting_high: int
+    storyboard_low_rate: int
+    storyboard_high_rate: int
+    crew_prefix_sums: Tuple[int, ...]
+    crew_high_multiplier: int
+    equipment_low: int
+    equipment_high: int
+    talent_low_rates: Tuple[int, int]
+    talent_high_rates: Tuple[int, int]
+    location_costs: Tuple[int, ...]
+    props_low_costs: Tuple[int, ...]
+    props_high_costs: Tuple[int, ...]
+    post_low_per_minute: Tuple[int, ...]
+    post_high_per_minute: Tuple[int, ...]
+    producer_fee_percent: int
+    recommended_margin: int
+    producer_fee_threshold: int
+
+def div_round(numerator, denominator: int):
+    """Divide and round half up; works on Python ints and NumPy int64 arrays alike."""
+    return (numerator + denominator // 2) // denominator
+
+def scale_round(value, scale: int):
+    """Scale a float (or float array) to integers, rounding half up."""
+    if isinstance(value, np.ndarray):
+        return np.floor(value * scale + 0.5).astype(np.int64)
+    return math.floor(value * scale + 0.5)
+
+def to_sen(amount: float) -> int:
+    """Convert a rupiah amount to integer sen."""
+    return scale_round(amount, MONEY_SCALE)
+
+def to_ratio(value: float) -> int:
+    """Convert a multiplier or fractional quantity to integer millionths."""
+    return scale_round(value, RATIO_SCALE)
+
+@lru_cache(maxsize=32)
+def compile_fixed_rates(card: CompiledRateCard) -> FixedRateCard:
+    """
+    Convert a compiled rate card to fixed point (cached per card).
+
+    Args:
+        card: Compiled rate card
+
+    Returns:
+        FixedRateCard with the same tables in integer units
+    """
+    return FixedRateCard(
+        fingerprint=card.fingerprint,
+        scriptwriting_low=to_sen(card.scriptwriting_low),
+        scriptwriting_high=to_sen(card.scriptwriting_high),
+        storyboard_low_rate=to_sen(card.storyboard_low_rate),
+        storyboard_high_rate=to_sen(card.storyboard_high_rate),
+        crew_prefix_sums=tuple(to_sen(v) for v in card.crew_prefix_sums),
+        crew_high_multiplier=to_ratio(card.crew_high_multiplier),
+        equipment_low=to_sen(card.equipment_low),
+        equipment_high=to_sen(card.equipment_high),
+        talent_low_rates=tuple(to_sen(v) for v in card.talent_low_rates),
+        talent_high_rates=tuple(to_sen(v) for v in card.talent_high_rates),
+        location_costs=tuple(to_sen(v) for v in card.location_costs),
+        props_low_costs=tuple(to_sen(v) for v in card.props_low_costs),
+        props_high_costs=tuple(to_sen(v) for v in card.props_high_costs),
+        post_low_per_minute=tuple(to_sen(v) for v in card.post_low_per_minute),
+        post_high_per_minute=tuple(to_sen(v) for v in card.post_high_per_minute),
+        producer_fee_percent=to_ratio(card.producer_fee_percent),
+        recommended_margin=to_ratio(RECOMMENDED_PRICE_MARGIN),
+        producer_fee_threshold=to_sen(PRODUCER_FEE_THRESHOLD),
+    )
+
+def _price_fixed(fixed: FixedRateCard, lookup, c: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shared fixed-point formulas.
+
+    c holds scaled inputs (video_length/shooting_days in millionths, contingency
+    in hundredths of a percent, categories as positions) as ints or int64 arrays;
+    lookup(table, positions) indexes a card table with them.
+    """
+    scriptwriting_low = fixed.scriptwriting_low
+    scriptwriting_high = fixed.scriptwriting_high
+    storyboard_low = fixed.storyboard_low_rate * c["deliverables"]
+    storyboard_high = fixed.storyboard_high_rate * c["deliverables"]
+    location_cost = lookup(fixed.location_costs, c["location"])
+
+    crew_cost_low = div_round(lookup(fixed.crew_prefix_sums, c["crew_size"]) * c["shooting_days"], RATIO_SCALE)
+    crew_cost_high = div_round(crew_cost_low * fixed.crew_high_multiplier, RATIO_SCALE)
+    equipment_low = div_round(fixed.equipment_low * c["shooting_days"], RATIO_SCALE)
+    equipment_high = div_round(fixed.equipment_high * c["shooting_days"], RATIO_SCALE)
+    talent_low = c["talent_count"] * lookup(fixed.talent_low_rates, c["agency_markup"])
+    talent_high = c["talent_count"] * lookup(fixed.talent_high_rates, c["agency_markup"])
+    props_low = lookup(fixed.props_low_costs, c["props_design"])
+    props_high = lookup(fixed.props_high_costs, c["props_design"])
+    post_low = div_round(lookup(fixed.post_low_per_minute, c["footage_volume"]) * c["video_length"], RATIO_SCALE)
+    post_high = div_round(lookup(fixed.post_high_per_minute, c["footage_volume"]) * c["video_length"], RATIO_SCALE)
+
+    low_subtotal = (
+        scriptwriting_low + storyboard_low + location_cost +
+        crew_cost_low + equipment_low + talent_low + props_low + post_low
+    )
+    high_subtotal = (
+        scriptwriting_high + storyboard_high + location_cost +
+        crew_cost_high + equipment_high + talent_high + props_high + post_high
+    )
+
+    fee_applies = low_subtotal >= fixed.producer_fee_threshold
+    producer_fee_low = div_round(low_subtotal * fixed.producer_fee_percent, RATIO_SCALE) * fee_applies
+    producer_fee_high = div_round(high_subtotal * fixed.producer_fee_percent, RATIO_SCALE) * fee_applies
+
+    contingency_low = div_round(low_subtotal * c["contingency"], 100 * PERCENT_SCALE)
+    contingency_high = div_round(high_subtotal * c["contingency"], 100 * PERCENT_SCALE)
+
+    low_total = low_subtotal + producer_fee_low + contingency_low
+    high_total = high_subtotal + producer_fee_high + contingency_high
+    recommended_total = div_round((low_total + high_total) * fixed.recommended_margin, 2 * RATIO_SCALE)
+
+    return {
+        "low_quote": div_round(low_total, MONEY_SCALE),
+        "high_quote": div_round(high_total, MONEY_SCALE),
+        "recommended_quote": div_round(recommended_total, MONEY_SCALE),
+        "low_subtotal": low_subtotal,
+        "high_subtotal": high_subtotal,
+        "line_items": {
+            "Pre-production": {"low": scriptwriting_low + storyboard_low, "high": scriptwriting_high + storyboard_high},
+            "Crew Costs": {"low": crew_cost_low, "high": crew_cost_high},
+            "Equipment": {"low": equipment_low, "high": equipment_high},
+            "Location": {"low": location_cost, "high": location_cost},
+            "Talent": {"low": talent_low, "high": talent_high},
+            "Props & Set Design": {"low": props_low, "high": props_high},
+            "Post-production": {"low": post_low, "high": post_high},
+            "Producer Fee": {"low": producer_fee_low, "high": producer_fee_high},
+            "Contingency": {"low": contingency_low, "high": contingency_high},
+        },
+        "money_unit": "sen",
+    }
+
+def calculate_quote_fixed(questionnaire: Dict[str, Any], production_vars: Dict[str, Any], rates: RatesLike) -> Tuple[int, int, int]:
+    """
+    Scalar fixed-point quote; identical to the corresponding calculate_quotes_batch(arithmetic="fixed") row.
+
+    Args:
+        questionnaire: Dictionary containing questionnaire responses
+        production_vars: Dictionary containing production variables
+        rates: Rates dictionary or CompiledRateCard
+
+    Returns:
+        Tuple of (low_quote, high_quote, recommended_quote) in whole rupiah
+    """
+    card = compile_rates(rates)
+    p = production_vars
+    c = {
+        "video_length": to_ratio(questionnaire["video_length"]),
+        "deliverables": int(questionnaire["deliverables"]),
+        "shooting_days": to_ratio(p["shooting_days"]),
+        "crew_size": max(0, min(int(p["crew_size"]), len(card.crew_prefix_sums) - 1)),
+        "location": card.location_index[p["location"]],
+        "talent_count": int(p["talent_count"]),
+        "agency_markup": 1 if p["agency_markup"] else 0,
+        "props_design": card.props_position(p["props_design"]),
+        "footage_volume": card.footage_position(p["footage_volume"]),
+        "contingency": scale_round(p["contingency"], PERCENT_SCALE),
+    }
+    result = _price_fixed(compile_fixed_rates(card), lambda table, i: table[i], c)
+    return int(result["low_quote"]), int(result["high_quote"]), int(result["recommended_quote"])
+
+def calculate_quotes_batch_fixed(inputs: Mapping[str, Any], rates: RatesLike) -> Dict[str, Any]:
+    """
+    Batch pricing on NumPy int64 arrays (see pricing_logic.calculate_quotes_batch).
+
+    Args:
+        inputs: pandas DataFrame or dict of arrays/scalars keyed by BATCH_INPUT_COLUMNS
+        rates: Rates dictionary or CompiledRateCard
+
+    Returns:
+        Same layout as calculate_quotes_batch(): quotes are int64 whole rupiah,
+        subtotals and line items are int64 sen ("money_unit": "sen")
+    """
+    card = compile_rates(rates)
+    fixed = compile_fixed_rates(card)
+    columns = prepare_batch_columns(inputs, card)
+    c = {
+        "video_length": scale_round(columns["video_length"], RATIO_SCALE),
+        "deliverables": columns["deliverables"].astype(np.int64),
+        "shooting_days": scale_round(columns["shooting_days"], RATIO_SCALE),
+        "crew_size": columns["crew_size"],
+        "location": columns["location"],
+        "talent_count": columns["talent_count"].astype(np.int64),
+        "agency_markup": columns["agency_markup"],
+        "props_design": columns["props_design"],
+        "footage_volume": columns["footage_volume"],
+        "contingency": scale_round(columns["contingency"].astype(np.float64), PERCENT_SCALE),
+    }
+    return _price_fixed(fixed, lambda table, i: np.asarray(table, dtype=np.int64)[i], c)
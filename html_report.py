@@ -0,0 +1,155 @@
+"""
+HTML quote documents for the Lapis Visuals Pricing Calculator.
+
+The document, a quote section and each kind of table row have a fixed
+f-string renderer. Client text (project names, concepts, questionnaire
+answers) is escaped per cell; labels and line item names recur in every quote,
+so their escaped forms are cached. A report of thousands of quotes joins each
+quote's rows once and the sections once at the end.
+"""
+
+import datetime
+from functools import lru_cache
+from html import escape
+from typing import Dict, Any, Callable, Iterable, Iterator
+
+from money import format_rupiah
+from quote_utils import quote_line_items
+
+_STYLE = """    <style>
+        body { font-family: Arial, sans-serif; margin: 40px; }
+        h1 { color: #2C3E50; }
+        .summary { display: flex; justify-content: space-between; margin: 20px 0; }
+        .summary-item { padding: 15px; background-color: #f8f9fa; border-radius: 5px; width: 30%; text-align: center; }
+        .summary-value { font-size: 24px; font-weight: bold; margin: 10px 0; }
+        .quote { page-break-after: always; }
+        table { width: 100%; border-collapse: collapse; margin: 20px 0; }
+        th, td { padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }
+        th { background-color: #f2f2f2; }
+        .footer { margin-top: 30px; font-size: 12px; color: #666; }
+    </style>
+"""
+
+@lru_cache(maxsize=256)
+def _field_label(key: str) -> str:
+    """Escaped display label of a questionnaire key."""
+    return escape(key.replace("_", " ").title())
+
+@lru_cache(maxsize=256)
+def _item_label(item: str) -> str:
+    """Escaped line item name (the same few names recur in every quote)."""
+    return escape(item)
+
+def _detail_value(value: Any) -> str:
+    """Escaped display text of a questionnaire answer."""
+    if value.__class__ is not str:
+        if isinstance(value, (list, tuple)):
+            value = ", ".join(str(v) for v in value) if value else "None"
+        elif isinstance(value, (datetime.date, datetime.datetime)):
+            value = value.strftime("%Y-%m-%d")
+        else:
+            value = str(value)
+    # Most answers hold no markup characters; skip escape()'s five replace() passes for those
+    if "&" in value or "<" in value or ">" in value or '"' in value or "'" in value:
+        return escape(value)
+    return value
+
+def _detail_rows(questionnaire: Dict[str, Any]) -> str:
+    return "".join([
+        f"        <tr><td>{_field_label(key)}</td><td>{_detail_value(value)}</td></tr>\n"
+        for key, value in questionnaire.items()
+    ])
+
+def _item_rows(line_items: Dict[str, Dict[str, float]]) -> str:
+    # Amounts come from format_rupiah() (digits, separators and "Rp"), so they need no escaping
+    return "".join([
+        f"        <tr><td>{_item_label(item)}</td><td>{format_rupiah(values['low'])}</td>"
+        f"<td>{format_rupiah(values['high'])}</td></tr>\n"
+        for item, values in line_items.items()
+    ])
+
+def render_quote_heading(project_name: str, quote_id: Any) -> str:
+    """Heading of one quote in a multi-quote report."""
+    return f"<h2>{escape(str(project_name))} <small>({escape(str(quote_id))})</small></h2>"
+
+def render_quote_section(line_items: Dict[str, Dict[str, float]], questionnaire: Dict[str, Any],
+                         low_quote: float, high_quote: float, recommended: float, heading: str = "") -> str:
+    """
+    Render one quote's summary, project details and cost breakdown.
+
+    Args:
+        line_items: Quote line items
+        questionnaire: Dictionary containing questionnaire responses
+        low_quote, high_quote, recommended: Quote totals
+        heading: Rendered HTML placed above the section (e.g. render_quote_heading())
+
+    Returns:
+        HTML fragment for render_document()
+    """
+    return f"""
+    <div class="quote">
+    {heading}
+    <h2>Quote Summary</h2>
+    <div class="summary">
+        <div class="summary-item"><div>Low Estimate</div><div class="summary-value">{format_rupiah(low_quote)}</div></div>
+        <div class="summary-item"><div>Recommended</div><div class="summary-value">{format_rupiah(recommended)}</div></div>
+        <div class="summary-item"><div>High Estimate</div><div class="summary-value">{format_rupiah(high_quote)}</div></div>
+    </div>
+    <h2>Project Details</h2>
+    <table>
+        <tr><th>Item</th><th>Value</th></tr>
+{_detail_rows(questionnaire)}
+    </table>
+    <h2>Cost Breakdown</h2>
+    <table>
+        <tr><th>Item</th><th>Low (Rp)</th><th>High (Rp)</th></tr>
+{_item_rows(line_items)}
+    </table>
+    </div>
+"""
+
+def render_document(sections: Iterable[str], title: str = "Lapis Visuals - Project Quote") -> str:
+    """Wrap rendered quote sections in the HTML document."""
+    title = escape(title)
+    return f"""
+<html>
+<head>
+    <title>{title}</title>
+{_STYLE}</head>
+<body>
+    <h1>{title}</h1>
+    <p>Date: {datetime.datetime.now().strftime("%Y-%m-%d")}</p>
+{"".join(sections)}
+    <div class="footer">
+        <p>Generated by Lapis Visuals Pricing Calculator</p>
+        <p>This quote is valid for 30 days from the date above.</p>
+    </div>
+</body>
+</html>
+"""
+
+def quote_sections(quotes: Iterable[Dict[str, Any]],
+                   line_items: Callable[[Dict[str, Any]], Dict[str, Dict[str, float]]] = quote_line_items) -> Iterator[str]:
+    """Render a section per saved quote record, headed by its project name and ID."""
+    for quote in quotes:
+        yield render_quote_section(
+            line_items(quote), quote.get("questionnaire_snapshot") or {},
+            quote.get("low_quote", 0), quote.get("high_quote", 0), quote.get("recommended_quote", 0),
+            heading=render_quote_heading(quote.get("project_name") or "Untitled Project", quote.get("quote_id"))
+        )
+
+def generate_report_html(quotes: Iterable[Dict[str, Any]],
+                         line_items: Callable[[Dict[str, Any]], Dict[str, Dict[str, float]]] = quote_line_items,
+                         title: str = "Lapis Visuals - Quote Report") -> str:
+    """
+    Render many saved quotes into one HTML report.
+
+    Args:
+        quotes: Saved quote records
+        line_items: Returns a quote's line items (default: quote_line_items)
+        title: Document title
+
+    Returns:
+        HTML document
+    """
+    return render_document(quote_sections(quotes, line_items), title)
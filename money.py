@@ -0,0 +1,160 @@
+"""
+Indonesian Rupiah formatting for the Lapis Visuals Pricing Calculator.
+
+format_rupiah() formats one amount ("Rp 12.500.000", or abbreviated as
+"Rp 12,5 jt" / "Rp 1,2 M"). format_rupiah_array() formats a whole column:
+it writes every digit, separator, sign and affix into one byte matrix with
+NumPy integer arithmetic, so a table column costs a few dozen array passes
+instead of a Python call per cell. Both paths use the same rounding, so they
+produce identical strings.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# Display units: name -> (divisor, default decimals, suffix)
+MONEY_UNITS: Dict[str, Tuple[float, int, str]] = {
+    "Rp": (1.0, 0, ""),
+    "jt": (1e6, 1, " jt"),   # juta (million)
+    "M": (1e9, 1, " M"),     # miliar (billion)
+}
+# "auto" picks the largest unit an amount reaches
+AUTO_UNIT = "auto"
+UNIT_CHOICES = (*MONEY_UNITS, AUTO_UNIT)
+
+CURRENCY_PREFIX = "Rp "
+MISSING_AMOUNT = "N/A"  # None, NaN and infinite amounts
+
+# Below these many values the per-value path is faster than the array passes.
+# Measured crossovers: about 300 values in exact rupiah (format_rupiah()'s
+# one-f-string fast path), about 200 in "auto" (up to three array passes) and
+# about 100 in the scaled units or with decimals.
+VECTOR_MIN_SIZE = 400
+AUTO_VECTOR_MIN_SIZE = 200
+SCALED_VECTOR_MIN_SIZE = 128
+
+_MAX_DIGITS = 18  # Integer parts below 10**18 are laid out by the array path
+_INT64_LIMIT = 2.0 ** 63  # Scaled amounts must stay below this to cast to int64
+
+def _auto_unit(amount: float) -> str:
+    magnitude = abs(amount)
+    return "M" if magnitude >= 1e9 else "jt" if magnitude >= 1e6 else "Rp"
+
+def format_rupiah(value: Any, unit: str = "Rp", decimals: Optional[int] = None) -> str:
+    """
+    Format one amount in Indonesian notation ("." thousands, "," decimals).
+
+    Args:
+        value: Amount in rupiah
+        unit: Key of MONEY_UNITS or "auto"
+        decimals: Digits after the decimal comma (default: the unit's)
+
+    Returns:
+        Formatted amount, or MISSING_AMOUNT for None, NaN and infinity
+    """
+    if unit == "Rp" and not decimals:
+        try:
+            return f"Rp {round(value):,}".replace(",", ".")
+        except (TypeError, ValueError, OverflowError):
+            return MISSING_AMOUNT
+    try:
+        if unit == AUTO_UNIT:
+            unit = _auto_unit(value)
+        divisor, default_decimals, suffix = MONEY_UNITS[unit]
+        decimals = default_decimals if decimals is None else decimals
+        number = round(abs(value) / divisor * 10 ** decimals)
+    except (TypeError, ValueError, OverflowError):
+        return MISSING_AMOUNT
+    whole, fraction = divmod(number, 10 ** decimals)
+    text = f"{whole:,}".replace(",", ".") + (f",{fraction:0{decimals}d}" if decimals else "")
+    sign = "-" if value < 0 and number else ""
+    return f"{CURRENCY_PREFIX}{sign}{text}{suffix}"
+
+def _format_fixed(values: np.ndarray, unit: str, decimals: Optional[int]) -> np.ndarray:
+    """Vectorized format_rupiah() of float64 values in one unit."""
+    divisor, default_decimals, suffix = MONEY_UNITS[unit]
+    decimals = default_decimals if decimals is None else decimals
+    count = len(values)
+    with np.errstate(invalid="ignore", over="ignore"):
+        scaled = np.rint(np.abs(values) / divisor * 10 ** decimals)
+        # Anything larger (or NaN / infinite) goes to format_rupiah() instead
+        valid = np.isfinite(scaled) & (scaled < min(_INT64_LIMIT, 10.0 ** (_MAX_DIGITS + decimals)))
+    number = np.where(valid, scaled, 0).astype(np.int64)
+    whole, fraction = np.divmod(number, 10 ** decimals)
+    negative = (values < 0) & (number > 0)
+
+    digits = np.ones(count, dtype=np.int64)
+    for power in range(1, _MAX_DIGITS):
+        digits += whole >= 10 ** power
+    max_digits = int(digits.max()) if count else 1
+
+    # Right-aligned layout: [padding][prefix][sign][digits with dots][,fraction][suffix]
+    tail = len(suffix) + (decimals + 1 if decimals else 0)
+    width = len(CURRENCY_PREFIX) + 1 + max_digits + (max_digits - 1) // 3 + tail
+    chars = np.full((count, width), ord(" "), dtype=np.uint8)
+    if suffix:
+        chars[:, width - len(suffix):] = np.frombuffer(suffix.encode(), dtype=np.uint8)
+    if decimals:
+        end = width - len(suffix)
+        remaining = fraction
+        for position in range(1, decimals + 1):
+            remaining, digit = np.divmod(remaining, 10)
+            chars[:, end - position] = digit + ord("0")
+        chars[:, end - decimals - 1] = ord(",")
+    last = width - 1 - tail  # Column of the units digit
+    remaining = whole
+    for place in range(max_digits):
+        column = last - place - place // 3
+        present = place < digits
+        remaining, digit = np.divmod(remaining, 10)
+        chars[:, column] = np.where(present | (place == 0), digit + ord("0"), ord(" "))
+        if place and place % 3 == 0:
+            chars[:, column + 1] = np.where(present, ord("."), ord(" "))
+    first = last - (digits - 1) - (digits - 1) // 3  # Column of the leading digit
+    rows = np.arange(count)
+    chars[rows[negative], first[negative] - 1] = ord("-")
+    start = first - negative - len(CURRENCY_PREFIX)
+    for offset, byte in enumerate(CURRENCY_PREFIX.encode()):
+        chars[rows, start + offset] = byte
+
+    formatted = np.char.lstrip(chars.view(f"S{width}").ravel(), b" ").astype(str)
+    if not valid.all():
+        # NaN, infinity or beyond int64: may not fit the fixed-width strings
+        formatted = formatted.astype(object)
+        for index in np.flatnonzero(~valid):
+            formatted[index] = format_rupiah(float(values[index]), unit, decimals)
+    return formatted
+
+def _vector_min_size(unit: str, decimals: Optional[int]) -> int:
+    if decimals:
+        return SCALED_VECTOR_MIN_SIZE
+    if unit == "Rp":
+        return VECTOR_MIN_SIZE
+    return AUTO_VECTOR_MIN_SIZE if unit == AUTO_UNIT else SCALED_VECTOR_MIN_SIZE
+
+def format_rupiah_array(values: Any, unit: str = "Rp", decimals: Optional[int] = None) -> np.ndarray:
+    """
+    Vectorized format_rupiah() for a whole column.
+
+    Args:
+        values: Sequence, NumPy array or pandas Series of amounts (None allowed)
+        unit: Key of MONEY_UNITS or "auto"
+        decimals: Digits after the decimal comma (default: each unit's)
+
+    Returns:
+        NumPy array of formatted strings, in the order of values
+    """
+    amounts = np.asarray(values, dtype=np.float64).ravel()
+    if len(amounts) < _vector_min_size(unit, decimals):
+        return np.array([format_rupiah(float(amount), unit, decimals) for amount in amounts], dtype=object)
+    if unit != AUTO_UNIT:
+        return _format_fixed(amounts, unit, decimals)
+    formatted = np.empty(len(amounts), dtype=object)
+    magnitude = np.abs(amounts)
+    units = np.where(magnitude >= 1e9, 2, np.where(magnitude >= 1e6, 1, 0))
+    for code, name in enumerate(MONEY_UNITS):  # Codes follow the order Rp, jt, M
+        mask = units == code
+        if mask.any():
+            formatted[mask] = format_rupiah_array(amounts[mask], name, decimals)
+    return formatted
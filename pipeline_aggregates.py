@@ -0,0 +1,184 @@
+"""
+Incrementally maintained pipeline totals for the Lapis Visuals Pricing Calculator.
+
+The quote count and recommended value are kept per status, customer, creation
+month and video format in data/pipeline_aggregates.json. quote_utils applies
+each saved change as a delta (a quote moving from Quoted to Approved subtracts
+its value from one status and adds it to the other), holding aggregates_lock()
+across the store write and the delta, so reading the totals never scans the
+quotes. rebuild_aggregates() recomputes everything from the
+quote store, and verify_aggregates() reports any drift between the two.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from safe_io import atomic_write_json, file_lock
+from storage import get_quote_store
+
+AGGREGATES_FILE = "data/pipeline_aggregates.json"
+
+# Aggregate dimensions and how each quote is keyed in them
+AGGREGATE_DIMENSIONS = {
+    "by_status": lambda quote: quote.get("status") or "Unknown",
+    "by_customer": lambda quote: quote.get("customer_id") or "Unknown",
+    "by_month": lambda quote: _month(quote.get("creation_date")),
+    "by_format": lambda quote: (quote.get("questionnaire_snapshot") or {}).get("format") or "Unknown",
+}
+
+# Fields the dimensions and values read
+AGGREGATE_FIELDS = ("status", "customer_id", "creation_date", "questionnaire_snapshot", "recommended_quote")
+
+_cache: Dict[str, Tuple[Any, Dict[str, Any]]] = {}  # path -> (file stat, aggregates)
+_cache_lock = threading.Lock()
+
+def _month(value: Any) -> str:
+    """"YYYY-MM" of a datetime or an ISO date string."""
+    month = str(value or "")[:7]
+    return month if len(month) == 7 and month[4] == "-" else "Unknown"
+
+def _contribution(quote: Dict[str, Any]) -> List[Tuple[str, str, float]]:
+    """(dimension, group, value) entries one quote adds to the totals."""
+    try:
+        value = float(quote.get("recommended_quote") or 0)
+    except (TypeError, ValueError):
+        value = 0.0
+    return [(dimension, str(key(quote)), value) for dimension, key in AGGREGATE_DIMENSIONS.items()]
+
+def _empty() -> Dict[str, Any]:
+    return {"total": {"quotes": 0, "value": 0.0}, **{dimension: {} for dimension in AGGREGATE_DIMENSIONS}}
+
+def _add(aggregates: Dict[str, Any], quote: Dict[str, Any], sign: int) -> None:
+    """Add (sign=1) or remove (sign=-1) one quote's contribution."""
+    entries = _contribution(quote)
+    aggregates["total"]["quotes"] += sign
+    aggregates["total"]["value"] += sign * entries[0][2]
+    for dimension, group, value in entries:
+        groups = aggregates[dimension]
+        totals = groups.setdefault(group, {"quotes": 0, "value": 0.0})
+        totals["quotes"] += sign
+        totals["value"] += sign * value
+        if totals["quotes"] == 0:
+            del groups[group]
+
+def compute_aggregates(quotes: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Totals over quote records (at least AGGREGATE_FIELDS)."""
+    aggregates = _empty()
+    for quote in quotes:
+        _add(aggregates, quote, 1)
+    return aggregates
+
+def _stat(path: str) -> Any:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+def _load(path: str) -> Optional[Dict[str, Any]]:
+    """Stored aggregates (cached per process until the file changes), or None."""
+    stat = _stat(path)
+    if stat is None:
+        return None
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == stat:
+            return cached[1]
+    with open(path, "r") as f:
+        aggregates = json.load(f)
+    with _cache_lock:
+        _cache[path] = (stat, aggregates)
+    return aggregates
+
+def _save(path: str, aggregates: Dict[str, Any]) -> None:
+    atomic_write_json(path, aggregates)
+    with _cache_lock:
+        _cache[path] = (_stat(path), aggregates)
+
+def rebuild_aggregates(path: str = AGGREGATES_FILE) -> Dict[str, Any]:
+    """Recompute the totals from every saved quote and store them."""
+    with file_lock(path):
+        aggregates = compute_aggregates(get_quote_store().iter_quotes(fields=AGGREGATE_FIELDS))
+        _save(path, aggregates)
+    return aggregates
+
+def get_aggregates(path: str = AGGREGATES_FILE) -> Dict[str, Any]:
+    """
+    Current pipeline totals (built from the quote store the first time).
+
+    Returns:
+        Dictionary with "total" and "by_status", "by_customer", "by_month" and
+        "by_format", each mapping a group to {"quotes", "value"}. Treat as read-only.
+    """
+    aggregates = _load(path)
+    return aggregates if aggregates is not None else rebuild_aggregates(path)
+
+def aggregates_lock(path: str = AGGREGATES_FILE):
+    """
+    Lock to hold across a quote store write and its apply_quote_change().
+
+    Without it, a rebuild_aggregates() running between the two (in any process)
+    would already count the change, and the delta would then add it again.
+    """
+    return file_lock(path)
+
+def apply_quote_change(old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]],
+                       path: str = AGGREGATES_FILE) -> None:
+    """
+    Fold one saved quote change into the totals.
+
+    Args:
+        old: The quote before the change (None for a new quote)
+        new: The quote after the change (None for a deleted quote)
+        path: Aggregates file
+    """
+    if old is not None and new is not None and _contribution(old) == _contribution(new):
+        return  # Nothing the totals depend on changed
+    with file_lock(path):
+        stored = _load(path)
+        if stored is None:
+            # First use: the store already holds this change
+            rebuild_aggregates(path)
+            return
+        aggregates = json.loads(json.dumps(stored))  # Cached copy stays untouched
+        if old is not None:
+            _add(aggregates, old, -1)
+        if new is not None:
+            _add(aggregates, new, 1)
+        _save(path, aggregates)
+
+def verify_aggregates(path: str = AGGREGATES_FILE, tolerance: float = 0.5) -> List[str]:
+    """
+    Compare the stored totals with a fresh computation from the quote store.
+
+    Returns:
+        Descriptions of every group that differs (empty if the totals are exact)
+    """
+    stored = get_aggregates(path)
+    fresh = compute_aggregates(get_quote_store().iter_quotes(fields=AGGREGATE_FIELDS))
+    problems = []
+    for dimension in ("total", *AGGREGATE_DIMENSIONS):
+        groups = {"all": stored["total"]} if dimension == "total" else stored.get(dimension, {})
+        expected = {"all": fresh["total"]} if dimension == "total" else fresh[dimension]
+        for group in sorted(set(groups) | set(expected)):
+            have = groups.get(group, {"quotes": 0, "value": 0.0})
+            want = expected.get(group, {"quotes": 0, "value": 0.0})
+            if have["quotes"] != want["quotes"] or abs(have["value"] - want["value"]) > tolerance:
+                problems.append(
+                    f"{dimension}[{group}]: stored {have['quotes']} / {have['value']:,.0f}, "
+                    f"actual {want['quotes']} / {want['value']:,.0f}"
+                )
+    return problems
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ["rebuild"]:
+        totals = rebuild_aggregates()["total"]
+        print(f"Rebuilt pipeline totals: {totals['quotes']} quotes, {totals['value']:,.0f}")
+    else:
+        problems = verify_aggregates()
+        print("\n".join(problems) if problems else "Pipeline totals match the saved quotes.")
+        sys.exit(1 if problems else 0)
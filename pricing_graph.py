@@ -0,0 +1,105 @@
+"""
+Incremental evaluation of the pricing dependency graph for the Lapis Visuals Pricing Calculator.
+
+pricing_logic.PRICING_GRAPH declares which inputs and rate-card keys each
+pricing node reads. The evaluator here keeps the previous evaluation of one
+session and, on the next call, recomputes only the nodes whose inputs changed
+plus the dependents whose upstream outputs actually moved.
+"""
+
+from typing import Dict, Any, List, Optional, Set
+
+from pricing_logic import (
+    PRICING_GRAPH, CompiledRateCard, QuoteResult, RatesLike, compile_rates, build_quote_result
+)
+
+def _read_field(questionnaire: Dict[str, Any], production_vars: Dict[str, Any], field: str) -> Any:
+    """Return a copy-safe value for a "questionnaire.x" / "production_vars.x" field."""
+    source, name = field.split(".", 1)
+    value = (questionnaire if source == "questionnaire" else production_vars).get(name)
+    # Session state dicts are edited in place, so snapshot lists by value
+    return list(value) if isinstance(value, (list, tuple, set)) else value
+
+class IncrementalQuoteEvaluator:
+    """
+    Per-session evaluator that only recomputes dirty pricing nodes.
+
+    Keep one instance per Streamlit session (e.g. in st.session_state). Results
+    are identical to pricing_logic.compute_quote().
+    """
+
+    def __init__(self):
+        self._fields: Dict[str, Any] = {}
+        self._card: Optional[CompiledRateCard] = None
+        self._outputs: Dict[str, Dict[str, Any]] = {}
+        self._result: Optional[QuoteResult] = None
+        self.evaluations = 0
+        self.nodes_recomputed = 0
+        self.last_recomputed: List[str] = []
+
+    def _dirty_nodes(self, fields: Dict[str, Any], card: CompiledRateCard) -> Set[str]:
+        """Nodes whose own inputs or rate-card keys changed since the last evaluation."""
+        if self._card is None:
+            return {node.name for node in PRICING_GRAPH}
+        changed_fields = {name for name, value in fields.items() if self._fields.get(name) != value}
+        changed_keys: Set[str] = set()
+        if card is not self._card:
+            changed_keys = {
+                key for node in PRICING_GRAPH for key in node.rate_keys
+                if getattr(card, key) != getattr(self._card, key)
+            }
+        return {
+            node.name for node in PRICING_GRAPH
+            if changed_fields.intersection(node.fields) or changed_keys.intersection(node.rate_keys)
+        }
+
+    def evaluate(self, questionnaire: Dict[str, Any], production_vars: Dict[str, Any], rates: RatesLike) -> QuoteResult:
+        """
+        Price the quote, reusing every node whose inputs did not change.
+
+        Args:
+            questionnaire: Dictionary containing questionnaire responses
+            production_vars: Dictionary containing production variables
+            rates: Rates dictionary or CompiledRateCard
+
+        Returns:
+            QuoteResult identical to compute_quote() for the same inputs
+        """
+        card = compile_rates(rates)
+        fields = {
+            field: _read_field(questionnaire, production_vars, field)
+            for node in PRICING_GRAPH for field in node.fields
+        }
+        dirty = self._dirty_nodes(fields, card)
+
+        values: Dict[str, Any] = {}
+        moved: Set[str] = set()
+        recomputed: List[str] = []
+        for node in PRICING_GRAPH:
+            if node.name in dirty or moved.intersection(node.depends_on):
+                outputs = node.evaluate(questionnaire, production_vars, card, values)
+                recomputed.append(node.name)
+                # Early cut-off: dependents only rerun if this node's outputs changed
+                if outputs != self._outputs.get(node.name):
+                    moved.add(node.name)
+                self._outputs[node.name] = outputs
+            values.update(self._outputs[node.name])
+
+        self._fields = fields
+        self._card = card
+        if moved or self._result is None:
+            self._result = build_quote_result(values)
+        self.evaluations += 1
+        self.nodes_recomputed += len(recomputed)
+        self.last_recomputed = recomputed
+        return self._result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return evaluation counters for monitoring."""
+        return {
+            "evaluations": self.evaluations,
+            "nodes_total": len(PRICING_GRAPH),
+            "last_recomputed": len(self.last_recomputed),
+            "last_recomputed_nodes": list(self.last_recomputed),
+            "nodes_recomputed": self.nodes_recomputed,
+        }
@@ -3,8 +3,40 @@ Pricing calculation logic for the Lapis Visuals Pricing Calculator.
 """
 
 import json
-from typing import Dict, Tuple, List, Any
-from constants import DEFAULT_RATES, PRODUCER_FEE_THRESHOLD, RECOMMENDED_PRICE_MARGIN
+import hashlib
+import numpy as np
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Tuple, List, Any, Union, Mapping, Sequence, Callable
+from constants import (
+    DEFAULT_RATES, PRODUCER_FEE_THRESHOLD, RECOMMENDED_PRICE_MARGIN,
+    STORYBOARD_SPREAD, CREW_HIGH_MULTIPLIER, TALENT_RATES, TALENT_AGENCY_MARKUP,
+    PROPS_DESIGN_COSTS, FOOTAGE_EDITING_FACTORS, SPECIAL_REQUIREMENT_COMPLEXITY
+)
+from quote_cache import QUOTE_CACHE, quote_fingerprint, invalidate_quote_cache
+from safe_io import VersionConflict, atomic_write_json, file_lock
+
+RATES_FILE = "rates.json"
+
+@dataclass(frozen=True)
+class QuoteResult:
+    """
+    Structured output of a single pricing pass.
+
+    The line items add up to the low/high quotes (before truncation to whole
+    rupiah), so breakdowns and totals always come from the same evaluation.
+    Treat the contained dictionaries as read-only.
+    """
+    low_quote: int
+    high_quote: int
+    recommended_quote: int
+    line_items: Dict[str, Dict[str, float]]
+    intermediates: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def totals(self) -> Tuple[int, int, int]:
+        """Return (low_quote, high_quote, recommended_quote)."""
+        return self.low_quote, self.high_quote, self.recommended_quote
 
 def load_rates():
     """
@@ -14,166 +46,627 @@ def load_rates():
         Dict: Dictionary containing all rate information
     """
     try:
-        with open("rates.json", "r") as f:
+        with open(RATES_FILE, "r") as f:
             return json.load(f)
     except FileNotFoundError:
         # Return default rates if file not found
         return DEFAULT_RATES
 
-def calculate_quote(questionnaire: Dict[str, Any], production_vars: Dict[str, Any], rates: Dict[str, Any]) -> Tuple[int, int, int]:
+@dataclass(frozen=True)
+class CompiledRateCard:
+    """
+    Flat, precomputed view of a rates dictionary.
+
+    Everything that does not depend on the quote inputs is folded in here once,
+    so pricing a quote is a few lookups and multiplies. Build it with
+    compile_rates(); compiled cards are cached by content fingerprint and can
+    be shared across sessions.
+    """
+    fingerprint: str
+    scriptwriting_low: float
+    scriptwriting_high: float
+    storyboard_low_rate: float  # Per deliverable
+    storyboard_high_rate: float  # Per deliverable
+    crew_prefix_sums: Tuple[float, ...]  # crew_prefix_sums[n] = day rate of the first n roles
+    crew_high_multiplier: float
+    equipment_low: float  # Per shooting day
+    equipment_high: float  # Per shooting day
+    talent_low_rates: Tuple[float, float]  # Indexed by agency_markup (0 = no, 1 = yes)
+    talent_high_rates: Tuple[float, float]
+    location_names: Tuple[str, ...]
+    location_costs: Tuple[float, ...]
+    props_levels: Tuple[str, ...]
+    props_low_costs: Tuple[float, ...]
+    props_high_costs: Tuple[float, ...]
+    footage_levels: Tuple[str, ...]
+    editing_factors: Tuple[float, ...]
+    post_low_per_minute: Tuple[float, ...]  # Indexed like footage_levels
+    post_high_per_minute: Tuple[float, ...]
+    producer_fee_percent: float
+    contingency_default: float
+    location_index: Dict[str, int] = field(default_factory=dict, compare=False)
+    props_index: Dict[str, int] = field(default_factory=dict, compare=False)
+    footage_index: Dict[str, int] = field(default_factory=dict, compare=False)
+
+    def crew_day_rate(self, crew_size: int) -> float:
+        """Day rate of the first crew_size roles (extra crew beyond the card adds nothing)."""
+        return self.crew_prefix_sums[max(0, min(crew_size, len(self.crew_prefix_sums) - 1))]
+
+    def props_position(self, level: str) -> int:
+        """Index of a props level; unknown levels price as the most elaborate one."""
+        return self.props_index.get(level, len(self.props_levels) - 1)
+
+    def footage_position(self, level: str) -> int:
+        """Index of a footage volume; unknown volumes price as the highest one."""
+        return self.footage_index.get(level, len(self.footage_levels) - 1)
+
+def save_rates_json(rates: Dict[str, Any], expected_fingerprint: str = None):
+    """
+    Write rates to rates.json and invalidate memoized quotes priced with older rates.
+
+    The file is replaced atomically under its advisory lock, so concurrent
+    editors never interleave or leave a half-written rate card.
+    
+    Args:
+        rates: Dictionary containing rate information
+        expected_fingerprint: rates_fingerprint() of the rates the edit started
+            from; if the saved rates have changed since, VersionConflict is raised
+            and nothing is written
+    """
+    with file_lock(RATES_FILE):
+        if expected_fingerprint is not None:
+            current = rates_fingerprint(load_rates())
+            if current != expected_fingerprint:
+                raise VersionConflict(f"rates.json changed since it was loaded ({current} != {expected_fingerprint})")
+        atomic_write_json(RATES_FILE, rates, indent=2)
+    invalidate_quote_cache()
+
+def _canonical_rates_json(rates: Dict[str, Any]) -> str:
+    """Serialize rates for fingerprinting (key order is kept: crew roles are priced in card order)."""
+    return json.dumps(rates, separators=(",", ":"), default=str)
+
+def rates_fingerprint(rates: Dict[str, Any]) -> str:
+    """Return a stable content hash of a rates dictionary."""
+    return hashlib.sha256(_canonical_rates_json(rates).encode("utf-8")).hexdigest()[:16]
+
+@lru_cache(maxsize=32)
+def _compile_canonical_rates(fingerprint: str, canonical: str) -> CompiledRateCard:
+    """Compile a canonical JSON rates document (cached per fingerprint)."""
+    rates = json.loads(canonical)
+    
+    crew_prefix_sums = [0.0]
+    for day_rate in rates["crew_roles"].values():
+        crew_prefix_sums.append(crew_prefix_sums[-1] + day_rate)
+    
+    post = rates["post_production"]
+    editing_factors = tuple(FOOTAGE_EDITING_FACTORS.values())
+    post_low_per_minute = tuple(
+        post["editing"]["per_minute"] * factor * post["editing"]["complexity"]["simple"] +
+        post["color"]["per_minute"] * post["color"]["complexity"]["simple"] +
+        post["sfx"]["per_minute"] * post["sfx"]["complexity"]["simple"]
+        for factor in editing_factors
+    )
+    post_high_per_minute = tuple(
+        post["editing"]["per_minute"] * factor * post["editing"]["complexity"]["complex"] +
+        post["color"]["per_minute"] * post["color"]["complexity"]["complex"] +
+        post["sfx"]["per_minute"] * post["sfx"]["complexity"]["complex"]
+        for factor in editing_factors
+    )
+    
+    location_names = tuple(rates["location"].keys())
+    props_levels = tuple(PROPS_DESIGN_COSTS.keys())
+    footage_levels = tuple(FOOTAGE_EDITING_FACTORS.keys())
+    
+    return CompiledRateCard(
+        fingerprint=fingerprint,
+        scriptwriting_low=rates["scriptwriting"]["base"] * rates["scriptwriting"]["complexity_factors"]["simple"],
+        scriptwriting_high=rates["scriptwriting"]["base"] * rates["scriptwriting"]["complexity_factors"]["complex"],
+        storyboard_low_rate=rates["storyboard"]["base"] * STORYBOARD_SPREAD["low"],
+        storyboard_high_rate=rates["storyboard"]["base"] * STORYBOARD_SPREAD["high"],
+        crew_prefix_sums=tuple(crew_prefix_sums),
+        crew_high_multiplier=CREW_HIGH_MULTIPLIER,
+        equipment_low=rates["equipment"]["basic"],
+        equipment_high=rates["equipment"]["premium"],
+        talent_low_rates=(TALENT_RATES["low"] * 1.0, TALENT_RATES["low"] * TALENT_AGENCY_MARKUP["low"]),
+        talent_high_rates=(TALENT_RATES["high"] * 1.0, TALENT_RATES["high"] * TALENT_AGENCY_MARKUP["high"]),
+        location_names=location_names,
+        location_costs=tuple(rates["location"].values()),
+        props_levels=props_levels,
+        props_low_costs=tuple(PROPS_DESIGN_COSTS[level]["low"] for level in props_levels),
+        props_high_costs=tuple(PROPS_DESIGN_COSTS[level]["high"] for level in props_levels),
+        footage_levels=footage_levels,
+        editing_factors=editing_factors,
+        post_low_per_minute=post_low_per_minute,
+        post_high_per_minute=post_high_per_minute,
+        producer_fee_percent=rates["producer_fee"]["percent"],
+        contingency_default=rates["contingency"]["default"],
+        location_index={name: i for i, name in enumerate(location_names)},
+        props_index={level: i for i, level in enumerate(props_levels)},
+        footage_index={level: i for i, level in enumerate(footage_levels)},
+    )
+
+RatesLike = Union[Dict[str, Any], CompiledRateCard]
+
+def compile_rates(rates: RatesLike) -> CompiledRateCard:
+    """
+    Compile a rates dictionary into a CompiledRateCard.
+    
+    Cards are cached per content fingerprint, so compiling the same rates twice
+    (from another session, or after a no-op save) returns the shared instance.
+    Passing an already compiled card returns it unchanged.
+    
+    Args:
+        rates: Dictionary containing rate information, or a compiled card
+        
+    Returns:
+        CompiledRateCard for the given rates
+    """
+    if isinstance(rates, CompiledRateCard):
+        return rates
+    canonical = _canonical_rates_json(rates)
+    fingerprint = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+    return _compile_canonical_rates(fingerprint, canonical)
+
+def load_rate_card() -> CompiledRateCard:
+    """Load rates (see load_rates) and return them compiled."""
+    return compile_rates(load_rates())
+
+@dataclass(frozen=True)
+class PricingNode:
+    """
+    One step of the cost model.
+
+    fields are the questionnaire/production inputs it reads ("questionnaire.video_length"),
+    rate_keys the CompiledRateCard attributes it reads, and depends_on the nodes whose
+    outputs it uses. evaluate(questionnaire, production_vars, card, values) returns the
+    node's outputs given the outputs of earlier nodes in values.
+    """
+    name: str
+    fields: Tuple[str, ...]
+    rate_keys: Tuple[str, ...]
+    depends_on: Tuple[str, ...]
+    evaluate: Callable[[Dict[str, Any], Dict[str, Any], CompiledRateCard, Dict[str, Any]], Dict[str, Any]]
+
+def _price_complexity(q, p, card, values):
+    # Base calculation factors (informational; not applied to the totals yet)
+    complexity_factor = 1.0
+    for requirement, extra in SPECIAL_REQUIREMENT_COMPLEXITY.items():
+        if requirement in q["special_requirements"]:
+            complexity_factor += extra
+    return {"complexity_factor": complexity_factor}
+
+def _price_pre_production(q, p, card, values):
+    return {
+        "scriptwriting_low": card.scriptwriting_low,
+        "scriptwriting_high": card.scriptwriting_high,
+        "storyboard_low": card.storyboard_low_rate * q["deliverables"],
+        "storyboard_high": card.storyboard_high_rate * q["deliverables"],
+    }
+
+def _price_location(q, p, card, values):
+    return {"location_cost": card.location_costs[card.location_index[p["location"]]]}
+
+def _price_crew(q, p, card, values):
+    crew_cost_low = card.crew_day_rate(p["crew_size"]) * p["shooting_days"]
+    return {"crew_cost_low": crew_cost_low, "crew_cost_high": crew_cost_low * card.crew_high_multiplier}
+
+def _price_equipment(q, p, card, values):
+    return {
+        "equipment_low": card.equipment_low * p["shooting_days"],
+        "equipment_high": card.equipment_high * p["shooting_days"],
+    }
+
+def _price_talent(q, p, card, values):
+    markup = 1 if p["agency_markup"] else 0
+    return {
+        "talent_low": p["talent_count"] * card.talent_low_rates[markup],
+        "talent_high": p["talent_count"] * card.talent_high_rates[markup],
+    }
+
+def _price_props(q, p, card, values):
+    props = card.props_position(p["props_design"])
+    return {"props_low": card.props_low_costs[props], "props_high": card.props_high_costs[props]}
+
+def _price_post_production(q, p, card, values):
+    # Per-minute coefficients already include editing volume and complexity
+    footage = card.footage_position(p["footage_volume"])
+    return {
+        "editing_factor": card.editing_factors[footage],
+        "post_low": q["video_length"] * card.post_low_per_minute[footage],
+        "post_high": q["video_length"] * card.post_high_per_minute[footage],
+    }
+
+def _price_subtotal(q, p, card, v):
+    # Sum up pre-contingency total
+    return {
+        "low_subtotal": (
+            v["scriptwriting_low"] + v["storyboard_low"] + v["location_cost"] +
+            v["crew_cost_low"] + v["equipment_low"] + v["talent_low"] + v["props_low"] + v["post_low"]
+        ),
+        "high_subtotal": (
+            v["scriptwriting_high"] + v["storyboard_high"] + v["location_cost"] +
+            v["crew_cost_high"] + v["equipment_high"] + v["talent_high"] + v["props_high"] + v["post_high"]
+        ),
+    }
+
+def _price_producer_fee(q, p, card, v):
+    # Admin/Producer fee (exclude for projects < Rp 20M)
+    if v["low_subtotal"] >= PRODUCER_FEE_THRESHOLD:
+        return {
+            "producer_fee_low": v["low_subtotal"] * card.producer_fee_percent,
+            "producer_fee_high": v["high_subtotal"] * card.producer_fee_percent,
+        }
+    return {"producer_fee_low": 0, "producer_fee_high": 0}
+
+def _price_contingency(q, p, card, v):
+    contingency_percent = p["contingency"] / 100
+    return {
+        "contingency_percent": contingency_percent,
+        "contingency_low": v["low_subtotal"] * contingency_percent,
+        "contingency_high": v["high_subtotal"] * contingency_percent,
+    }
+
+def _price_totals(q, p, card, v):
+    low_total = v["low_subtotal"] + v["producer_fee_low"] + v["contingency_low"]
+    high_total = v["high_subtotal"] + v["producer_fee_high"] + v["contingency_high"]
+    # Recommended is median + a margin (12% as per design)
+    return {
+        "low_total": low_total,
+        "high_total": high_total,
+        "recommended_total": ((low_total + high_total) / 2) * RECOMMENDED_PRICE_MARGIN,
+    }
+
+# The cost model as a dependency graph, in evaluation (topological) order
+PRICING_GRAPH = [
+    PricingNode("complexity", ("questionnaire.special_requirements",), (), (), _price_complexity),
+    PricingNode("pre_production", ("questionnaire.deliverables",),
+                ("scriptwriting_low", "scriptwriting_high", "storyboard_low_rate", "storyboard_high_rate"), (),
+                _price_pre_production),
+    PricingNode("location", ("production_vars.location",), ("location_names", "location_costs"), (), _price_location),
+    PricingNode("crew", ("production_vars.crew_size", "production_vars.shooting_days"),
+                ("crew_prefix_sums", "crew_high_multiplier"), (), _price_crew),
+    PricingNode("equipment", ("production_vars.shooting_days",), ("equipment_low", "equipment_high"), (),
+                _price_equipment),
+    PricingNode("talent", ("production_vars.talent_count", "production_vars.agency_markup"),
+                ("talent_low_rates", "talent_high_rates"), (), _price_talent),
+    PricingNode("props", ("production_vars.props_design",), ("props_levels", "props_low_costs", "props_high_costs"), (),
+                _price_props),
+    PricingNode("post_production", ("questionnaire.video_length", "production_vars.footage_volume"),
+                ("footage_levels", "editing_factors", "post_low_per_minute", "post_high_per_minute"), (),
+                _price_post_production),
+    PricingNode("subtotal", (), (),
+                ("pre_production", "location", "crew", "equipment", "talent", "props", "post_production"),
+                _price_subtotal),
+    PricingNode("producer_fee", (), ("producer_fee_percent",), ("subtotal",), _price_producer_fee),
+    PricingNode("contingency", ("production_vars.contingency",), (), ("subtotal",), _price_contingency),
+    PricingNode("totals", (), (), ("subtotal", "producer_fee", "contingency"), _price_totals),
+]
+
+def build_quote_result(values: Dict[str, Any]) -> QuoteResult:
+    """
+    Assemble a QuoteResult from the outputs of every PRICING_GRAPH node.
+    
+    Args:
+        values: Merged outputs of all pricing nodes
+        
+    Returns:
+        QuoteResult with totals truncated to whole rupiah
+    """
+    v = values
+    line_items = {
+        "Pre-production": {"low": v["scriptwriting_low"] + v["storyboard_low"], "high": v["scriptwriting_high"] + v["storyboard_high"]},
+        "Crew Costs": {"low": v["crew_cost_low"], "high": v["crew_cost_high"]},
+        "Equipment": {"low": v["equipment_low"], "high": v["equipment_high"]},
+        "Location": {"low": v["location_cost"], "high": v["location_cost"]},
+        "Talent": {"low": v["talent_low"], "high": v["talent_high"]},
+        "Props & Set Design": {"low": v["props_low"], "high": v["props_high"]},
+        "Post-production": {"low": v["post_low"], "high": v["post_high"]},
+        "Producer Fee": {"low": v["producer_fee_low"], "high": v["producer_fee_high"]},
+        "Contingency": {"low": v["contingency_low"], "high": v["contingency_high"]},
+    }
+    
+    intermediates = {
+        name: v[name] for name in (
+            "complexity_factor", "editing_factor", "scriptwriting_low", "scriptwriting_high",
+            "storyboard_low", "storyboard_high", "low_subtotal", "high_subtotal",
+            "contingency_percent", "low_total", "high_total", "recommended_total"
+        )
+    }
+    
+    return QuoteResult(
+        low_quote=int(v["low_total"]),
+        high_quote=int(v["high_total"]),
+        recommended_quote=int(v["recommended_total"]),
+        line_items=line_items,
+        intermediates=intermediates,
+    )
+
+def compute_quote(questionnaire: Dict[str, Any], production_vars: Dict[str, Any], rates: RatesLike) -> QuoteResult:
+    """
+    Evaluate the cost model once and return totals, line items and intermediates together.
+    
+    Args:
+        questionnaire: Dictionary containing questionnaire responses
+        production_vars: Dictionary containing production variables
+        rates: Rates dictionary or CompiledRateCard (preferred; avoids recompiling)
+        
+    Returns:
+        QuoteResult with low/high/recommended quotes and the full breakdown
+    """
+    card = compile_rates(rates)
+    values: Dict[str, Any] = {}
+    for node in PRICING_GRAPH:
+        values.update(node.evaluate(questionnaire, production_vars, card, values))
+    return build_quote_result(values)
+
+def compute_quote_cached(questionnaire: Dict[str, Any], production_vars: Dict[str, Any], rates: RatesLike,
+                         evaluate: Callable[[Dict[str, Any], Dict[str, Any], CompiledRateCard], QuoteResult] = None) -> QuoteResult:
+    """
+    Memoized compute_quote(), shared by every session in the process.
+    
+    Results are keyed by quote_fingerprint() of the pricing-relevant inputs and
+    the rate card version. The returned QuoteResult is shared; do not mutate it.
+    
+    Args:
+        questionnaire: Dictionary containing questionnaire responses
+        production_vars: Dictionary containing production variables
+        rates: Rates dictionary or CompiledRateCard
+        evaluate: Optional evaluator used on a cache miss (defaults to compute_quote),
+            e.g. a session's IncrementalQuoteEvaluator.evaluate
+        
+    Returns:
+        QuoteResult for the inputs
+    """
+    card = compile_rates(rates)
+    evaluate = evaluate or compute_quote
+    key = quote_fingerprint(questionnaire, production_vars, card.fingerprint)
+    return QUOTE_CACHE.get_or_compute(key, lambda: evaluate(questionnaire, production_vars, card))
+
+def calculate_quote(questionnaire: Dict[str, Any], production_vars: Dict[str, Any], rates: RatesLike) -> Tuple[int, int, int]:
     """
     Calculate the low, high, and recommended price quotes based on questionnaire and production variables.
     
+    Thin view over compute_quote(); callers that also need the breakdown should
+    call compute_quote() directly so the model is only evaluated once.
+    
     Args:
         questionnaire: Dictionary containing questionnaire responses
         production_vars: Dictionary containing production variables
-        rates: Dictionary containing rate information
+        rates: Rates dictionary or CompiledRateCard
         
     Returns:
         Tuple of (low_quote, high_quote, recommended_quote) as integers
     """
-    q = questionnaire
-    p = production_vars
+    return compute_quote(questionnaire, production_vars, rates).totals
+
+def generate_line_items(questionnaire: Dict[str, Any], production_vars: Dict[str, Any], rates: RatesLike) -> Dict[str, Dict[str, float]]:
+    """
+    Generate detailed line items for the quote.
     
-    # Base calculation factors
-    complexity_factor = 1.0
-    if "Motion Graphics" in q["special_requirements"]:
-        complexity_factor += 0.2
-    if "Green Screen" in q["special_requirements"]:
-        complexity_factor += 0.15
-    if "SFX" in q["special_requirements"]:
-        complexity_factor += 0.1
-    if "Aerial Shots" in q["special_requirements"]:
-        complexity_factor += 0.2
-    
-    # Calculate Pre-production costs
-    scriptwriting_low = rates["scriptwriting"]["base"] * rates["scriptwriting"]["complexity_factors"]["simple"]
-    scriptwriting_high = rates["scriptwriting"]["base"] * rates["scriptwriting"]["complexity_factors"]["complex"]
-    
-    storyboard_low = rates["storyboard"]["base"] * q["deliverables"] * 0.8
-    storyboard_high = rates["storyboard"]["base"] * q["deliverables"] * 1.2
-    
-    location_cost = rates["location"][p["location"]]
-    
-    # Production costs
-    crew_cost_low = sum(list(rates["crew_roles"].values())[:p["crew_size"]]) * p["shooting_days"]
-    crew_cost_high = crew_cost_low * 1.2
-    
-    equipment_low = rates["equipment"]["basic"] * p["shooting_days"]
-    equipment_high = rates["equipment"]["premium"] * p["shooting_days"]
-    
-    talent_low = p["talent_count"] * 1000000 * (1.1 if p["agency_markup"] else 1.0)
-    talent_high = p["talent_count"] * 2000000 * (1.3 if p["agency_markup"] else 1.0)
-    
-    props_low = 2000000 if p["props_design"] == "basic" else 3000000 if p["props_design"] == "custom" else 5000000
-    props_high = 3000000 if p["props_design"] == "basic" else 5000000 if p["props_design"] == "custom" else 8000000
-    
-    # Post-production costs
-    editing_factor = 0.8 if p["footage_volume"] == "low" else 1.0 if p["footage_volume"] == "standard" else 1.3
-    
-    post_low = (
-        rates["post_production"]["editing"]["per_minute"] * q["video_length"] * editing_factor * 
-        rates["post_production"]["editing"]["complexity"]["simple"] +
-        rates["post_production"]["color"]["per_minute"] * q["video_length"] * 
-        rates["post_production"]["color"]["complexity"]["simple"] +
-        rates["post_production"]["sfx"]["per_minute"] * q["video_length"] * 
-        rates["post_production"]["sfx"]["complexity"]["simple"]
-    )
+    Thin view over compute_quote(); the items sum to the quoted totals.
     
-    post_high = (
-        rates["post_production"]["editing"]["per_minute"] * q["video_length"] * editing_factor * 
-        rates["post_production"]["editing"]["complexity"]["complex"] +
-        rates["post_production"]["color"]["per_minute"] * q["video_length"] * 
-        rates["post_production"]["color"]["complexity"]["complex"] +
-        rates["post_production"]["sfx"]["per_minute"] * q["video_length"] * 
-        rates["post_production"]["sfx"]["complexity"]["complex"]
-    )
+    Args:
+        questionnaire: Dictionary containing questionnaire responses
+        production_vars: Dictionary containing production variables
+        rates: Rates dictionary or CompiledRateCard
+        
+    Returns:
+        Dictionary mapping categories to their low and high estimates
+    """
+    result = compute_quote(questionnaire, production_vars, rates)
+    return {item: dict(values) for item, values in result.line_items.items()}
+
+# Columns accepted by calculate_quotes_batch()
+BATCH_INPUT_COLUMNS = [
+    "video_length", "deliverables", "shooting_days", "crew_size", "location",
+    "talent_count", "agency_markup", "props_design", "footage_volume", "contingency"
+]
+
+@lru_cache(maxsize=32)
+def _card_arrays(card: CompiledRateCard) -> Dict[str, np.ndarray]:
+    """NumPy views of the card's lookup tables (built once per card)."""
+    return {
+        "crew_prefix_sums": np.asarray(card.crew_prefix_sums, dtype=np.float64),
+        "talent_low_rates": np.asarray(card.talent_low_rates, dtype=np.float64),
+        "talent_high_rates": np.asarray(card.talent_high_rates, dtype=np.float64),
+        "location_costs": np.asarray(card.location_costs, dtype=np.float64),
+        "props_low_costs": np.asarray(card.props_low_costs, dtype=np.float64),
+        "props_high_costs": np.asarray(card.props_high_costs, dtype=np.float64),
+        "post_low_per_minute": np.asarray(card.post_low_per_minute, dtype=np.float64),
+        "post_high_per_minute": np.asarray(card.post_high_per_minute, dtype=np.float64),
+    }
+
+def _category_codes(values: np.ndarray, index: Dict[str, int], fallback: int | None) -> np.ndarray:
+    """
+    Map a column of category names to card positions.
+    
+    Integer columns are taken to be positions already. Unknown names use the
+    fallback position, or raise KeyError when there is none (as compute_quote does).
+    """
+    if values.dtype.kind in "iu":
+        return values.astype(np.intp, copy=False)
+    codes = np.full(values.shape, -1 if fallback is None else fallback, dtype=np.intp)
+    for name, position in index.items():
+        codes[values == name] = position
+    if fallback is None and (codes < 0).any():
+        raise KeyError(values[codes < 0].flat[0])
+    return codes
+
+def prepare_batch_columns(inputs: Mapping[str, Any], card: CompiledRateCard) -> Dict[str, np.ndarray]:
+    """
+    Broadcast batch inputs to a common shape and resolve categories to card positions.
+    
+    Args:
+        inputs: pandas DataFrame or dict of arrays/scalars keyed by BATCH_INPUT_COLUMNS
+        card: Compiled rate card the positions refer to
+        
+    Returns:
+        Dictionary of equally shaped arrays; crew_size, location, agency_markup,
+        props_design and footage_volume are integer positions into the card tables
+    """
+    missing = [name for name in BATCH_INPUT_COLUMNS if name not in inputs]
+    if missing:
+        raise ValueError(f"Missing batch input columns: {', '.join(missing)}")
+    
+    columns = np.broadcast_arrays(*(np.asarray(inputs[name]) for name in BATCH_INPUT_COLUMNS))
+    c = dict(zip(BATCH_INPUT_COLUMNS, columns))
+    return {
+        "video_length": c["video_length"].astype(np.float64, copy=False),
+        "deliverables": c["deliverables"],
+        "shooting_days": c["shooting_days"].astype(np.float64, copy=False),
+        "crew_size": np.clip(c["crew_size"].astype(np.intp), 0, len(card.crew_prefix_sums) - 1),
+        "location": _category_codes(c["location"], card.location_index, None),
+        "talent_count": c["talent_count"],
+        "agency_markup": c["agency_markup"].astype(bool).astype(np.intp),
+        "props_design": _category_codes(c["props_design"], card.props_index, len(card.props_levels) - 1),
+        "footage_volume": _category_codes(c["footage_volume"], card.footage_index, len(card.footage_levels) - 1),
+        "contingency": c["contingency"],
+    }
+
+def calculate_quotes_batch(inputs: Mapping[str, Any], rates: RatesLike, arithmetic: str = "float") -> Dict[str, Any]:
+    """
+    Price many scenarios at once with the same formulas as compute_quote().
+    
+    Each column may be an array (all arrays must broadcast together) or a scalar
+    shared by every row. location, props_design and footage_volume accept names
+    or integer positions into the compiled card. With arithmetic="float" results
+    match compute_quote() row for row, including truncation to whole rupiah.
+    arithmetic="fixed" uses integer sen instead (see fixed_point).
+    
+    Args:
+        inputs: pandas DataFrame or dict of arrays/scalars keyed by BATCH_INPUT_COLUMNS
+        rates: Rates dictionary or CompiledRateCard
+        arithmetic: "float" (default) or "fixed"
+        
+    Returns:
+        Dictionary with int64 arrays "low_quote", "high_quote", "recommended_quote",
+        arrays "low_subtotal"/"high_subtotal", and "line_items" mapping each
+        category to {"low": array, "high": array}
+    """
+    card = compile_rates(rates)
+    if arithmetic == "fixed":
+        from fixed_point import calculate_quotes_batch_fixed
+        return calculate_quotes_batch_fixed(inputs, card)
+    if arithmetic != "float":
+        raise ValueError(f"Unknown arithmetic mode: {arithmetic}")
+    
+    arrays = _card_arrays(card)
+    c = prepare_batch_columns(inputs, card)
+    video_length = c["video_length"]
+    deliverables = c["deliverables"]
+    shooting_days = c["shooting_days"]
+    crew = c["crew_size"]
+    location = c["location"]
+    markup = c["agency_markup"]
+    props = c["props_design"]
+    footage = c["footage_volume"]
+    
+    # Pre-production
+    scriptwriting_low = card.scriptwriting_low
+    scriptwriting_high = card.scriptwriting_high
+    storyboard_low = card.storyboard_low_rate * deliverables
+    storyboard_high = card.storyboard_high_rate * deliverables
+    location_cost = arrays["location_costs"][location]
+    
+    # Production
+    crew_cost_low = arrays["crew_prefix_sums"][crew] * shooting_days
+    crew_cost_high = crew_cost_low * card.crew_high_multiplier
+    equipment_low = card.equipment_low * shooting_days
+    equipment_high = card.equipment_high * shooting_days
+    talent_low = c["talent_count"] * arrays["talent_low_rates"][markup]
+    talent_high = c["talent_count"] * arrays["talent_high_rates"][markup]
+    props_low = arrays["props_low_costs"][props]
+    props_high = arrays["props_high_costs"][props]
+    
+    # Post-production
+    post_low = video_length * arrays["post_low_per_minute"][footage]
+    post_high = video_length * arrays["post_high_per_minute"][footage]
     
-    # Sum up pre-contingency total
     low_subtotal = (
-        scriptwriting_low + storyboard_low + location_cost + 
+        scriptwriting_low + storyboard_low + location_cost +
         crew_cost_low + equipment_low + talent_low + props_low + post_low
     )
-    
     high_subtotal = (
-        scriptwriting_high + storyboard_high + location_cost + 
+        scriptwriting_high + storyboard_high + location_cost +
         crew_cost_high + equipment_high + talent_high + props_high + post_high
     )
     
-    # Admin/Producer fee (exclude for projects < Rp 20M)
-    if low_subtotal >= PRODUCER_FEE_THRESHOLD:
-        producer_fee_low = low_subtotal * rates["producer_fee"]["percent"]
-        producer_fee_high = high_subtotal * rates["producer_fee"]["percent"]
-    else:
-        producer_fee_low = producer_fee_high = 0
+    # Producer fee only applies from PRODUCER_FEE_THRESHOLD (decided on the low subtotal)
+    fee_applies = low_subtotal >= PRODUCER_FEE_THRESHOLD
+    producer_fee_low = np.where(fee_applies, low_subtotal * card.producer_fee_percent, 0.0)
+    producer_fee_high = np.where(fee_applies, high_subtotal * card.producer_fee_percent, 0.0)
     
-    # Add contingency
-    contingency_percent = p["contingency"] / 100
+    contingency_percent = c["contingency"] / 100
     contingency_low = low_subtotal * contingency_percent
     contingency_high = high_subtotal * contingency_percent
     
-    # Final totals
-    low_quote = low_subtotal + producer_fee_low + contingency_low
-    high_quote = high_subtotal + producer_fee_high + contingency_high
+    low_total = low_subtotal + producer_fee_low + contingency_low
+    high_total = high_subtotal + producer_fee_high + contingency_high
+    recommended_total = ((low_total + high_total) / 2) * RECOMMENDED_PRICE_MARGIN
     
-    # Recommended is median + a margin (12% as per design)
-    recommended = ((low_quote + high_quote) / 2) * RECOMMENDED_PRICE_MARGIN
-    
-    return int(low_quote), int(high_quote), int(recommended)
+    return {
+        "low_quote": low_total.astype(np.int64),
+        "high_quote": high_total.astype(np.int64),
+        "recommended_quote": recommended_total.astype(np.int64),
+        "low_subtotal": low_subtotal,
+        "high_subtotal": high_subtotal,
+        "line_items": {
+            "Pre-production": {"low": scriptwriting_low + storyboard_low, "high": scriptwriting_high + storyboard_high},
+            "Crew Costs": {"low": crew_cost_low, "high": crew_cost_high},
+            "Equipment": {"low": equipment_low, "high": equipment_high},
+            "Location": {"low": location_cost, "high": location_cost},
+            "Talent": {"low": talent_low, "high": talent_high},
+            "Props & Set Design": {"low": props_low, "high": props_high},
+            "Post-production": {"low": post_low, "high": post_high},
+            "Producer Fee": {"low": producer_fee_low, "high": producer_fee_high},
+            "Contingency": {"low": contingency_low, "high": contingency_high},
+        },
+    }
 
-def generate_line_items(questionnaire: Dict[str, Any], production_vars: Dict[str, Any], rates: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+def sweep_price_surface(questionnaire: Dict[str, Any], production_vars: Dict[str, Any], rates: RatesLike,
+                        ranges: Mapping[str, Sequence[Any]]) -> Dict[str, Any]:
     """
-    Generate detailed line items for the quote.
+    Price the full Cartesian grid of the given production/questionnaire values in one pass.
+    
+    Fields not listed in ranges keep their current value. The grid is built from
+    broadcast views, so memory is only spent on the result arrays.
     
     Args:
         questionnaire: Dictionary containing questionnaire responses
         production_vars: Dictionary containing production variables
-        rates: Dictionary containing rate information
+        rates: Rates dictionary or CompiledRateCard
+        ranges: Ordered mapping of field name to the values to sweep
         
     Returns:
-        Dictionary mapping categories to their low and high estimates
+        Dictionary with "axes" (field -> list of swept values, in grid order) and
+        "low_quote"/"high_quote"/"recommended_quote" arrays shaped like the grid
     """
-    q = questionnaire
-    p = production_vars
+    card = compile_rates(rates)
+    unknown = [name for name in ranges if name not in BATCH_INPUT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Cannot sweep {', '.join(unknown)}; choose from {', '.join(BATCH_INPUT_COLUMNS)}")
     
-    # Calculate quote values for producer fee and contingency
-    low_quote, high_quote, _ = calculate_quote(q, p, rates)
+    current = {**production_vars, "video_length": questionnaire["video_length"], "deliverables": questionnaire["deliverables"]}
+    columns: Dict[str, Any] = {name: current[name] for name in BATCH_INPUT_COLUMNS}
+    positions = {"location": card.location_index, "props_design": card.props_index, "footage_volume": card.footage_index}
     
-    items = {
-        "Pre-production": {
-            "low": rates["scriptwriting"]["base"] * rates["scriptwriting"]["complexity_factors"]["simple"] + 
-                  rates["storyboard"]["base"] * q["deliverables"] * 0.8,
-            "high": rates["scriptwriting"]["base"] * rates["scriptwriting"]["complexity_factors"]["complex"] + 
-                   rates["storyboard"]["base"] * q["deliverables"] * 1.2
-        },
-        "Crew Costs": {
-            "low": sum(list(rates["crew_roles"].values())[:p["crew_size"]]) * p["shooting_days"],
-            "high": sum(list(rates["crew_roles"].values())[:p["crew_size"]]) * p["shooting_days"] * 1.2
-        },
-        "Equipment": {
-            "low": rates["equipment"]["basic"] * p["shooting_days"],
-            "high": rates["equipment"]["premium"] * p["shooting_days"]
-        },
-        "Location": {
-            "low": rates["location"][p["location"]],
-            "high": rates["location"][p["location"]]
-        },
-        "Talent": {
-            "low": p["talent_count"] * 1000000 * (1.1 if p["agency_markup"] else 1.0),
-            "high": p["talent_count"] * 2000000 * (1.3 if p["agency_markup"] else 1.0)
-        },
-        "Post-production": {
-            "low": q["video_length"] * 3000000,
-            "high": q["video_length"] * 5000000
-        },
-        "Producer Fee": {
-            "low": low_quote * rates["producer_fee"]["percent"] if low_quote >= PRODUCER_FEE_THRESHOLD else 0,
-            "high": high_quote * rates["producer_fee"]["percent"] if high_quote >= PRODUCER_FEE_THRESHOLD else 0
-        },
-        "Contingency": {
-            "low": low_quote * (p["contingency"] / 100),
-            "high": high_quote * (p["contingency"] / 100)
-        }
-    }
+    axes = {name: list(values) for name, values in ranges.items()}
+    for axis, (name, values) in enumerate(axes.items()):
+        if name in positions:
+            # Resolve names once per axis instead of once per cell
+            fallback = None if name == "location" else len(positions[name]) - 1
+            column = _category_codes(np.asarray(values, dtype=object), positions[name], fallback)
+        else:
+            column = np.asarray(values)
+        shape = [1] * len(axes)
+        shape[axis] = len(values)
+        columns[name] = column.reshape(shape)
     
-    return items 
\ No newline at end of file
+    result = calculate_quotes_batch(columns, card)
+    grid_shape = tuple(len(values) for values in axes.values())
+    return {
+        "axes": axes,
+        "low_quote": np.broadcast_to(result["low_quote"], grid_shape),
+        "high_quote": np.broadcast_to(result["high_quote"], grid_shape),
+        "recommended_quote": np.broadcast_to(result["recommended_quote"], grid_shape),
+    }
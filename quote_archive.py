@@ -0,0 +1,241 @@
+"""
+Columnar analytics archive of saved quotes for the Lapis Visuals Pricing Calculator.
+
+sync_archive() flattens every quote's reporting fields into one NumPy .npy file
+per column under data/quote_archive/<generation>/, with status, format and
+customer_id dictionary-encoded as integer codes. A manifest names the current
+generation and the store version it was built from, so a sync is skipped while
+nothing changed and readers never see a half-written archive. open_archive()
+memory-maps the columns: aggregating millions of rows is a few vectorized
+passes and no JSON is parsed.
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional
+
+import numpy as np
+
+from safe_io import atomic_write_json, file_lock
+from storage import get_quote_store, storage_backend
+
+ARCHIVE_DIR = "data/quote_archive"
+MANIFEST_FILE = "manifest.json"
+
+# Numeric columns: (dtype, array typecode, value for a missing field, reader)
+NUMERIC_COLUMNS = {
+    "low_quote": ("int64", "q", 0, lambda q: q.get("low_quote")),
+    "high_quote": ("int64", "q", 0, lambda q: q.get("high_quote")),
+    "recommended_quote": ("int64", "q", 0, lambda q: q.get("recommended_quote")),
+    "video_length": ("float64", "d", float("nan"), lambda q: (q.get("questionnaire_snapshot") or {}).get("video_length")),
+    "shooting_days": ("float64", "d", float("nan"), lambda q: (q.get("production_vars_snapshot") or {}).get("shooting_days")),
+    "crew_size": ("int32", "l", 0, lambda q: (q.get("production_vars_snapshot") or {}).get("crew_size")),
+}
+
+# Dictionary-encoded string columns: codes index into the column's labels
+CATEGORY_COLUMNS = {
+    "status": lambda q: q.get("status") or "Unknown",
+    "format": lambda q: (q.get("questionnaire_snapshot") or {}).get("format") or "Unknown",
+    "customer_id": lambda q: q.get("customer_id") or "Unknown",
+}
+
+# Seconds since the epoch; missing or unparseable dates become NaT
+DATE_COLUMN = "creation_date"
+_NAT = np.iinfo(np.int64).min
+
+# Fields read from the store (everything the readers above use)
+ARCHIVE_FIELDS = (
+    "quote_id", "customer_id", "status", "creation_date", "low_quote", "high_quote", "recommended_quote",
+    "questionnaire_snapshot", "production_vars_snapshot"
+)
+
+def _timestamp(value: Any) -> int:
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    try:
+        return int(datetime.fromisoformat(str(value)).timestamp())
+    except ValueError:
+        return _NAT
+
+class QuoteArchive:
+    """
+    Read-only, memory-mapped view of one archive generation.
+
+    Attributes:
+        columns: Column name -> NumPy array (memory-mapped)
+        labels: Category column name -> list of labels its codes index into
+        source_version: Store version the archive was built from
+    """
+
+    def __init__(self, path: str, manifest: Dict[str, Any]):
+        self.path = path
+        self.labels: Dict[str, List[str]] = manifest["labels"]
+        self.source_version = manifest["source_version"]
+        self.built_at = manifest["built_at"]
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in manifest["columns"]
+        }
+
+    def __len__(self) -> int:
+        return len(self.columns["quote_id"])
+
+    def decode(self, name: str) -> np.ndarray:
+        """Labels of a category column, one per row."""
+        return np.asarray(self.labels[name], dtype=object)[self.columns[name]]
+
+    def group_sum(self, value: str, by: str, mask: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """
+        Sum a numeric column per label of a category column.
+
+        Args:
+            value: Numeric column to sum
+            by: Category column to group by
+            mask: Optional boolean row filter
+
+        Returns:
+            Dictionary of label -> total (labels with no rows are omitted)
+        """
+        codes = self.columns[by]
+        weights = self.columns[value]
+        if mask is not None:
+            codes, weights = codes[mask], weights[mask]
+        totals = np.bincount(codes, weights=weights, minlength=len(self.labels[by]))
+        counts = np.bincount(codes, minlength=len(self.labels[by]))
+        return {label: float(total) for label, total, count in zip(self.labels[by], totals, counts) if count}
+
+    def monthly_sum(self, value: str, mask: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """Sum a numeric column per creation month ("YYYY-MM"); undated rows are skipped."""
+        dates = self.columns[DATE_COLUMN]
+        weights = self.columns[value]
+        keep = ~np.isnat(dates) if mask is None else mask & ~np.isnat(dates)
+        months = dates[keep].astype("datetime64[M]").view(np.int64)
+        if not len(months):
+            return {}
+        # Months are small consecutive integers: bincount beats sorting for np.unique
+        first = months.min()
+        totals = np.bincount(months - first, weights=weights[keep])
+        counts = np.bincount(months - first)
+        return {
+            str(np.datetime64(int(first + offset), "M")): float(total)
+            for offset, (total, count) in enumerate(zip(totals, counts)) if count
+        }
+
+def write_archive(quotes: Iterable[Dict[str, Any]], source_version: Any = None, directory: str = ARCHIVE_DIR) -> str:
+    """
+    Build a new archive generation from quote records and make it current.
+
+    Args:
+        quotes: Quote records (at least ARCHIVE_FIELDS), streamed once
+        source_version: Store version the records were read at
+        directory: Archive directory
+
+    Returns:
+        Path of the new generation
+    """
+    numeric = {name: array(spec[1]) for name, spec in NUMERIC_COLUMNS.items()}
+    codes = {name: array("l") for name in CATEGORY_COLUMNS}
+    lookups: Dict[str, Dict[str, int]] = {name: {} for name in CATEGORY_COLUMNS}
+    dates = array("q")
+    quote_ids: List[str] = []
+    for quote in quotes:
+        quote_ids.append(str(quote.get("quote_id")))
+        for name, (_, typecode, missing, read) in NUMERIC_COLUMNS.items():
+            try:
+                value = (float if typecode == "d" else int)(read(quote))
+            except (TypeError, ValueError):
+                value = missing
+            numeric[name].append(value)
+        for name, read in CATEGORY_COLUMNS.items():
+            lookup = lookups[name]
+            codes[name].append(lookup.setdefault(str(read(quote)), len(lookup)))
+        dates.append(_timestamp(quote.get(DATE_COLUMN)))
+
+    generation = f"{time.time_ns():x}-{os.getpid()}"
+    path = os.path.join(directory, generation)
+    os.makedirs(path)
+    columns = {
+        **{name: np.frombuffer(values, dtype=NUMERIC_COLUMNS[name][1]).astype(NUMERIC_COLUMNS[name][0])
+           for name, values in numeric.items()},
+        **{name: np.frombuffer(values, dtype="l").astype(np.int32) for name, values in codes.items()},
+        DATE_COLUMN: np.frombuffer(dates, dtype=np.int64).view("datetime64[s]"),
+        "quote_id": np.array(quote_ids, dtype=str),
+    }
+    for name, values in columns.items():
+        with open(os.path.join(path, f"{name}.npy"), "wb") as f:
+            np.save(f, values)
+            f.flush()
+            os.fsync(f.fileno())
+    manifest = {
+        "generation": generation,
+        "columns": sorted(columns),
+        "labels": {name: list(lookup) for name, lookup in lookups.items()},
+        "source_version": source_version,
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+        "rows": len(quote_ids),
+    }
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    with file_lock(manifest_path):
+        previous = _read_manifest(directory)
+        atomic_write_json(manifest_path, manifest, indent=2)
+    if previous and previous["generation"] != generation:
+        # Open memmaps of the old generation stay valid after unlinking (POSIX)
+        shutil.rmtree(os.path.join(directory, previous["generation"]), ignore_errors=True)
+    return path
+
+def _read_manifest(directory: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _store_version() -> List[Any]:
+    """JSON-comparable version of the configured quote store."""
+    return [storage_backend(), json.loads(json.dumps(get_quote_store().data_version()))]
+
+def sync_archive(directory: str = ARCHIVE_DIR, force: bool = False) -> bool:
+    """
+    Rebuild the archive from the quote store if the store changed since the last sync.
+
+    Args:
+        directory: Archive directory
+        force: Rebuild even if the archive is current
+
+    Returns:
+        True if a new generation was written
+    """
+    version = _store_version()
+    manifest = _read_manifest(directory)
+    if not force and manifest is not None and manifest["source_version"] == version:
+        return False
+    write_archive(get_quote_store().iter_quotes(fields=ARCHIVE_FIELDS), version, directory)
+    return True
+
+def open_archive(directory: str = ARCHIVE_DIR, sync: bool = True) -> QuoteArchive:
+    """
+    Memory-map the current archive generation.
+
+    Args:
+        directory: Archive directory
+        sync: Bring the archive up to date with the quote store first
+    """
+    if sync:
+        sync_archive(directory)
+    manifest = _read_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f"No quote archive in {directory}; run sync_archive() first")
+    return QuoteArchive(os.path.join(directory, manifest["generation"]), manifest)
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    rebuilt = sync_archive(force="--force" in sys.argv)
+    archive = open_archive(sync=False)
+    print(f"{'Rebuilt' if rebuilt else 'Up to date'}: {len(archive)} quotes in {archive.path} "
+          f"({time.perf_counter() - start:.2f}s)")
+    for status, total in archive.group_sum("recommended_quote", "status").items():
+        print(f"  {status:<10} {total:,.0f}")
@@ -0,0 +1,126 @@
+"""
+Process-wide memoization of pricing results for the Lapis Visuals Pricing Calculator.
+
+Quotes are keyed by a canonical fingerprint of the pricing-relevant inputs and
+the rate-card version, so the same brief is priced once per process no matter
+which session, rerun or template asks for it.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Hashable
+
+from constants import DEFAULT_PRODUCTION_VARS
+
+# Questionnaire fields that feed the pricing engine (the rest are descriptive)
+PRICING_QUESTIONNAIRE_FIELDS = ("video_length", "deliverables", "special_requirements")
+PRICING_PRODUCTION_FIELDS = tuple(DEFAULT_PRODUCTION_VARS.keys())
+
+QUOTE_CACHE_SIZE = 1024
+
+class LRUCache:
+    """
+    Bounded, thread-safe least-recently-used cache with hit/miss counters.
+
+    Streamlit serves every session from threads of one process, so a module-level
+    instance is shared by all concurrent sessions.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key (counting a hit or miss)."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries beyond maxsize."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value, computing and storing it on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        # Compute outside the lock; two sessions racing on the same key just both compute
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and the current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+def _canonical_value(value: Any) -> Any:
+    """Normalize a field value so equivalent inputs serialize identically."""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, (list, tuple, set)):
+        return sorted(_canonical_value(v) for v in value)
+    return str(value)
+
+def quote_fingerprint(questionnaire: Dict[str, Any], production_vars: Dict[str, Any], rate_version: str) -> str:
+    """
+    Return an order-independent fingerprint of everything that determines a price.
+
+    Args:
+        questionnaire: Dictionary containing questionnaire responses
+        production_vars: Dictionary containing production variables
+        rate_version: Fingerprint of the active rate card
+
+    Returns:
+        Hex digest identifying the pricing inputs
+    """
+    payload = {
+        "q": {name: _canonical_value(questionnaire.get(name)) for name in PRICING_QUESTIONNAIRE_FIELDS},
+        "p": {name: _canonical_value(production_vars.get(name)) for name in PRICING_PRODUCTION_FIELDS},
+        "rates": rate_version,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+# Shared by every session in the process
+QUOTE_CACHE = LRUCache(QUOTE_CACHE_SIZE)
+
+def invalidate_quote_cache() -> None:
+    """Drop all memoized quotes (called whenever a new rate card is saved)."""
+    QUOTE_CACHE.clear()
+
+def quote_cache_stats() -> Dict[str, int]:
+    """Return the shared quote cache's counters."""
+    return QUOTE_CACHE.stats()
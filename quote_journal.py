@@ -0,0 +1,341 @@
+"""
+Append-only quote journal for the Lapis Visuals Pricing Calculator.
+
+Quotes are stored as one JSON event per line: a "create" event carries the full
+quote and a "patch" event carries the changed fields of one quote. Writes are
+single appends; reads fold the events into a materialized view that is cached
+per process, indexed by quote_id and customer_id, and brought up to date by
+replaying only the lines appended since the last read (a replaced or rewritten
+file, detected by inode, size or mtime, triggers a full rebuild). Once the log
+holds too many superseded events, it is compacted in a background thread into
+one "create" event per live quote.
+
+Appends, compaction and rewrites hold the log's advisory file lock, so several
+app processes can share one log; every quote carries a "version" (1 when
+created, +1 per patch) for optimistic checks in patch().
+"""
+
+import gc
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from safe_io import VersionConflict, file_lock, fsync_directory
+
+QUOTES_LOG = "data/quotes.jsonl"
+
+# Compact once the log is at least this large...
+COMPACTION_MIN_BYTES = 1 << 20
+# ...and holds this many events per live quote
+COMPACTION_RATIO = 2.0
+
+def _encode(event: Dict[str, Any]) -> str:
+    """Serialize one event as a single log line (datetimes become strings)."""
+    return json.dumps(event, default=str, separators=(",", ":")) + "\n"
+
+class QuoteJournal:
+    """
+    Append-only JSONL log of quote events with a cached materialized view.
+
+    One instance per log file is shared by every session in the process; all
+    methods are thread-safe.
+    """
+
+    def __init__(self, path: str = QUOTES_LOG, compaction_min_bytes: int = COMPACTION_MIN_BYTES,
+                 compaction_ratio: float = COMPACTION_RATIO):
+        self.path = path
+        self.compaction_min_bytes = compaction_min_bytes
+        self.compaction_ratio = compaction_ratio
+        self._lock = threading.RLock()
+        self._view: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._by_customer: Dict[Any, Dict[str, None]] = {}  # customer_id -> ordered set of quote_ids
+        self._offset = 0  # Bytes of the log already folded into the view
+        self._file_id = None  # (device, inode) of the log the view was built from
+        # Kept open so that inode cannot be recycled for a later log (which would look unchanged)
+        self._handle = None
+        self._mtime_ns = None  # Modification time of the log when _offset was reached
+        self._events = 0  # Events folded into the view
+        self._compacting = False
+        self.rebuilds = 0
+        self.compactions = 0
+        self.corrupt_lines = 0
+
+    def _index_customer(self, quote_id: str, old_customer: Any, new_customer: Any) -> None:
+        """Move quote_id between customer index entries."""
+        if old_customer in self._by_customer:
+            self._by_customer[old_customer].pop(quote_id, None)
+        self._by_customer.setdefault(new_customer, {})[quote_id] = None
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        """Fold one event into the materialized view and its customer index."""
+        op = event.get("op")
+        if op == "create":
+            quote = event["quote"]
+            quote.setdefault("version", 1)
+            quote_id = quote["quote_id"]
+            previous = self._view.get(quote_id)
+            self._view[quote_id] = quote
+            previous_customer = previous.get("customer_id") if previous else None
+            self._index_customer(quote_id, previous_customer, quote.get("customer_id"))
+        elif op == "patch":
+            quote = self._view.get(event["quote_id"])
+            if quote is not None:
+                old_customer = quote.get("customer_id")
+                # Replace rather than modify: iter_quotes() generators may still hold the old record
+                quote = {**quote, **event["changes"], "version": quote.get("version", 1) + 1}
+                self._view[quote["quote_id"]] = quote
+                if quote.get("customer_id") != old_customer:
+                    self._index_customer(quote["quote_id"], old_customer, quote.get("customer_id"))
+        self._events += 1
+
+    def _reset(self, file_id: Any) -> None:
+        """Drop the view so the next read replays the whole log."""
+        self._view.clear()
+        self._by_customer.clear()
+        self._offset = self._events = 0
+        self._file_id = file_id
+        self._mtime_ns = None
+
+    def _open_log(self) -> os.stat_result:
+        """(Re)open the current log for replay and return its stat."""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        self._handle = open(self.path, "rb")
+        return os.fstat(self._handle.fileno())
+
+    def _refresh(self) -> None:
+        """Bring the view up to date with the log, replaying only new lines when possible."""
+        try:
+            stat = os.stat(self.path)
+            if ((stat.st_dev, stat.st_ino) != self._file_id or stat.st_size < self._offset
+                    or (stat.st_size == self._offset and stat.st_mtime_ns != self._mtime_ns)):
+                # Log was replaced (compacted) or rewritten in place: full rebuild
+                stat = self._open_log()
+                self._reset((stat.st_dev, stat.st_ino))
+                self.rebuilds += 1
+        except FileNotFoundError:
+            self._reset(None)
+            return
+        if stat.st_size == self._offset:
+            return
+        self._handle.seek(self._offset)
+        # Read only up to the size just seen so the recorded mtime matches the offset
+        tail = self._handle.read(stat.st_size - self._offset)
+        # A line without its newline is a write in progress (or torn by a crash); leave it for later
+        complete = tail[:tail.rfind(b"\n") + 1]
+        lines = [line for line in complete.splitlines() if line.strip()]
+        # Replay allocates millions of small objects; pausing the cyclic GC roughly halves the time
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            try:
+                # Decoding the whole tail as one array is much faster than line by line
+                events = json.loads(b"[" + b",".join(lines) + b"]")
+            except json.JSONDecodeError:
+                events = []
+                for line in lines:
+                    try:
+                        events.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        self.corrupt_lines += 1
+            for event in events:
+                try:
+                    self._apply(event)
+                except (KeyError, TypeError, AttributeError):
+                    self.corrupt_lines += 1
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        self._offset += len(complete)
+        self._mtime_ns = stat.st_mtime_ns
+
+    def _append(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Append one event and fold it into the view. Caller holds both locks."""
+        line = _encode(event)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+        # Fold the new tail from disk: it includes any lines other processes appended first
+        self._refresh()
+        self._maybe_compact()
+        return json.loads(line)
+
+    def create(self, quote: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Append a new quote.
+
+        Args:
+            quote: Full quote record (must contain quote_id)
+
+        Returns:
+            The quote as stored (JSON round-tripped)
+        """
+        with self._lock, file_lock(self.path):
+            self._refresh()
+            stored = self._append({"op": "create", "quote": quote})["quote"]
+            stored.setdefault("version", 1)
+            return stored
+
+    def patch(self, quote_id: str, changes: Dict[str, Any], expected_version: Optional[int] = None) -> bool:
+        """
+        Append a change to an existing quote.
+
+        Args:
+            quote_id: ID of the quote to change
+            changes: Fields to overwrite
+            expected_version: If given, the version the caller read; raises
+                VersionConflict if the quote has changed since
+
+        Returns:
+            True if the quote exists, otherwise False (nothing is written)
+        """
+        with self._lock, file_lock(self.path):
+            self._refresh()
+            quote = self._view.get(quote_id)
+            if quote is None:
+                return False
+            if expected_version is not None and quote.get("version", 1) != expected_version:
+                raise VersionConflict(
+                    f"Quote {quote_id} is at version {quote.get('version', 1)}, expected {expected_version}"
+                )
+            self._append({"op": "patch", "quote_id": quote_id, "changes": changes})
+            return True
+
+    def customer_quotes(self, customer_id: str) -> List[Dict[str, Any]]:
+        """Return copies of one customer's quotes in creation order (index lookup, no scan)."""
+        with self._lock:
+            self._refresh()
+            return [dict(self._view[quote_id]) for quote_id in self._by_customer.get(customer_id, ())]
+
+    def get(self, quote_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of one quote, or None."""
+        with self._lock:
+            self._refresh()
+            quote = self._view.get(quote_id)
+            return dict(quote) if quote is not None else None
+
+    def quotes(self, where: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Dict[str, Any]]:
+        """Return copies of the live quotes (optionally only those matching where) in creation order."""
+        with self._lock:
+            self._refresh()
+            return [dict(quote) for quote in self._view.values() if where is None or where(quote)]
+
+    def iter_quotes(self, where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                    fields: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield live quotes in creation order without copying the whole view.
+
+        Records in the view are never modified in place, so the generator walks a
+        list of references taken under the lock and only copies what it yields.
+
+        Args:
+            where: Predicate on each record as it would be yielded (after projection)
+            fields: Only return these fields (None for missing ones); None for whole records
+        """
+        with self._lock:
+            self._refresh()
+            records = list(self._view.values())
+        for quote in records:
+            record = dict(quote) if fields is None else {field: quote.get(field) for field in fields}
+            if where is None or where(record):
+                yield record
+
+    def _write_temp(self, quotes: Iterable[Dict[str, Any]]) -> Tuple[str, int]:
+        """Write one create event per quote to a temp file next to the log; return its path and size."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            for quote in quotes:
+                f.write(_encode({"op": "create", "quote": quote}).encode("utf-8"))
+            size = f.tell()
+        return temp_path, size
+
+    def _swap_in(self, temp_path: str) -> None:
+        """fsync a finished temp log and atomically replace the live log with it."""
+        with open(temp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        fsync_directory(self.path)
+
+    def rewrite(self, quotes: Iterable[Dict[str, Any]]) -> None:
+        """Replace the whole log with one create event per quote."""
+        with self._lock, file_lock(self.path):
+            temp_path, _ = self._write_temp(quotes)
+            self._swap_in(temp_path)
+            # Rebuild from the new log on the next read
+            self._reset(None)
+
+    def needs_compaction(self) -> bool:
+        """Whether the log is large and mostly superseded events."""
+        live = max(len(self._view), 1)
+        return self._offset >= self.compaction_min_bytes and self._events / live >= self.compaction_ratio
+
+    def _maybe_compact(self) -> None:
+        if self._compacting or not self.needs_compaction():
+            return
+        self._compacting = True
+        threading.Thread(target=self.compact, name="quote-journal-compaction", daemon=True).start()
+
+    def compact(self) -> None:
+        """
+        Rewrite the log as one create event per live quote.
+
+        The snapshot is written without holding the lock; events appended in the
+        meantime are copied over verbatim before the new log replaces the old one,
+        so the cached view stays valid and no replay is needed.
+        """
+        try:
+            with self._lock:
+                self._refresh()
+                # Patches replace top-level fields, so shallow copies are a stable snapshot
+                snapshot = [dict(quote) for quote in self._view.values()]
+                snapshot_offset = self._offset
+                snapshot_id = self._file_id
+            temp_path, snapshot_size = self._write_temp(snapshot)
+            with self._lock, file_lock(self.path):
+                self._refresh()
+                if self._file_id != snapshot_id:
+                    # The log was rewritten meanwhile; that version wins
+                    os.remove(temp_path)
+                    return
+                with open(self.path, "rb") as f:
+                    f.seek(snapshot_offset)
+                    tail = f.read(self._offset - snapshot_offset)
+                with open(temp_path, "ab") as f:
+                    f.write(tail)
+                self._swap_in(temp_path)
+                stat = self._open_log()
+                self._file_id = (stat.st_dev, stat.st_ino)
+                self._mtime_ns = stat.st_mtime_ns
+                self._offset = snapshot_size + len(tail)
+                self._events = len(snapshot) + tail.count(b"\n")
+                self.compactions += 1
+        finally:
+            self._compacting = False
+
+    def version(self) -> Tuple[Any, int]:
+        """Token that changes whenever the log gains events or is replaced."""
+        with self._lock:
+            self._refresh()
+            return self._file_id, self._offset
+
+    def stats(self) -> Dict[str, Any]:
+        """Return log size, index size and rebuild/compaction counters."""
+        with self._lock:
+            self._refresh()
+            return {
+                "quotes": len(self._view),
+                "customers": len(self._by_customer),
+                "events": self._events,
+                "log_bytes": self._offset,
+                "rebuilds": self.rebuilds,
+                "compactions": self.compactions,
+                "corrupt_lines": self.corrupt_lines,
+            }
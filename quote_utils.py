@@ -1,41 +1,59 @@
-import json
 import os
 from datetime import datetime
 import uuid
 
-QUOTES_FILE = "data/quotes.json"
+from constants import FINAL_QUOTE_STATUSES, QUOTE_PAGE_SIZE
+from pipeline_aggregates import aggregates_lock, apply_quote_change, rebuild_aggregates
+from safe_io import VersionConflict
+from pricing_logic import load_rates, compute_quote_cached
+from rate_versions import save_rate_version, rate_card_for_version
+from storage import get_quote_store
+
+# Fields that determine a quote's line items
+PRICING_INPUT_FIELDS = ("questionnaire_snapshot", "production_vars_snapshot", "rate_version")
+
+# Re-reads of a quote that changed between reading it and saving an update
+UPDATE_RETRIES = 10
 
 def generate_quote_id():
     """Generates a unique quote ID."""
     return f"QTE-{uuid.uuid4().hex[:8].upper()}"
 
 def load_quotes():
-    """Loads quotes from the JSON file."""
-    if not os.path.exists(os.path.dirname(QUOTES_FILE)):
-        os.makedirs(os.path.dirname(QUOTES_FILE))
-    if not os.path.exists(QUOTES_FILE):
-        return []
-    try:
-        with open(QUOTES_FILE, "r") as f:
-            # Handle empty file case
-            content = f.read()
-            if not content:
-                return []
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return [] # Return empty list if file not found or invalid JSON
+    """Loads all quotes from the configured storage backend."""
+    return get_quote_store().list_quotes()
+
+def iter_quotes(where=None, fields=None):
+    """
+    Yields saved quotes in creation order, one at a time.
+
+    Pass fields to receive only those keys (e.g. skip the large snapshots) and
+    where to filter; where sees the record as yielded. Stop iterating as soon
+    as you have what you need - nothing beyond that is read or copied.
+    """
+    return get_quote_store().iter_quotes(where=where, fields=fields)
+
+def iter_quotes_matching(customer_id=None, statuses=None, fields=None):
+    """
+    Yields the quotes of a customer (None for all) in the given statuses (None for all), in creation order.
+
+    The filters are applied by the storage backend (see QuoteStore.iter_quotes_matching).
+    """
+    return get_quote_store().iter_quotes_matching(customer_id=customer_id, statuses=statuses, fields=fields)
 
 def save_quotes(quotes):
-    """Saves the quotes list to the JSON file."""
-    if not os.path.exists(os.path.dirname(QUOTES_FILE)):
-        os.makedirs(os.path.dirname(QUOTES_FILE))
-    with open(QUOTES_FILE, "w") as f:
-        json.dump(quotes, f, indent=2, default=str) # Use default=str for datetime
-
-def add_quote(customer_id, project_name, questionnaire, production_vars, low_quote, high_quote, recommended_quote, line_items):
-    """Adds a new quote to the list and saves it."""
-    quotes = load_quotes()
-    
+    """Replaces all saved quotes with the given list."""
+    with aggregates_lock():
+        get_quote_store().replace_all(quotes)
+        rebuild_aggregates()
+
+def add_quote(customer_id, project_name, questionnaire, production_vars, low_quote, high_quote, recommended_quote, rates=None):
+    """
+    Adds a new quote and saves it.
+
+    Only the inputs, totals and the rate-card version (rates, default: the saved
+    rate card) are stored; line items are regenerated by quote_line_items().
+    """
     new_quote = {
         "quote_id": generate_quote_id(),
         "customer_id": customer_id,
@@ -45,51 +63,128 @@ def add_quote(customer_id, project_name, questionnaire, production_vars, low_quo
         "low_quote": low_quote,
         "high_quote": high_quote,
         "recommended_quote": recommended_quote,
-        "line_items_snapshot": line_items, # Consider if storing full line items is necessary or if they can be regenerated
+        "rate_version": save_rate_version(rates if rates is not None else load_rates()),
         "status": "Draft", # Initial status
         "creation_date": datetime.now(),
         "last_updated_date": datetime.now()
     }
-    quotes.append(new_quote)
-    save_quotes(quotes)
-    return new_quote # Return the newly created quote
+    with aggregates_lock():  # A rebuild in between would count the new quote twice
+        stored = get_quote_store().create_quote(new_quote)
+        apply_quote_change(None, stored)
+    return stored # Return the newly created quote
 
 def get_quotes_by_customer(customer_id):
     """Retrieves all quotes associated with a specific customer ID."""
-    quotes = load_quotes()
-    return [quote for quote in quotes if quote.get("customer_id") == customer_id]
+    return get_quote_store().quotes_by_customer(customer_id)
+
+def query_quotes(customer_id=None, statuses=None, sort="creation_date", descending=True,
+                 limit=QUOTE_PAGE_SIZE, offset=0, cursor=None, fields=None):
+    """
+    Retrieves one sorted, filtered page of quotes (see QuoteStore.query_quotes).
+
+    Returns:
+        Dictionary with "quotes", "total" and "next_cursor" (None on the last page)
+    """
+    return get_quote_store().query_quotes(
+        customer_id=customer_id, statuses=statuses, sort=sort, descending=descending,
+        limit=limit, offset=offset, cursor=cursor, fields=fields
+    )
 
 def get_quote_by_id(quote_id):
     """Retrieves a single quote by its ID."""
-    quotes = load_quotes()
-    for quote in quotes:
-        if quote.get("quote_id") == quote_id:
-            return quote
-    return None
-
-def update_quote(quote_id, updates):
-    """Updates an existing quote and saves the changes."""
-    quotes = load_quotes()
-    quote_found = False
-    for i, quote in enumerate(quotes):
-        if quote.get("quote_id") == quote_id:
-            # Preserve creation date, update last_updated_date
-            updates["last_updated_date"] = datetime.now()
-            creation_date = quote.get("creation_date") # Keep original creation date
-            
-            quotes[i].update(updates)
-            
-            # Ensure creation date wasn't overwritten if it existed
-            if creation_date and "creation_date" not in updates:
-                 quotes[i]["creation_date"] = creation_date
-                 
-            quote_found = True
-            break
-            
-    if quote_found:
-        save_quotes(quotes)
-        return True
-    return False
+    return get_quote_store().get_quote(quote_id)
+
+def regenerate_quote(quote):
+    """Prices a saved quote's inputs with the rate-card version it was saved with (memoized)."""
+    card = rate_card_for_version(quote["rate_version"])
+    return compute_quote_cached(quote.get("questionnaire_snapshot") or {}, quote.get("production_vars_snapshot") or {}, card)
+
+def quote_line_items(quote):
+    """Returns a saved quote's line items: its materialized snapshot, else regenerated from its inputs."""
+    snapshot = quote.get("line_items_snapshot")
+    if snapshot is not None:
+        return snapshot
+    result = regenerate_quote(quote)
+    return {item: dict(values) for item, values in result.line_items.items()}
+
+def _snapshot_changes(quote, changes):
+    """
+    Keeps line-item snapshots only for quotes in a final status.
+
+    Returns the snapshot change implied by applying changes to quote: materialize
+    it on entering a final status (or when a final quote's inputs change), drop it
+    on leaving one. Quotes without a rate_version keep their snapshot, since it
+    cannot be regenerated.
+    """
+    merged = {**quote, **changes}
+    if not merged.get("rate_version"):
+        return {}
+    inputs_changed = any(field in changes for field in PRICING_INPUT_FIELDS)
+    if merged.get("status") in FINAL_QUOTE_STATUSES:
+        if quote.get("line_items_snapshot") is None or inputs_changed:
+            return {"line_items_snapshot": quote_line_items({**merged, "line_items_snapshot": None})}
+    elif quote.get("line_items_snapshot") is not None:
+        return {"line_items_snapshot": None}
+    return {}
+
+def update_quote(quote_id, updates, expected_version=None):
+    """
+    Updates an existing quote (creation date and version are never touched).
+
+    Pass the "version" of the quote as read to fail with VersionConflict instead
+    of overwriting a change someone else saved in between.
+    """
+    updates = {key: value for key, value in updates.items() if key not in ("creation_date", "version", "line_items_snapshot")}
+    for attempt in range(UPDATE_RETRIES):
+        quote = get_quote_by_id(quote_id)
+        if quote is None:
+            return False
+        changes = dict(updates, **_snapshot_changes(quote, updates))
+        changes["last_updated_date"] = datetime.now()
+        # Save against the version just read, so the pipeline totals get an exact delta
+        try:
+            with aggregates_lock():
+                updated = get_quote_store().patch_quote(
+                    quote_id, changes, expected_version if expected_version is not None else quote.get("version")
+                )
+                if updated:
+                    apply_quote_change(quote, {**quote, **changes})
+        except VersionConflict:
+            if expected_version is not None or attempt == UPDATE_RETRIES - 1:
+                raise
+            continue
+        return updated
+
+def drop_regenerable_snapshots(rates=None):
+    """
+    Shrinks older quotes saved with a full line-item snapshot.
+
+    Non-final quotes without a rate_version whose snapshot is reproduced exactly
+    by rates (default: the saved rate card) get that rate version and lose the
+    snapshot. Returns the number of quotes converted.
+    """
+    rates = rates if rates is not None else load_rates()
+    version = save_rate_version(rates)
+    candidates = iter_quotes(
+        where=lambda q: q["line_items_snapshot"] is not None and not q["rate_version"]
+        and q["status"] not in FINAL_QUOTE_STATUSES,
+        fields=("quote_id", "version", "status", "line_items_snapshot", *PRICING_INPUT_FIELDS)
+    )
+    converted = 0
+    for quote in candidates:
+        if quote_line_items({**quote, "rate_version": version, "line_items_snapshot": None}) != quote["line_items_snapshot"]:
+            continue
+        changes = {"rate_version": version, "line_items_snapshot": None}
+        try:
+            if get_quote_store().patch_quote(quote["quote_id"], changes, quote["version"]):
+                converted += 1
+        except VersionConflict:
+            pass  # Changed meanwhile; picked up on the next run
+    return converted
+
+def quote_index_stats():
+    """Returns the storage backend's index counters (e.g. rebuild count) for monitoring."""
+    return get_quote_store().stats()
 
 def update_quote_status(quote_id, new_status):
     """Updates the status of a specific quote."""
@@ -104,8 +199,7 @@ if __name__ == '__main__':
     # Example: Add a dummy quote
     # dummy_q = {"q1": "A"}
     # dummy_p = {"p1": "B"}
-    # dummy_lines = [{"item": "Service A", "cost": 100}]
-    # added = add_quote("CUST-123", "Test Project", dummy_q, dummy_p, 90, 110, 100, dummy_lines)
+    # added = add_quote("CUST-123", "Test Project", dummy_q, dummy_p, 90, 110, 100)
     # print(f"Added Quote: {added}")
 
     # Example: Get quotes for a customer
@@ -119,8 +213,9 @@ if __name__ == '__main__':
     #     updated_quote = get_quote_by_id(cust_quotes[0]['quote_id'])
     #     print(f"Updated Quote: {updated_quote}")
     
+    import sys
+    if sys.argv[1:] == ["drop-snapshots"]:
+        print(f"Dropped line-item snapshots from {drop_regenerable_snapshots()} quotes")
+
     print("Quote utils loaded.")
-    # Initialize with an empty list if file doesn't exist or is empty
-    if not os.path.exists(QUOTES_FILE) or os.path.getsize(QUOTES_FILE) == 0:
-        save_quotes([])
-        print(f"Initialized empty {QUOTES_FILE}") 
\ No newline at end of file
+    print(f"{len(load_quotes())} saved quotes") 
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Content-addressed rate-card versions for the Lapis Visuals Pricing Calculator.
+
+Every rate card a quote was priced with is stored once under its fingerprint
+(data/rate_versions/<fingerprint>.json). Files are immutable, so a quote only
+has to keep its inputs and rate_version to regenerate its line items exactly.
+"""
+
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Any
+
+from pricing_logic import CompiledRateCard, compile_rates, rates_fingerprint
+from safe_io import atomic_write_json
+
+RATE_VERSIONS_DIR = "data/rate_versions"
+
+def _version_path(version_id: str, directory: str) -> str:
+    return os.path.join(directory, f"{version_id}.json")
+
+def save_rate_version(rates: Dict[str, Any], directory: str = RATE_VERSIONS_DIR) -> str:
+    """
+    Store a rate card (if not stored already) and return its version ID.
+
+    Args:
+        rates: Rates dictionary
+        directory: Version store directory
+
+    Returns:
+        The rates' fingerprint, which names the stored version
+    """
+    version_id = rates_fingerprint(rates)
+    path = _version_path(version_id, directory)
+    if not os.path.exists(path):
+        # Same content, same name: concurrent writers of one version are harmless
+        atomic_write_json(path, rates, indent=2)
+    return version_id
+
+def load_rate_version(version_id: str, directory: str = RATE_VERSIONS_DIR) -> Dict[str, Any]:
+    """
+    Load a stored rate card.
+
+    Args:
+        version_id: Version ID returned by save_rate_version()
+        directory: Version store directory
+
+    Returns:
+        Rates dictionary (a fresh copy)
+
+    Raises:
+        KeyError: If the version is not stored
+        ValueError: If the stored file does not match its version ID
+    """
+    try:
+        with open(_version_path(version_id, directory), "r") as f:
+            rates = json.load(f)
+    except FileNotFoundError:
+        raise KeyError(f"Unknown rate version: {version_id}") from None
+    if rates_fingerprint(rates) != version_id:
+        raise ValueError(f"Rate version {version_id} is corrupt")
+    return rates
+
+@lru_cache(maxsize=64)
+def rate_card_for_version(version_id: str, directory: str = RATE_VERSIONS_DIR) -> CompiledRateCard:
+    """Compiled rate card of a stored version (cached: versions never change)."""
+    return compile_rates(load_rate_version(version_id, directory))
@@ -0,0 +1,201 @@
+"""
+Bulk re-pricing of the saved quote history for the Lapis Visuals Pricing Calculator.
+
+After a rate-card change, every saved quote's questionnaire and production
+snapshots are priced again with the vectorized batch engine and compared with
+the stored prices. Quotes are consumed as a stream in chunks, and large histories
+are spread across a process pool; only per-group totals are kept per chunk.
+"""
+
+import os
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from pricing_logic import CompiledRateCard, RatesLike, compile_rates, calculate_quotes_batch
+from quote_utils import iter_quotes
+
+# Dimensions of the delta report and where each one is read from
+REPORT_DIMENSIONS = {
+    "status": lambda quote: quote.get("status") or "Unknown",
+    "customer": lambda quote: quote.get("customer_id") or "Unknown",
+    "format": lambda quote: (quote.get("questionnaire_snapshot") or {}).get("format") or "Unknown",
+}
+
+# Everything _quote_row reads; line-item snapshots are never loaded
+REPRICE_FIELDS = (
+    "status", "customer_id", "questionnaire_snapshot", "production_vars_snapshot", "recommended_quote"
+)
+
+REPRICE_CHUNK_SIZE = 20_000
+
+# Histories with fewer chunks than this are repriced in-process
+PARALLEL_MIN_CHUNKS = 4
+
+def _quote_row(quote: Dict[str, Any], card: CompiledRateCard) -> Optional[Dict[str, Any]]:
+    """Batch input row for a saved quote, or None if its snapshots cannot be priced."""
+    q = quote.get("questionnaire_snapshot") or {}
+    p = quote.get("production_vars_snapshot") or {}
+    try:
+        row = {
+            "video_length": float(q["video_length"]),
+            "deliverables": int(q["deliverables"]),
+            "shooting_days": float(p["shooting_days"]),
+            "crew_size": int(p["crew_size"]),
+            "location": p["location"],
+            "talent_count": int(p["talent_count"]),
+            "agency_markup": bool(p["agency_markup"]),
+            "props_design": p["props_design"],
+            "footage_volume": p["footage_volume"],
+            "contingency": float(p["contingency"]),
+            "saved_quote": float(quote.get("recommended_quote") or 0),
+        }
+    except (KeyError, TypeError, ValueError):
+        return None
+    if row["location"] not in card.location_index:
+        return None
+    for dimension, read in REPORT_DIMENSIONS.items():
+        row[dimension] = str(read(quote))
+    return row
+
+def _chunks(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[Dict[str, List[Any]]]:
+    """Group row dicts into column lists of at most size rows."""
+    chunk: Dict[str, List[Any]] = {}
+    count = 0
+    for row in rows:
+        for key, value in row.items():
+            chunk.setdefault(key, []).append(value)
+        count += 1
+        if count == size:
+            yield chunk
+            chunk, count = {}, 0
+    if count:
+        yield chunk
+
+def _empty_group() -> Dict[str, float]:
+    return {"quotes": 0, "saved_total": 0.0, "repriced_total": 0.0, "increased": 0, "decreased": 0}
+
+def _reprice_chunk(chunk: Dict[str, List[Any]], card: CompiledRateCard) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Reprice one chunk and reduce it to per-dimension group totals."""
+    columns = {name: np.asarray(values) for name, values in chunk.items()}
+    repriced = calculate_quotes_batch(columns, card)["recommended_quote"].astype(np.float64)
+    saved = columns["saved_quote"].astype(np.float64)
+    delta = repriced - saved
+
+    partial: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for dimension in REPORT_DIMENSIONS:
+        keys, inverse = np.unique(columns[dimension], return_inverse=True)
+        groups = len(keys)
+        totals = {
+            "quotes": np.bincount(inverse, minlength=groups),
+            "saved_total": np.bincount(inverse, weights=saved, minlength=groups),
+            "repriced_total": np.bincount(inverse, weights=repriced, minlength=groups),
+            "increased": np.bincount(inverse, weights=delta > 0, minlength=groups),
+            "decreased": np.bincount(inverse, weights=delta < 0, minlength=groups),
+        }
+        partial[dimension] = {
+            str(key): {name: float(values[i]) for name, values in totals.items()}
+            for i, key in enumerate(keys)
+        }
+    return partial
+
+def _merge(report: Dict[str, Dict[str, Dict[str, float]]], partial: Dict[str, Dict[str, Dict[str, float]]]):
+    """Add one chunk's group totals into the running report."""
+    for dimension, groups in partial.items():
+        merged = report.setdefault(dimension, {})
+        for key, totals in groups.items():
+            group = merged.setdefault(key, _empty_group())
+            for name, value in totals.items():
+                group[name] += value
+
+def _finish_group(group: Dict[str, float]) -> Dict[str, Any]:
+    """Round totals and add the absolute and percentage delta."""
+    saved = group["saved_total"]
+    repriced = group["repriced_total"]
+    return {
+        "quotes": int(group["quotes"]),
+        "saved_total": round(saved),
+        "repriced_total": round(repriced),
+        "delta": round(repriced - saved),
+        "delta_percent": (repriced - saved) / saved * 100 if saved else None,
+        "increased": int(group["increased"]),
+        "decreased": int(group["decreased"]),
+    }
+
+def reprice_quote_history(rates: RatesLike, quotes: Optional[Iterable[Dict[str, Any]]] = None,
+                          chunk_size: int = REPRICE_CHUNK_SIZE, workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Reprice every saved quote against a rate card and report how the pipeline shifts.
+
+    Args:
+        rates: Rates dictionary or CompiledRateCard to reprice against
+        quotes: Saved quote records to reprice (default: every saved quote, streamed)
+        chunk_size: Quotes priced per batch call
+        workers: Process pool size (default: CPU count); 1 prices everything in-process
+
+    Returns:
+        Dictionary with "total" (saved vs repriced recommended totals over all quotes),
+        "by_status", "by_customer" and "by_format" (the same totals per group), and
+        "skipped" (quotes whose snapshots could not be priced)
+    """
+    card = compile_rates(rates)
+    workers = workers or os.cpu_count() or 1
+    skipped = 0
+
+    def rows() -> Iterator[Dict[str, Any]]:
+        nonlocal skipped
+        for quote in (iter_quotes(fields=REPRICE_FIELDS) if quotes is None else quotes):
+            row = _quote_row(quote, card)
+            if row is None:
+                skipped += 1
+            else:
+                yield row
+
+    report: Dict[str, Dict[str, Dict[str, float]]] = {}
+    chunks = _chunks(rows(), chunk_size)
+    # Read a few chunks ahead; only start a pool if the history is long
+    buffered = []
+    for chunk in chunks:
+        buffered.append(chunk)
+        if len(buffered) >= PARALLEL_MIN_CHUNKS:
+            break
+
+    if workers > 1 and len(buffered) >= PARALLEL_MIN_CHUNKS:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = [pool.submit(_reprice_chunk, chunk, card) for chunk in buffered]
+            buffered = []
+            for chunk in chunks:
+                # Keep a bounded number of chunks in flight so reading stays streamed
+                if len(pending) >= workers * 2:
+                    _merge(report, pending.pop(0).result())
+                pending.append(pool.submit(_reprice_chunk, chunk, card))
+            for future in pending:
+                _merge(report, future.result())
+    else:
+        for chunk in chain(buffered, chunks):
+            _merge(report, _reprice_chunk(chunk, card))
+
+    total = _empty_group()
+    for group in report.get("status", {}).values():
+        for name, value in group.items():
+            total[name] += value
+
+    result = {"total": _finish_group(total), "skipped": skipped, "rate_version": card.fingerprint}
+    for dimension in REPORT_DIMENSIONS:
+        groups = report.get(dimension, {})
+        result[f"by_{dimension}"] = {key: _finish_group(group) for key, group in sorted(groups.items())}
+    return result
+
+if __name__ == "__main__":
+    from pricing_logic import load_rate_card
+
+    summary = reprice_quote_history(load_rate_card())
+    total = summary["total"]
+    print(f"Repriced {total['quotes']} quotes ({summary['skipped']} skipped)")
+    print(f"Saved: {total['saved_total']:,}  Repriced: {total['repriced_total']:,}  Delta: {total['delta']:+,}")
+    for dimension in REPORT_DIMENSIONS:
+        print(f"\nBy {dimension}:")
+        for key, group in summary[f"by_{dimension}"].items():
+            print(f"  {key}: {group['quotes']} quotes, delta {group['delta']:+,}")
@@ -0,0 +1,135 @@
+"""
+Monte Carlo risk simulation of quote outcomes for the Lapis Visuals Pricing Calculator.
+
+Each cost line item is sampled between its low and high estimate, the producer
+fee and contingency are applied per draw, and the resulting price distribution
+is summarised as percentiles.
+"""
+
+import hashlib
+import json
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from constants import PRODUCER_FEE_THRESHOLD
+from pricing_logic import RatesLike, compile_rates, compute_quote_cached
+from quote_cache import LRUCache
+
+SIMULATION_DISTRIBUTIONS = ["triangular", "pert", "uniform"]
+
+# Line items derived from the subtotal rather than sampled directly
+DERIVED_LINE_ITEMS = ("Producer Fee", "Contingency")
+
+# Bounded per-process cache of simulation summaries, keyed by input hash
+SIMULATION_CACHE = LRUCache(64)
+
+def _copy_summary(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a summary (including its histogram lists), so callers never share the cached one."""
+    histogram = summary["histogram"]
+    return {**summary, "histogram": {"counts": list(histogram["counts"]), "edges": list(histogram["edges"])}}
+
+def _sample_between(rng: np.random.Generator, low: float, high: float, draws: int,
+                    distribution: str, mode_position: float) -> np.ndarray:
+    """Draw samples in [low, high] from the named distribution."""
+    if high <= low:
+        return np.full(draws, float(low))
+    mode = low + (high - low) * mode_position
+    if distribution == "uniform":
+        return rng.uniform(low, high, draws)
+    if distribution == "triangular":
+        return rng.triangular(low, mode, high, draws)
+    if distribution == "pert":
+        # Beta-PERT: a beta distribution on [low, high] peaked at the mode
+        alpha = 1 + 4 * (mode - low) / (high - low)
+        beta = 1 + 4 * (high - mode) / (high - low)
+        return low + rng.beta(alpha, beta, draws) * (high - low)
+    raise ValueError(f"Unknown distribution: {distribution}")
+
+def _simulation_key(line_items: Dict[str, Dict[str, float]], settings: Dict[str, Any]) -> str:
+    """Hash of everything a simulation result depends on."""
+    payload = json.dumps({"line_items": line_items, "settings": settings}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def simulate_quote(questionnaire: Dict[str, Any], production_vars: Dict[str, Any], rates: RatesLike,
+                   draws: int = 100_000, distribution: str = "triangular",
+                   item_distributions: Optional[Dict[str, str]] = None, mode_position: float = 0.5,
+                   target_confidence: float = 0.9, seed: Optional[int] = 0) -> Dict[str, Any]:
+    """
+    Simulate the final price of a quote when every line item lands somewhere between its low and high.
+
+    Results are cached per input hash, so Streamlit reruns with unchanged inputs
+    do not resimulate. Simulations with seed=None are never cached.
+
+    Args:
+        questionnaire: Dictionary containing questionnaire responses
+        production_vars: Dictionary containing production variables
+        rates: Rates dictionary or CompiledRateCard
+        draws: Number of Monte Carlo draws
+        distribution: Default distribution for every line item (see SIMULATION_DISTRIBUTIONS)
+        item_distributions: Optional per-line-item overrides of the distribution
+        mode_position: Where the most likely value sits between low (0.0) and high (1.0)
+        target_confidence: Share of outcomes the required contingency must cover
+        seed: Seed for the NumPy random generator (None for a fresh, uncached run)
+
+    Returns:
+        Dictionary with p10/p50/p90/mean of the simulated price, the probability of
+        exceeding budget_max (None without a budget), the contingency percent needed
+        for target_confidence, and a histogram of the outcomes
+    """
+    card = compile_rates(rates)
+    result = compute_quote_cached(questionnaire, production_vars, card)
+    sampled_items = {
+        item: values for item, values in result.line_items.items() if item not in DERIVED_LINE_ITEMS
+    }
+    budget_max = questionnaire.get("budget_max") or 0
+    settings = {
+        "draws": draws,
+        "distribution": distribution,
+        "item_distributions": item_distributions or {},
+        "mode_position": mode_position,
+        "target_confidence": target_confidence,
+        "seed": seed,
+        "contingency": production_vars["contingency"],
+        "producer_fee_percent": card.producer_fee_percent,
+        "budget_max": budget_max,
+    }
+
+    key = _simulation_key(sampled_items, settings) if seed is not None else None
+    if key is not None:
+        cached = SIMULATION_CACHE.get(key)
+        if cached is not None:
+            return _copy_summary(cached)
+
+    rng = np.random.default_rng(seed)
+    subtotal = np.zeros(draws)
+    for item, values in sampled_items.items():
+        item_distribution = (item_distributions or {}).get(item, distribution)
+        subtotal += _sample_between(rng, values["low"], values["high"], draws, item_distribution, mode_position)
+
+    producer_fee = np.where(subtotal >= PRODUCER_FEE_THRESHOLD, subtotal * card.producer_fee_percent, 0.0)
+    totals = subtotal + producer_fee + subtotal * (production_vars["contingency"] / 100)
+
+    p10, p50, p90 = np.percentile(totals, [10, 50, 90])
+    # Contingency on the low subtotal that covers target_confidence of simulated subtotals
+    low_subtotal = result.intermediates["low_subtotal"]
+    covered_subtotal = np.quantile(subtotal, target_confidence)
+    required_contingency = max(0.0, covered_subtotal / low_subtotal - 1) * 100 if low_subtotal else 0.0
+    counts, edges = np.histogram(totals, bins=40)
+
+    summary = {
+        "draws": draws,
+        "p10": float(p10),
+        "p50": float(p50),
+        "p90": float(p90),
+        "mean": float(totals.mean()),
+        "budget_max": budget_max,
+        "prob_exceed_budget": float((totals > budget_max).mean()) if budget_max else None,
+        "target_confidence": target_confidence,
+        "required_contingency_percent": float(required_contingency),
+        "histogram": {"counts": counts.tolist(), "edges": edges.tolist()},
+    }
+
+    if key is not None:
+        SIMULATION_CACHE.put(key, _copy_summary(summary))
+    return summary
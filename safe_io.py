@@ -0,0 +1,104 @@
+"""
+Crash- and concurrency-safe file writes for the Lapis Visuals Pricing Calculator.
+
+Several staff run the app at once, each in its own process and threads.
+Writers take an advisory lock on a sidecar "<file>.lock" (fcntl.flock; plus a
+per-process lock for threads), whole-file writes go to a temp file that is
+fsynced and then swapped in with os.replace(), so readers only ever see the
+old or the new complete file. Read-modify-write callers can pass the version
+they read and get VersionConflict if someone saved in between.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of this process are serialized
+    fcntl = None
+
+class VersionConflict(RuntimeError):
+    """Raised when a record changed since the version the caller read."""
+
+_locks: Dict[str, threading.RLock] = {}
+_locks_guard = threading.Lock()
+_held = threading.local()
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock for writing path (re-entrant within a thread).
+
+    Args:
+        path: File being written; the lock is taken on "<path>.lock"
+    """
+    lock_path = os.path.abspath(f"{path}.lock")
+    with _locks_guard:
+        thread_lock = _locks.setdefault(lock_path, threading.RLock())
+    with thread_lock:
+        depth = getattr(_held, "depth", {})
+        _held.depth = depth
+        if depth.get(lock_path):
+            # This thread already holds the file lock; a second flock() would deadlock
+            depth[lock_path] += 1
+            try:
+                yield
+            finally:
+                depth[lock_path] -= 1
+            return
+        directory = os.path.dirname(lock_path)
+        os.makedirs(directory, exist_ok=True)
+        with open(lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            depth[lock_path] = 1
+            try:
+                yield
+            finally:
+                depth[lock_path] = 0
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def fsync_directory(path: str) -> None:
+    """Persist a rename in path's directory (no-op where directories cannot be opened)."""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def atomic_write_bytes(path: str, data: bytes) -> None:
+    """
+    Replace path with data so readers see either the old or the new file, never a partial one.
+
+    Args:
+        path: Destination file
+        data: Complete new contents
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    fsync_directory(path)
+
+def atomic_write_json(path: str, data: Any, **dump_kwargs: Any) -> None:
+    """Atomically replace path with data serialized as JSON (dump_kwargs go to json.dumps)."""
+    atomic_write_bytes(path, json.dumps(data, **dump_kwargs).encode("utf-8"))
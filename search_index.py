@@ -0,0 +1,179 @@
+"""
+In-memory customer search index for the Lapis Visuals Pricing Calculator.
+
+Name, company and email are normalized (accent-folded and case-folded) once
+when a customer is added. Queries of three or more characters are answered from
+a trigram posting index and matched as substrings; shorter queries match word
+prefixes through a sorted token list. Results are ranked: exact field match,
+then field prefix, then word prefix, then any other substring; name matches
+outrank company matches, which outrank email matches.
+"""
+
+import bisect
+import heapq
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+# Searchable fields in ranking priority order
+SEARCH_FIELDS = ("name", "company", "email")
+
+TRIGRAM_SIZE = 3
+
+# Recent query results kept per index (Streamlit reruns repeat the same search)
+RESULT_CACHE_SIZE = 64
+
+_WORD_SPLIT = re.compile(r"[\W_]+")
+
+def normalize_text(text: Any) -> str:
+    """Accent-fold and case-fold text ("José Ñúñez" -> "jose nunez")."""
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold().strip()
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + TRIGRAM_SIZE] for i in range(len(text) - TRIGRAM_SIZE + 1)}
+
+def _tokens(text: str) -> Set[str]:
+    """Words of a normalized field plus the whole field, for prefix lookups."""
+    words = {word for word in _WORD_SPLIT.split(text) if word}
+    if text:
+        words.add(text)
+    return words
+
+class CustomerSearchIndex:
+    """
+    Trigram + sorted-prefix index over customers' name, company and email.
+
+    add() and remove() update the index incrementally; search() never scans
+    every customer.
+    """
+
+    def __init__(self, customers: Iterable[Dict[str, Any]] = ()):
+        self._customers: Dict[str, Dict[str, Any]] = {}  # Insertion ordered
+        self._fields: Dict[str, Tuple[str, ...]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._prefixes: List[Tuple[str, str]] = []  # Sorted (token, customer_id)
+        self._results: "OrderedDict[Tuple[str, Optional[int]], List[str]]" = OrderedDict()
+        # Bulk build: index everything, then sort the prefix list once
+        for customer in customers:
+            self._index(customer, sort=False)
+        self._prefixes.sort()
+
+    def __len__(self) -> int:
+        return len(self._customers)
+
+    def _index(self, customer: Dict[str, Any], sort: bool = True) -> None:
+        customer_id = customer["customer_id"]
+        self.remove(customer_id)
+        fields = tuple(normalize_text(customer.get(field, "")) for field in SEARCH_FIELDS)
+        self._customers[customer_id] = customer
+        self._fields[customer_id] = fields
+        self._results.clear()
+        for trigram in set().union(*(_trigrams(field) for field in fields)):
+            self._postings.setdefault(trigram, set()).add(customer_id)
+        for token in set().union(*(_tokens(field) for field in fields)):
+            if sort:
+                bisect.insort(self._prefixes, (token, customer_id))
+            else:
+                self._prefixes.append((token, customer_id))
+
+    def add(self, customer: Dict[str, Any]) -> None:
+        """Index a customer (replacing any previous version with the same ID)."""
+        self._index(customer)
+
+    def remove(self, customer_id: str) -> bool:
+        """Drop a customer from the index; False if it was not indexed."""
+        fields = self._fields.pop(customer_id, None)
+        if fields is None:
+            return False
+        self._results.clear()
+        del self._customers[customer_id]
+        for trigram in set().union(*(_trigrams(field) for field in fields)):
+            posting = self._postings.get(trigram)
+            if posting is not None:
+                posting.discard(customer_id)
+                if not posting:
+                    del self._postings[trigram]
+        for token in set().union(*(_tokens(field) for field in fields)):
+            i = bisect.bisect_left(self._prefixes, (token, customer_id))
+            if i < len(self._prefixes) and self._prefixes[i] == (token, customer_id):
+                del self._prefixes[i]
+        return True
+
+    def _candidates(self, query: str) -> Set[str]:
+        """Customer IDs that may match query."""
+        if len(query) >= TRIGRAM_SIZE:
+            postings = sorted((self._postings.get(t, set()) for t in _trigrams(query)), key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates &= posting
+                if not candidates:
+                    break
+            return candidates
+        candidates = set()
+        start = bisect.bisect_left(self._prefixes, (query, ""))
+        for token, customer_id in self._prefixes[start:]:
+            if not token.startswith(query):
+                break
+            candidates.add(customer_id)
+        return candidates
+
+    @staticmethod
+    def _rank(fields: Tuple[str, ...], query: str) -> Optional[Tuple[int, int]]:
+        """(match kind, field priority) of the best match, or None."""
+        best = None
+        for priority, field in enumerate(fields):
+            if field == query:
+                kind = 0
+            elif field.startswith(query):
+                kind = 1
+            else:
+                kind = None
+                pos = field.find(query, 1)
+                while pos > 0:
+                    if not field[pos - 1].isalnum():
+                        kind = 2
+                        break
+                    pos = field.find(query, pos + 1)
+                if kind is None:
+                    if len(query) < TRIGRAM_SIZE or query not in field:
+                        continue  # Short queries only match at word starts
+                    kind = 3
+            if best is None or (kind, priority) < best:
+                best = (kind, priority)
+        return best
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return customers matching query, best match first.
+
+        Args:
+            query: Free text matched against name, company and email
+            limit: Maximum number of results (None for all)
+
+        Returns:
+            Customer records; an empty query returns every customer in insertion order
+        """
+        query = normalize_text(query)
+        if not query:
+            customers = list(self._customers.values())
+            return customers if limit is None else customers[:limit]
+
+        key = (query, limit)
+        ids = self._results.get(key)
+        if ids is None:
+            scored = []
+            for customer_id in self._candidates(query):
+                fields = self._fields[customer_id]
+                rank = self._rank(fields, query)
+                if rank is not None:
+                    scored.append((rank, fields[0], customer_id))
+            best = heapq.nsmallest(limit, scored) if limit is not None else sorted(scored)
+            ids = [customer_id for _, _, customer_id in best]
+            self._results[key] = ids
+            while len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        else:
+            self._results.move_to_end(key)
+        return [self._customers[customer_id] for customer_id in ids]
@@ -0,0 +1,860 @@
+"""
+Pluggable storage backends for quotes and customers in the Lapis Visuals Pricing Calculator.
+
+quote_utils and customer_utils talk to a QuoteStore and a CustomerStore. Two
+backends exist:
+
+- "json": quotes in the append-only journal (data/quotes.jsonl, importing the
+  legacy data/quotes.json once) and customers in customers.json.
+- "sqlite": both in one SQLite database (WAL mode) with indexes on the lookup
+  columns, served from a per-process connection pool.
+
+Quotes and customers carry a "version" that every write increments; writers
+that pass the version they read (expected_version) get VersionConflict instead
+of silently overwriting someone else's change.
+
+The backend is chosen by STORAGE_BACKEND in constants.py, or the
+LAPIS_STORAGE_BACKEND environment variable. Existing JSON data is copied into
+SQLite with migrate_json_to_sqlite() (or `python storage.py migrate`).
+"""
+
+import heapq
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from constants import STORAGE_BACKEND, QUOTE_PAGE_SIZE
+from quote_journal import QuoteJournal, QUOTES_LOG
+from safe_io import VersionConflict, atomic_write_json, file_lock
+from search_index import CustomerSearchIndex
+
+# Legacy single-document quote store; imported into the journal the first time it is opened
+QUOTES_FILE = "data/quotes.json"
+CUSTOMERS_FILE = "customers.json"
+SQLITE_PATH = "data/lapis.db"
+
+STORAGE_BACKEND_ENV = "LAPIS_STORAGE_BACKEND"
+STORAGE_BACKENDS = ["json", "sqlite"]
+
+SQLITE_POOL_SIZE = 4
+# Prepared statements kept per connection (sqlite3's statement cache)
+SQLITE_STATEMENT_CACHE = 64
+# Rows fetched per query while streaming quotes (the connection is returned between pages)
+SQLITE_PAGE_SIZE = 1000
+# The -> operator (SQLite 3.38+) lets projections skip decoding unused fields in Python
+SQLITE_JSON_ARROW = sqlite3.sqlite_version_info >= (3, 38, 0)
+
+def _dumps(record: Dict[str, Any]) -> str:
+    """Serialize a record the way the JSON files do (datetimes become strings)."""
+    return json.dumps(record, default=str)
+
+# Sort keys accepted by QuoteStore.query_quotes(); quote_id breaks ties
+QUOTE_SORT_KEYS = {
+    "creation_date": lambda quote: str(quote.get("creation_date") or ""),
+    "status": lambda quote: quote.get("status") or "",
+    "amount": lambda quote: quote.get("recommended_quote") or 0,
+}
+
+def project(record: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Copy of record with only fields (missing ones as None), or a full copy if fields is None."""
+    if fields is None:
+        return dict(record)
+    return {field: record.get(field) for field in fields}
+
+def iter_json_records(path: str, chunk_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the elements of a JSON array file one record at a time.
+
+    The file is read in chunks and each element is decoded as soon as it is
+    complete, so memory stays bounded by the largest single record.
+    """
+    if not os.path.exists(path):
+        return
+    decoder = json.JSONDecoder()
+    with open(path, "r") as f:
+        buffer = ""
+        started = False
+        eof = False
+        while True:
+            pos = 0
+            while True:
+                # Skip whitespace and separators between records
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if pos == len(buffer):
+                    break
+                if not started:
+                    if buffer[pos] != "[":
+                        raise ValueError(f"{path} does not contain a JSON array")
+                    started = True
+                    pos += 1
+                    continue
+                if buffer[pos] == "]":
+                    return
+                try:
+                    record, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    break  # Record continues in the next chunk
+                yield record
+            buffer = buffer[pos:]
+            if eof:
+                return
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+
+class QuoteStore:
+    """Interface of a quote backend. Records are plain dicts keyed by quote_id."""
+
+    def list_quotes(self, where: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Dict[str, Any]]:
+        """Return every quote (optionally only those matching where) in creation order."""
+        raise NotImplementedError
+
+    def iter_quotes(self, where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                    fields: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield quotes in creation order, one at a time.
+
+        Args:
+            where: Predicate on each record as it would be yielded (after projection)
+            fields: Only return these fields (None for missing ones); None for whole records
+        """
+        for quote in self.list_quotes():
+            record = project(quote, fields)
+            if where is None or where(record):
+                yield record
+
+    def iter_quotes_matching(self, customer_id: Optional[str] = None, statuses: Optional[Sequence[str]] = None,
+                             fields: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the quotes of a customer (None for all) in the given statuses (None for all), in creation order.
+
+        Unlike iter_quotes(where=...), the filters are applied by the backend
+        (customer index, SQL WHERE) before any record is decoded or copied.
+        """
+        allowed = set(statuses) if statuses is not None else None
+        source = self.quotes_by_customer(customer_id) if customer_id is not None else self.iter_quotes()
+        for quote in source:
+            if allowed is None or quote.get("status") in allowed:
+                yield project(quote, fields)
+
+    def query_quotes(self, customer_id: Optional[str] = None, statuses: Optional[Sequence[str]] = None,
+                     sort: str = "creation_date", descending: bool = True, limit: int = QUOTE_PAGE_SIZE,
+                     offset: int = 0, cursor: Optional[str] = None,
+                     fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """
+        Return one sorted page of quotes.
+
+        Args:
+            customer_id: Only this customer's quotes (None for all)
+            statuses: Only quotes in these statuses (None for all)
+            sort: Key from QUOTE_SORT_KEYS (ties are ordered by quote_id)
+            descending: Largest / newest first
+            limit: Page size
+            offset: Rows to skip (after the cursor, if one is given)
+            cursor: next_cursor of the previous page, for keyset pagination
+            fields: Only return these fields; None for whole records
+
+        Returns:
+            Dictionary with "quotes" (the page), "total" (quotes matching the
+            filters) and "next_cursor" (None on the last page)
+        """
+        if sort not in QUOTE_SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        sort_value = QUOTE_SORT_KEYS[sort]
+        allowed = set(statuses) if statuses is not None else None
+        source = self.quotes_by_customer(customer_id) if customer_id is not None else self.iter_quotes()
+        keyed = [
+            ((sort_value(quote), quote["quote_id"]), quote) for quote in source
+            if allowed is None or quote.get("status") in allowed
+        ]
+        total = len(keyed)
+        if cursor is not None:
+            after = tuple(json.loads(cursor))
+            keyed = [item for item in keyed if (item[0] < after if descending else item[0] > after)]
+        # Only the requested page is ordered, not every match
+        select = heapq.nlargest if descending else heapq.nsmallest
+        page = select(offset + limit + 1, keyed, key=lambda item: item[0])[offset:]
+        more = len(page) > limit
+        page = page[:limit]
+        return {
+            "quotes": [project(quote, fields) for _, quote in page],
+            "total": total,
+            "next_cursor": json.dumps(list(page[-1][0])) if more else None,
+        }
+
+    def get_quote(self, quote_id: str) -> Optional[Dict[str, Any]]:
+        """Return one quote, or None."""
+        raise NotImplementedError
+
+    def quotes_by_customer(self, customer_id: str) -> List[Dict[str, Any]]:
+        """Return a customer's quotes in creation order."""
+        return self.list_quotes(where=lambda quote: quote.get("customer_id") == customer_id)
+
+    def create_quote(self, quote: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a new quote and return it as stored."""
+        raise NotImplementedError
+
+    def patch_quote(self, quote_id: str, changes: Dict[str, Any], expected_version: Optional[int] = None) -> bool:
+        """
+        Overwrite fields of a quote; False if it does not exist.
+
+        Raises VersionConflict if expected_version is given and the stored version differs.
+        """
+        raise NotImplementedError
+
+    def replace_all(self, quotes: Iterable[Dict[str, Any]]) -> None:
+        """Replace every stored quote."""
+        raise NotImplementedError
+
+    def data_version(self) -> Any:
+        """Token that changes whenever the stored quotes change."""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend counters for monitoring."""
+        return {}
+
+class CustomerStore:
+    """
+    Interface of a customer backend. Records are plain dicts keyed by customer_id.
+
+    Searches are served from an in-memory CustomerSearchIndex that is built on the
+    first search, updated in place by this store's own writes, and rebuilt when
+    data_version() shows that someone else changed the data.
+    """
+
+    def __init__(self):
+        self._index: Optional[CustomerSearchIndex] = None
+        self._index_version: Any = None
+        self._index_lock = threading.RLock()
+        self.index_rebuilds = 0
+
+    def data_version(self) -> Any:
+        """Token that changes whenever the stored customers change."""
+        raise NotImplementedError
+
+    def list_customers(self) -> List[Dict[str, Any]]:
+        """Return every customer in insertion order."""
+        raise NotImplementedError
+
+    def get_customer(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        """Return one customer, or None."""
+        raise NotImplementedError
+
+    def save_customer(self, customer: Dict[str, Any], expected_version: Optional[int] = None) -> bool:
+        """
+        Insert or replace a customer, storing it with its version incremented.
+
+        Raises VersionConflict if expected_version is given and the stored version
+        (0 for a new customer) differs.
+        """
+        raise NotImplementedError
+
+    def delete_customer(self, customer_id: str) -> bool:
+        """Delete a customer; False if it did not exist."""
+        raise NotImplementedError
+
+    @staticmethod
+    def _next_version(customer: Dict[str, Any], existing: Optional[Dict[str, Any]],
+                      expected_version: Optional[int]) -> Dict[str, Any]:
+        """Check expected_version against the stored record and return customer with its new version."""
+        current = existing.get("version", 0) if existing else 0
+        if expected_version is not None and current != expected_version:
+            raise VersionConflict(
+                f"Customer {customer['customer_id']} is at version {current}, expected {expected_version}"
+            )
+        return dict(customer, version=current + 1)
+
+    def search_customers(self, query: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Customers matching query in name, company or email, best match first (see search_index)."""
+        with self._index_lock:
+            version = self.data_version()
+            if self._index is None or version != self._index_version:
+                self._index, self._index_version = CustomerSearchIndex(self.list_customers()), version
+                self.index_rebuilds += 1
+            return [dict(customer) for customer in self._index.search(query, limit)]
+
+    @contextmanager
+    def _indexed_write(self, transactional: bool = False) -> Iterator[Callable[..., None]]:
+        """
+        Wrap a write so the search index follows it.
+
+        Yields a function taking the in-place index update. By default the caller
+        holds a lock that excludes other writers, and the index is dropped instead
+        if the data changed underneath it before the write. A transactional write
+        also passes the (before, after) data versions it read inside its own
+        transaction; the index is then patched only if it was built at before and
+        the write was the single change since (after == before + 1).
+        """
+        with self._index_lock:
+            fresh = not transactional and self._index is not None and self.data_version() == self._index_version
+            updates = []
+            yield lambda update, versions=None: updates.append((update, versions))
+            version = None
+            for update, versions in updates:
+                if versions is not None:
+                    before, version = versions
+                    fresh = self._index is not None and before == self._index_version and version == before + 1
+                if not fresh:
+                    break
+                update(self._index)
+            if fresh:
+                self._index_version = self.data_version() if version is None else version
+            else:
+                self._index = None
+
+    def replace_all(self, customers: Iterable[Dict[str, Any]]) -> None:
+        """Replace every stored customer."""
+        raise NotImplementedError
+
+# --- JSON backend ---
+
+class JsonQuoteStore(QuoteStore):
+    """Quotes in the append-only journal; the legacy JSON file is imported on first use."""
+
+    def __init__(self, log_path: str = QUOTES_LOG, legacy_path: str = QUOTES_FILE):
+        self.journal = QuoteJournal(log_path)
+        self.legacy_path = legacy_path
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _journal(self) -> QuoteJournal:
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    if not os.path.exists(self.journal.path) and os.path.exists(self.legacy_path):
+                        self.journal.rewrite(iter_json_records(self.legacy_path))
+                    self._ready = True
+        return self.journal
+
+    def list_quotes(self, where=None):
+        return self._journal().quotes(where=where)
+
+    def iter_quotes(self, where=None, fields=None):
+        return self._journal().iter_quotes(where=where, fields=fields)
+
+    def get_quote(self, quote_id):
+        return self._journal().get(quote_id)
+
+    def quotes_by_customer(self, customer_id):
+        return self._journal().customer_quotes(customer_id)
+
+    def create_quote(self, quote):
+        return self._journal().create(quote)
+
+    def patch_quote(self, quote_id, changes, expected_version=None):
+        return self._journal().patch(quote_id, changes, expected_version)
+
+    def replace_all(self, quotes):
+        self._journal().rewrite(quotes)
+
+    def data_version(self):
+        return self._journal().version()
+
+    def stats(self):
+        return self._journal().stats()
+
+class JsonCustomerStore(CustomerStore):
+    """
+    Customers in a single {"customers": [...]} JSON document, rewritten on every save.
+
+    Writes hold the file's advisory lock across the read-modify-write and
+    replace the document atomically.
+    """
+
+    def __init__(self, path: str = CUSTOMERS_FILE):
+        super().__init__()
+        self.path = path
+
+    def data_version(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _load(self, strict: bool = False) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            # Create a new file with empty customers array
+            self.replace_all([])
+            return []
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f).get("customers", [])
+        except json.JSONDecodeError:
+            if strict:
+                # Never let a write replace an unreadable file with a near-empty one
+                raise
+            return []
+
+    def list_customers(self):
+        return self._load()
+
+    def get_customer(self, customer_id):
+        for customer in self._load():
+            if customer["customer_id"] == customer_id:
+                return customer
+        return None
+
+    def save_customer(self, customer, expected_version=None):
+        # File lock first: the index freshness check must not race other processes' writes
+        with file_lock(self.path), self._indexed_write() as update_index:
+            customers = self._load(strict=True)
+            for i, existing in enumerate(customers):
+                if existing["customer_id"] == customer["customer_id"]:
+                    customers[i] = stored = self._next_version(customer, existing, expected_version)
+                    break
+            else:
+                stored = self._next_version(customer, None, expected_version)
+                customers.append(stored)
+            self._write(customers)
+            update_index(lambda index: index.add(dict(stored)))
+        return True
+
+    def delete_customer(self, customer_id):
+        with file_lock(self.path), self._indexed_write() as update_index:
+            customers = self._load(strict=True)
+            remaining = [c for c in customers if c["customer_id"] != customer_id]
+            self._write(remaining)
+            update_index(lambda index: index.remove(customer_id))
+        return len(remaining) < len(customers)
+
+    def _write(self, customers):
+        atomic_write_json(self.path, {"customers": list(customers)}, indent=2)
+
+    def replace_all(self, customers):
+        with file_lock(self.path), self._index_lock:
+            self._write(customers)
+            self._index = None
+
+# --- SQLite backend ---
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    quote_id TEXT NOT NULL UNIQUE,
+    customer_id TEXT,
+    status TEXT,
+    creation_date TEXT,
+    last_updated_date TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_quotes_customer ON quotes (customer_id, seq);
+CREATE INDEX IF NOT EXISTS idx_quotes_status ON quotes (status);
+CREATE INDEX IF NOT EXISTS idx_quotes_creation_date ON quotes (creation_date);
+CREATE INDEX IF NOT EXISTS idx_quotes_customer_sort_created ON quotes (customer_id, IFNULL(creation_date, ''), quote_id);
+CREATE INDEX IF NOT EXISTS idx_quotes_customer_sort_status ON quotes (customer_id, IFNULL(status, ''), quote_id);
+CREATE INDEX IF NOT EXISTS idx_quotes_customer_sort_amount
+    ON quotes (customer_id, IFNULL(json_extract(data, '$.recommended_quote'), 0), quote_id);
+CREATE INDEX IF NOT EXISTS idx_quotes_sort_created ON quotes (IFNULL(creation_date, ''), quote_id);
+CREATE INDEX IF NOT EXISTS idx_quotes_sort_amount ON quotes (IFNULL(json_extract(data, '$.recommended_quote'), 0), quote_id);
+CREATE TABLE IF NOT EXISTS customers (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    customer_id TEXT NOT NULL UNIQUE,
+    name TEXT,
+    email TEXT,
+    company TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('customers_version', 0);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('quotes_version', 0);
+CREATE TRIGGER IF NOT EXISTS customers_version_insert AFTER INSERT ON customers
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'customers_version'; END;
+CREATE TRIGGER IF NOT EXISTS customers_version_update AFTER UPDATE ON customers
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'customers_version'; END;
+CREATE TRIGGER IF NOT EXISTS customers_version_delete AFTER DELETE ON customers
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'customers_version'; END;
+CREATE TRIGGER IF NOT EXISTS quotes_version_insert AFTER INSERT ON quotes
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'quotes_version'; END;
+CREATE TRIGGER IF NOT EXISTS quotes_version_update AFTER UPDATE ON quotes
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'quotes_version'; END;
+CREATE TRIGGER IF NOT EXISTS quotes_version_delete AFTER DELETE ON quotes
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'quotes_version'; END;
+"""
+
+# Statements are module constants so every call hits the per-connection statement cache
+SQL_SELECT_QUOTES = "SELECT data FROM quotes ORDER BY seq"
+SQL_SELECT_QUOTES_PAGE = "SELECT seq, {columns} FROM quotes WHERE {filters}seq > ? ORDER BY seq LIMIT ?"
+# Sort expressions of query_quotes(); they match the expression indexes in SQLITE_SCHEMA exactly
+SQL_QUOTE_SORT_EXPRESSIONS = {
+    "creation_date": "IFNULL(creation_date, '')",
+    "status": "IFNULL(status, '')",
+    "amount": "IFNULL(json_extract(data, '$.recommended_quote'), 0)",
+}
+SQL_SELECT_QUOTE = "SELECT data FROM quotes WHERE quote_id = ?"
+SQL_SELECT_CUSTOMER_QUOTES = "SELECT data FROM quotes WHERE customer_id = ? ORDER BY seq"
+SQL_UPSERT_QUOTE = (
+    "INSERT INTO quotes (quote_id, customer_id, status, creation_date, last_updated_date, data) "
+    "VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (quote_id) DO UPDATE SET customer_id = excluded.customer_id, status = excluded.status, "
+    "creation_date = excluded.creation_date, last_updated_date = excluded.last_updated_date, data = excluded.data"
+)
+SQL_UPDATE_QUOTE = (
+    "UPDATE quotes SET customer_id = ?, status = ?, creation_date = ?, last_updated_date = ?, data = ? "
+    "WHERE quote_id = ?"
+)
+SQL_DELETE_QUOTES = "DELETE FROM quotes"
+SQL_SELECT_CUSTOMERS = "SELECT data FROM customers ORDER BY seq"
+SQL_SELECT_CUSTOMER = "SELECT data FROM customers WHERE customer_id = ?"
+SQL_CUSTOMERS_VERSION = "SELECT value FROM meta WHERE key = 'customers_version'"
+SQL_QUOTES_VERSION = "SELECT value FROM meta WHERE key = 'quotes_version'"
+SQL_UPSERT_CUSTOMER = (
+    "INSERT INTO customers (customer_id, name, email, company, data) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (customer_id) DO UPDATE SET name = excluded.name, email = excluded.email, "
+    "company = excluded.company, data = excluded.data"
+)
+SQL_DELETE_CUSTOMER = "DELETE FROM customers WHERE customer_id = ?"
+SQL_DELETE_CUSTOMERS = "DELETE FROM customers"
+
+def _quote_row(quote: Dict[str, Any]) -> tuple:
+    """Indexed columns plus the JSON document for one quote (version 1 unless it has one)."""
+    data = _dumps(quote if "version" in quote else dict(quote, version=1))
+    stored = json.loads(data)
+    return (
+        stored["quote_id"], stored.get("customer_id"), stored.get("status"),
+        stored.get("creation_date"), stored.get("last_updated_date"), data
+    )
+
+def _json_path(field: str) -> str:
+    """JSON path of a top-level key, quoted so any key name works."""
+    return '$."' + field.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+@lru_cache(maxsize=SQLITE_STATEMENT_CACHE)
+def _quote_columns(fields: Optional[Tuple[str, ...]]) -> Tuple[str, Tuple[str, ...]]:
+    """Result column (and its parameters) returning whole documents or only fields."""
+    if fields is None or not SQLITE_JSON_ARROW:
+        return "data", ()
+    columns = "json_object(" + ", ".join("?, data -> ?" for _ in fields) + ")"
+    return columns, tuple(value for field in fields for value in (field, _json_path(field)))
+
+def _quote_page_query(fields: Optional[Tuple[str, ...]], filters: Sequence[str] = ()) -> Tuple[str, Tuple[str, ...]]:
+    """Paged quote query (and its leading parameters) returning whole documents or only fields."""
+    columns, params = _quote_columns(fields)
+    return SQL_SELECT_QUOTES_PAGE.format(columns=columns, filters="".join(f"{f} AND " for f in filters)), params
+
+def _quote_filters(customer_id: Optional[str], statuses: Optional[Sequence[str]]) -> Tuple[List[str], List[Any]]:
+    """WHERE conditions (and their parameters) selecting a customer's quotes in some statuses."""
+    filters, params = [], []
+    if customer_id is not None:
+        filters.append("customer_id = ?")
+        params.append(customer_id)
+    if statuses is not None:
+        filters.append(f"status IN ({', '.join('?' for _ in statuses)})" if statuses else "0")
+        params.extend(statuses)
+    return filters, params
+
+def _customer_row(customer: Dict[str, Any]) -> tuple:
+    """Indexed columns plus the JSON document for one customer."""
+    return (
+        customer["customer_id"], customer.get("name", ""), customer.get("email", ""),
+        customer.get("company", ""), _dumps(customer)
+    )
+
+class SqliteDatabase:
+    """
+    One SQLite database file with a bounded pool of reusable connections.
+
+    Connections are opened in WAL mode (readers never block the writer) with
+    autocommit off by default; writes run inside transaction().
+    """
+
+    def __init__(self, path: str = SQLITE_PATH, pool_size: int = SQLITE_POOL_SIZE):
+        self.path = path
+        self.pool_size = pool_size
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.connection() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,  # Pooled connections move between Streamlit threads
+            isolation_level=None,
+            cached_statements=SQLITE_STATEMENT_CACHE,
+            timeout=30
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection (waiting if all pool_size are in use)."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.pool_size
+                if can_open:
+                    self._opened += 1
+            conn = self._connect() if can_open else self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection inside BEGIN IMMEDIATE ... COMMIT (rolled back on error)."""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self) -> None:
+        """Close every idle pooled connection."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._opened -= 1
+
+class SqliteQuoteStore(QuoteStore):
+    """Quotes as JSON documents in SQLite with indexed quote_id, customer_id, status and creation_date."""
+
+    def __init__(self, database: SqliteDatabase):
+        self.database = database
+
+    def list_quotes(self, where=None):
+        with self.database.connection() as conn:
+            quotes = [json.loads(data) for (data,) in conn.execute(SQL_SELECT_QUOTES)]
+        return quotes if where is None else [quote for quote in quotes if where(quote)]
+
+    def iter_quotes(self, where=None, fields=None):
+        return self._iter_pages(where, fields)
+
+    def iter_quotes_matching(self, customer_id=None, statuses=None, fields=None):
+        return self._iter_pages(None, fields, *_quote_filters(customer_id, statuses))
+
+    def _iter_pages(self, where, fields, filters=(), filter_params=()):
+        # Keyset pages: no connection or read snapshot is held while the caller consumes rows
+        fields = tuple(fields) if fields is not None else None
+        sql, params = _quote_page_query(fields, filters)
+        last_seq = 0
+        while True:
+            with self.database.connection() as conn:
+                rows = conn.execute(sql, (*params, *filter_params, last_seq, SQLITE_PAGE_SIZE)).fetchall()
+            for last_seq, data in rows:
+                record = json.loads(data)
+                if fields is not None and not params:
+                    record = project(record, fields)
+                if where is None or where(record):
+                    yield record
+            if len(rows) < SQLITE_PAGE_SIZE:
+                return
+
+    def query_quotes(self, customer_id=None, statuses=None, sort="creation_date", descending=True,
+                     limit=QUOTE_PAGE_SIZE, offset=0, cursor=None, fields=None):
+        if sort not in SQL_QUOTE_SORT_EXPRESSIONS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        expression = SQL_QUOTE_SORT_EXPRESSIONS[sort]
+        direction = "DESC" if descending else "ASC"
+        filters, params = _quote_filters(customer_id, statuses)
+        count_sql = "SELECT COUNT(*) FROM quotes" + (" WHERE " + " AND ".join(filters) if filters else "")
+        if cursor is not None:
+            # Keyset pagination: continue strictly after the last row of the previous page
+            filters.append(f"({expression}, quote_id) {'<' if descending else '>'} (?, ?)")
+            params.extend(json.loads(cursor))
+        columns, column_params = _quote_columns(tuple(fields) if fields is not None else None)
+        page_sql = (
+            f"SELECT {expression}, quote_id, {columns} FROM quotes"
+            + (" WHERE " + " AND ".join(filters) if filters else "")
+            + f" ORDER BY {expression} {direction}, quote_id {direction} LIMIT ? OFFSET ?"
+        )
+        count_params = params[:len(params) - (2 if cursor is not None else 0)]
+        with self.database.connection() as conn:
+            total = conn.execute(count_sql, count_params).fetchone()[0]
+            rows = conn.execute(page_sql, (*column_params, *params, limit + 1, offset)).fetchall()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        quotes = [json.loads(data) for _, _, data in rows]
+        if fields is not None and not column_params:
+            quotes = [project(quote, fields) for quote in quotes]
+        return {
+            "quotes": quotes,
+            "total": total,
+            "next_cursor": json.dumps(list(rows[-1][:2])) if more else None,
+        }
+
+    def get_quote(self, quote_id):
+        with self.database.connection() as conn:
+            row = conn.execute(SQL_SELECT_QUOTE, (quote_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def quotes_by_customer(self, customer_id):
+        with self.database.connection() as conn:
+            return [json.loads(data) for (data,) in conn.execute(SQL_SELECT_CUSTOMER_QUOTES, (customer_id,))]
+
+    def create_quote(self, quote):
+        row = _quote_row(quote)
+        with self.database.transaction() as conn:
+            conn.execute(SQL_UPSERT_QUOTE, row)
+        return json.loads(row[-1])
+
+    def patch_quote(self, quote_id, changes, expected_version=None):
+        with self.database.transaction() as conn:
+            row = conn.execute(SQL_SELECT_QUOTE, (quote_id,)).fetchone()
+            if row is None:
+                return False
+            quote = json.loads(row[0])
+            current = quote.get("version", 1)
+            if expected_version is not None and current != expected_version:
+                raise VersionConflict(f"Quote {quote_id} is at version {current}, expected {expected_version}")
+            quote.update(changes)
+            quote["version"] = current + 1
+            quote_id, *columns = _quote_row(quote)
+            conn.execute(SQL_UPDATE_QUOTE, (*columns, quote_id))
+        return True
+
+    def data_version(self):
+        # Bumped by triggers on every insert, update and delete, from any process
+        with self.database.connection() as conn:
+            return conn.execute(SQL_QUOTES_VERSION).fetchone()[0]
+
+    def replace_all(self, quotes):
+        with self.database.transaction() as conn:
+            conn.execute(SQL_DELETE_QUOTES)
+            conn.executemany(SQL_UPSERT_QUOTE, (_quote_row(quote) for quote in quotes))
+
+class SqliteCustomerStore(CustomerStore):
+    """Customers as JSON documents in SQLite keyed by customer_id."""
+
+    def __init__(self, database: SqliteDatabase):
+        super().__init__()
+        self.database = database
+
+    def data_version(self):
+        # Bumped by triggers on every insert, update and delete, from any process
+        with self.database.connection() as conn:
+            return conn.execute(SQL_CUSTOMERS_VERSION).fetchone()[0]
+
+    def list_customers(self):
+        with self.database.connection() as conn:
+            return [json.loads(data) for (data,) in conn.execute(SQL_SELECT_CUSTOMERS)]
+
+    def get_customer(self, customer_id):
+        with self.database.connection() as conn:
+            row = conn.execute(SQL_SELECT_CUSTOMER, (customer_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_customer(self, customer, expected_version=None):
+        # Versions are read on the write's own transaction, so other processes' writes can't slip in between
+        with self._indexed_write(transactional=True) as update_index:
+            with self.database.transaction() as conn:
+                before = conn.execute(SQL_CUSTOMERS_VERSION).fetchone()[0]
+                existing = conn.execute(SQL_SELECT_CUSTOMER, (customer["customer_id"],)).fetchone()
+                stored = self._next_version(customer, json.loads(existing[0]) if existing else None, expected_version)
+                row = _customer_row(stored)
+                conn.execute(SQL_UPSERT_CUSTOMER, row)
+                after = conn.execute(SQL_CUSTOMERS_VERSION).fetchone()[0]
+            update_index(lambda index: index.add(json.loads(row[-1])), (before, after))
+        return True
+
+    def delete_customer(self, customer_id):
+        with self._indexed_write(transactional=True) as update_index:
+            with self.database.transaction() as conn:
+                before = conn.execute(SQL_CUSTOMERS_VERSION).fetchone()[0]
+                deleted = conn.execute(SQL_DELETE_CUSTOMER, (customer_id,)).rowcount
+                after = conn.execute(SQL_CUSTOMERS_VERSION).fetchone()[0]
+            update_index(lambda index: index.remove(customer_id), (before, after))
+        return deleted > 0
+
+    def replace_all(self, customers):
+        with self._index_lock:
+            with self.database.transaction() as conn:
+                conn.execute(SQL_DELETE_CUSTOMERS)
+                conn.executemany(SQL_UPSERT_CUSTOMER, (_customer_row(customer) for customer in customers))
+            self._index = None
+
+# --- Backend selection ---
+
+_stores: Dict[str, Any] = {}
+_stores_lock = threading.Lock()
+
+def storage_backend() -> str:
+    """Name of the configured backend (environment variable, else constants.STORAGE_BACKEND)."""
+    backend = os.environ.get(STORAGE_BACKEND_ENV, STORAGE_BACKEND)
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return backend
+
+def _store(kind: str):
+    backend = storage_backend()
+    key = f"{backend}:{kind}"
+    if key not in _stores:
+        with _stores_lock:
+            if key not in _stores:
+                if backend == "sqlite":
+                    database = _stores.get("sqlite:database") or SqliteDatabase(SQLITE_PATH)
+                    _stores["sqlite:database"] = database
+                    store = SqliteQuoteStore(database) if kind == "quotes" else SqliteCustomerStore(database)
+                else:
+                    store = JsonQuoteStore() if kind == "quotes" else JsonCustomerStore()
+                _stores[key] = store
+    return _stores[key]
+
+def get_quote_store() -> QuoteStore:
+    """Shared quote store of the configured backend."""
+    return _store("quotes")
+
+def get_customer_store() -> CustomerStore:
+    """Shared customer store of the configured backend."""
+    return _store("customers")
+
+def migrate_json_to_sqlite(db_path: str = SQLITE_PATH, quotes_log: str = QUOTES_LOG,
+                           quotes_file: str = QUOTES_FILE, customers_file: str = CUSTOMERS_FILE) -> Dict[str, int]:
+    """
+    Copy every quote and customer from the JSON backend into a SQLite database.
+
+    Existing rows with the same IDs are replaced, so the migration can be re-run.
+
+    Args:
+        db_path: SQLite database to create or update
+        quotes_log: Quote journal to read (the legacy quotes file is used if it does not exist)
+        quotes_file: Legacy JSON quotes file
+        customers_file: JSON customers file
+
+    Returns:
+        Dictionary with the number of quotes and customers copied
+    """
+    source_quotes = JsonQuoteStore(quotes_log, quotes_file)
+    customers = JsonCustomerStore(customers_file).list_customers() if os.path.exists(customers_file) else []
+    database = SqliteDatabase(db_path)
+    try:
+        quotes = source_quotes.list_quotes()
+        with database.transaction() as conn:
+            conn.executemany(SQL_UPSERT_QUOTE, (_quote_row(quote) for quote in quotes))
+            conn.executemany(SQL_UPSERT_CUSTOMER, (_customer_row(customer) for customer in customers))
+    finally:
+        database.close()
+    return {"quotes": len(quotes), "customers": len(customers)}
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ["migrate"]:
+        counts = migrate_json_to_sqlite()
+        print(f"Copied {counts['quotes']} quotes and {counts['customers']} customers into {SQLITE_PATH}")
+        print(f"Set STORAGE_BACKEND = \"sqlite\" in constants.py (or {STORAGE_BACKEND_ENV}=sqlite) to use it.")
+    else:
+        print("Usage: python storage.py migrate")
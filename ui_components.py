@@ -4,12 +4,43 @@ Reusable UI components for the Lapis Visuals Pricing Calculator.
 
 import streamlit as st
 import pandas as pd
+import altair as alt
+import time
+import os
+import tempfile
 from typing import Dict, List, Any, Tuple, Callable
 from datetime import datetime
 import pytz # Import pytz for timezone handling
 
 # Import quote utils for status update
-from quote_utils import update_quote_status
+from quote_utils import update_quote_status, query_quotes
+from pricing_logic import sweep_price_surface
+from risk_simulation import simulate_quote, SIMULATION_DISTRIBUTIONS
+from budget_solver import find_configurations
+from export_cache import EXPORT_FORMATS, export_file_name
+from batch_export import BATCH_FORMATS, batch_export, count_quotes, select_quotes
+from money import UNIT_CHOICES, format_rupiah, format_rupiah_array
+from constants import CURRENCY_DISPLAY_UNIT, CUSTOMER_SEARCH_LIMIT, QUOTE_PAGE_SIZE, QUOTE_STATUSES, FINAL_QUOTE_STATUSES, VIDEO_FORMATS
+
+# Sidebar labels of the money display units (see money.MONEY_UNITS)
+CURRENCY_UNIT_LABELS = {
+    "Rp": "Rupiah (Rp 12.500.000)",
+    "jt": "Juta (Rp 12,5 jt)",
+    "M": "Miliar (Rp 1,2 M)",
+    "auto": "Automatic (Rp / jt / M)"
+}
+
+# Display labels for fields that can be swept in the price surface panel
+SWEEP_FIELD_LABELS = {
+    "shooting_days": "Shooting Days",
+    "crew_size": "Crew Size",
+    "location": "Location Type",
+    "talent_count": "Talent Count",
+    "agency_markup": "Agency Markup",
+    "props_design": "Props & Set Design",
+    "footage_volume": "Footage Volume",
+    "contingency": "Contingency %"
+}
 
 def render_header(title: str, subheader: str = None):
     """Render a consistent header."""
@@ -26,6 +57,10 @@ def render_sidebar_user_role() -> str:
         "Select Role:",
         ["Account Manager", "Producer / PM", "Finance", "Client"]
     )
+    st.sidebar.selectbox(
+        "Amounts shown in:", UNIT_CHOICES, format_func=CURRENCY_UNIT_LABELS.get,
+        index=UNIT_CHOICES.index(CURRENCY_DISPLAY_UNIT), key="currency_unit"
+    )
     st.sidebar.markdown("---")
     st.sidebar.info(f"Version: 1.0.0 | User: {user_role}")
     return user_role
@@ -33,22 +68,29 @@ def render_sidebar_user_role() -> str:
 def render_sidebar_quote_summary(low_quote: int, high_quote: int, recommended: int, mini_items: Dict[str, Dict[str, float]]):
     """Render the quote summary in the sidebar."""
     st.sidebar.markdown("## Quote Summary")
-    st.sidebar.metric("Low Estimate", f"Rp {low_quote:,.0f}".replace(",", "."))
-    st.sidebar.metric("Recommended", f"Rp {recommended:,.0f}".replace(",", "."))
-    st.sidebar.metric("High Estimate", f"Rp {high_quote:,.0f}".replace(",", "."))
+    st.sidebar.metric("Low Estimate", format_currency(low_quote))
+    st.sidebar.metric("Recommended", format_currency(recommended))
+    st.sidebar.metric("High Estimate", format_currency(high_quote))
     st.sidebar.markdown("---")
     st.sidebar.markdown("**Mini Breakdown**")
     
     # Convert items to DataFrame for display
     mini_df = pd.DataFrame(mini_items).T.reset_index()
     mini_df.columns = ["Item", "Low (Rp)", "High (Rp)"]
-    mini_df["Low (Rp)"] = mini_df["Low (Rp)"].apply(lambda x: f"Rp {x:,.0f}".replace(",", "."))
-    mini_df["High (Rp)"] = mini_df["High (Rp)"].apply(lambda x: f"Rp {x:,.0f}".replace(",", "."))
+    mini_df["Low (Rp)"] = format_currency_column(mini_df["Low (Rp)"])
+    mini_df["High (Rp)"] = format_currency_column(mini_df["High (Rp)"])
     st.sidebar.dataframe(mini_df, hide_index=True, use_container_width=True)
 
-def format_currency(value: float) -> str:
-    """Format a value as Indonesian Rupiah."""
-    return f"Rp {value:,.0f}".replace(",", ".")
+def _currency_unit(unit: str = None) -> str:
+    return unit or st.session_state.get("currency_unit", CURRENCY_DISPLAY_UNIT)
+
+def format_currency(value: float, unit: str = None) -> str:
+    """Format a value as Indonesian Rupiah, in the display unit chosen in the sidebar unless given."""
+    return format_rupiah(value, _currency_unit(unit))
+
+def format_currency_column(values: Any, unit: str = None) -> Any:
+    """format_currency() of a whole column (Series, array or list), vectorized by money.format_rupiah_array."""
+    return format_rupiah_array(values, _currency_unit(unit))
 
 def render_number_input(label: str, key: str, min_value: float, max_value: float, 
                         value: float, step: float = 1.0, help_text: str = None,
@@ -94,19 +136,20 @@ def render_rate_card(rates: Dict[str, Any]):
         # Location
         st.subheader("Location")
         location_df = pd.DataFrame(list(rates['location'].items()), columns=["Type", "Cost (Rp)"])
-        location_df["Cost (Rp)"] = location_df["Cost (Rp)"].apply(lambda x: format_currency(x) if x > 0 else "0")
+        costs = location_df["Cost (Rp)"]
+        location_df["Cost (Rp)"] = pd.Series(format_currency_column(costs), index=costs.index).where(costs > 0, "0")
         st.table(location_df)
 
         # Crew Roles
         st.subheader("Crew Roles")
         crew_df = pd.DataFrame(list(rates['crew_roles'].items()), columns=["Role", "Rate (Rp)"])
-        crew_df["Rate (Rp)"] = crew_df["Rate (Rp)"].apply(format_currency)
+        crew_df["Rate (Rp)"] = format_currency_column(crew_df["Rate (Rp)"])
         st.table(crew_df)
 
         # Equipment
         st.subheader("Equipment")
         equipment_df = pd.DataFrame(list(rates['equipment'].items()), columns=["Tier", "Daily Rate (Rp)"])
-        equipment_df["Daily Rate (Rp)"] = equipment_df["Daily Rate (Rp)"].apply(format_currency)
+        equipment_df["Daily Rate (Rp)"] = format_currency_column(equipment_df["Daily Rate (Rp)"])
         st.table(equipment_df)
 
         # Post Production
@@ -125,9 +168,10 @@ def render_rate_card(rates: Dict[str, Any]):
         st.subheader("Contingency")
         st.write(f"Default: {int(rates['contingency']['default']*100)}%")
 
-def render_rates_editor(rates: Dict[str, Any]) -> bool:
+def render_rates_editor(rates: Dict[str, Any]) -> Dict[str, Any] | None:
     """
-    Render a form to edit the rates dictionary. Returns True if the form was submitted.
+    Render a form to edit the rates dictionary.
+    Returns the edited rates if the form was submitted, otherwise None.
     """
     with st.expander("Edit Rates (Admin Only)"):
         st.info("Edit the rates below and click 'Save Rates' to update. Changes affect all users.")
@@ -207,7 +251,112 @@ def render_rates_editor(rates: Dict[str, Any]) -> bool:
             submitted = st.form_submit_button("Save Rates")
             if submitted:
                 st.success("Rates updated! Please refresh or rerun the app.")
-            return submitted
+                return updated_rates
+            return None
+
+def render_repricing_report(report: Dict[str, Any], customer_names: Dict[str, str]):
+    """
+    Render how the saved quote history shifts under the current rate card.
+    
+    Args:
+        report: Result of repricing.reprice_quote_history()
+        customer_names: Mapping of customer_id to display name
+    """
+    total = report["total"]
+    if not total["quotes"]:
+        st.info("No saved quotes to reprice.")
+        return
+    
+    cols = st.columns(3)
+    cols[0].metric("Saved Pipeline", format_currency(total["saved_total"]))
+    cols[1].metric(
+        "Repriced Pipeline",
+        format_currency(total["repriced_total"]),
+        delta=f"{total['delta_percent']:+.1f}%" if total["delta_percent"] is not None else None
+    )
+    cols[2].metric("Quotes Up / Down", f"{total['increased']} / {total['decreased']}")
+    if report["skipped"]:
+        st.caption(f"{report['skipped']} quotes were skipped because their snapshots could not be priced.")
+    
+    for title, key, labels in [
+        ("By Status", "by_status", {}),
+        ("By Customer", "by_customer", customer_names),
+        ("By Format", "by_format", {})
+    ]:
+        st.markdown(f"**{title}**")
+        rows = []
+        for group, values in report[key].items():
+            rows.append({
+                title[3:]: labels.get(group, group),
+                "Quotes": values["quotes"],
+                "Saved": format_currency(values["saved_total"]),
+                "Repriced": format_currency(values["repriced_total"]),
+                "Delta": format_currency(values["delta"]),
+                "Delta %": f"{values['delta_percent']:+.1f}%" if values["delta_percent"] is not None else "-"
+            })
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+def _ordered_groups(groups: Dict[str, Dict[str, float]], order: List[str]) -> List[str]:
+    """Group names in a preferred order, followed by any others alphabetically."""
+    return [g for g in order if g in groups] + sorted(g for g in groups if g not in order)
+
+def render_pipeline_dashboard(aggregates: Dict[str, Any], customer_names: Dict[str, str], top_customers: int = 20):
+    """
+    Render pipeline totals by status, month, format and customer.
+    
+    Args:
+        aggregates: Result of pipeline_aggregates.get_aggregates()
+        customer_names: Mapping of customer_id to display name
+        top_customers: Number of customers listed (highest value first)
+    """
+    total = aggregates["total"]
+    if not total["quotes"]:
+        st.info("No saved quotes yet.")
+        return
+    
+    won = sum(aggregates["by_status"].get(status, {}).get("value", 0) for status in FINAL_QUOTE_STATUSES)
+    cols = st.columns(3)
+    cols[0].metric("Pipeline Value", format_currency(total["value"]))
+    cols[1].metric("Quotes", f"{total['quotes']:,}")
+    cols[2].metric("Won (" + " / ".join(FINAL_QUOTE_STATUSES) + ")", format_currency(won))
+    
+    def group_table(dimension: str, label: str, order: List[str], names: Dict[str, str] = None) -> pd.DataFrame:
+        groups = aggregates[dimension]
+        return pd.DataFrame([
+            {label: (names or {}).get(g, g), "Quotes": groups[g]["quotes"], "Value (Rp)": groups[g]["value"]}
+            for g in _ordered_groups(groups, order)
+        ])
+    
+    status_col, format_col = st.columns(2)
+    for col, dimension, label, order in [
+        (status_col, "by_status", "Status", QUOTE_STATUSES),
+        (format_col, "by_format", "Format", VIDEO_FORMATS)
+    ]:
+        with col:
+            st.markdown(f"**By {label}**")
+            df = group_table(dimension, label, order)
+            chart = alt.Chart(df).mark_bar().encode(
+                x=alt.X(f"{label}:N", sort=list(df[label])),
+                y=alt.Y("Value (Rp):Q", axis=alt.Axis(format=",.0f")),
+                tooltip=[label, "Quotes", alt.Tooltip("Value (Rp):Q", format=",.0f")]
+            )
+            st.altair_chart(chart, use_container_width=True)
+            df["Value (Rp)"] = format_currency_column(df["Value (Rp)"])
+            st.dataframe(df, hide_index=True, use_container_width=True)
+    
+    st.markdown("**By Month**")
+    months = group_table("by_month", "Month", [])
+    st.altair_chart(alt.Chart(months).mark_line(point=True).encode(
+        x=alt.X("Month:N", sort=list(months["Month"])),
+        y=alt.Y("Value (Rp):Q", axis=alt.Axis(format=",.0f")),
+        tooltip=["Month", "Quotes", alt.Tooltip("Value (Rp):Q", format=",.0f")]
+    ), use_container_width=True)
+    
+    st.markdown(f"**Top {top_customers} Customers**")
+    customers = group_table("by_customer", "Customer", [], customer_names)
+    customers = customers.sort_values("Value (Rp)", ascending=False).head(top_customers)
+    customers["Value (Rp)"] = format_currency_column(customers["Value (Rp)"])
+    st.dataframe(customers, hide_index=True, use_container_width=True)
 
 def render_template_buttons(callback: Callable):
     """Render template selection buttons."""
@@ -397,14 +546,17 @@ def render_production_form(production_vars: Dict[str, Any],
     # No return, as everything is live-updated
 
 def render_detailed_breakdown(line_items: Dict[str, Dict[str, float]], pdf_callback: Callable, excel_callback: Callable):
-    """Render the detailed quote breakdown and export options."""
+    """
+    Render the detailed quote breakdown and export options.
+    pdf_callback and excel_callback return the file bytes; they only run when the download is clicked.
+    """
     st.header("Detailed Breakdown & Export")
     
     # Convert line items to DataFrame
     df = pd.DataFrame(line_items).T.reset_index()
     df.columns = ["Item", "Low (Rp)", "High (Rp)"]
-    df["Low (Rp)"] = df["Low (Rp)"].apply(lambda x: format_currency(x))
-    df["High (Rp)"] = df["High (Rp)"].apply(lambda x: format_currency(x))
+    df["Low (Rp)"] = format_currency_column(df["Low (Rp)"])
+    df["High (Rp)"] = format_currency_column(df["High (Rp)"])
     
     # Display table
     st.table(df)
@@ -412,11 +564,248 @@ def render_detailed_breakdown(line_items: Dict[str, Dict[str, float]], pdf_callb
     # Export options
     export_col1, export_col2 = st.columns(2)
     with export_col1:
-        if st.button("Export to PDF"):
-            pdf_callback()
+        st.download_button(
+            "Download PDF Quote",
+            data=pdf_callback,
+            file_name=export_file_name("pdf"),
+            mime=EXPORT_FORMATS["pdf"][2],
+            key="download_pdf"
+        )
     with export_col2:
-        excel_link = excel_callback()
-        st.markdown(excel_link, unsafe_allow_html=True)
+        st.download_button(
+            "Download Excel Quote",
+            data=excel_callback,
+            file_name=export_file_name("excel"),
+            mime=EXPORT_FORMATS["excel"][2],
+            key="download_excel"
+        )
+
+def _sweep_value_label(value: Any) -> str:
+    """Readable axis label for a swept value."""
+    if isinstance(value, bool):
+        return "Yes" if value else "No"
+    return str(value)
+
+def render_price_surface_panel(questionnaire: Dict[str, Any], production_vars: Dict[str, Any],
+                               rate_card: Any, sweep_ranges: Dict[str, List[Any]]):
+    """
+    Render the what-if price surface for the current quote.
+    Prices the full grid of the chosen fields in one vectorized pass and shows it as a heatmap and table.
+    """
+    with st.expander("What-if Price Surface", expanded=False):
+        fields = st.multiselect(
+            "Vary",
+            options=list(sweep_ranges),
+            default=["shooting_days", "location"],
+            format_func=lambda name: SWEEP_FIELD_LABELS.get(name, name),
+            key="sweep_fields",
+            help="The first field is shown as rows, the second as columns. Any further fields are folded into each cell as the cheapest option."
+        )
+        if not fields:
+            st.info("Choose at least one field to vary.")
+            return
+        
+        ranges = {}
+        range_cols = st.columns(len(fields))
+        for col, name in zip(range_cols, fields):
+            values = list(sweep_ranges[name])
+            if isinstance(values[0], (int, float)) and not isinstance(values[0], bool):
+                with col:
+                    low, high = st.select_slider(
+                        SWEEP_FIELD_LABELS.get(name, name),
+                        options=values,
+                        value=(values[0], values[-1]),
+                        key=f"sweep_range_{name}"
+                    )
+                values = [v for v in values if low <= v <= high]
+            ranges[name] = values
+        
+        metric_labels = {"recommended_quote": "Recommended", "low_quote": "Low", "high_quote": "High"}
+        metric = st.radio(
+            "Price",
+            options=list(metric_labels),
+            format_func=metric_labels.get,
+            horizontal=True,
+            key="sweep_metric"
+        )
+        
+        start = time.perf_counter()
+        surface = sweep_price_surface(questionnaire, production_vars, rate_card, ranges)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        prices = surface[metric]
+        st.caption(f"{prices.size:,} scenarios priced in {elapsed_ms:.0f} ms")
+        
+        if prices.ndim > 2:
+            prices = prices.min(axis=tuple(range(2, prices.ndim)))
+            folded = ", ".join(SWEEP_FIELD_LABELS.get(name, name) for name in fields[2:])
+            st.caption(f"Each cell shows the cheapest option across: {folded}")
+        
+        row_name = fields[0]
+        row_label = SWEEP_FIELD_LABELS.get(row_name, row_name)
+        row_values = [_sweep_value_label(v) for v in ranges[row_name]]
+        if prices.ndim == 1:
+            df = pd.DataFrame({row_label: row_values, "Price (Rp)": prices})
+            chart = alt.Chart(df).mark_bar().encode(
+                x=alt.X(f"{row_label}:N", sort=row_values),
+                y=alt.Y("Price (Rp):Q"),
+                tooltip=[row_label, alt.Tooltip("Price (Rp):Q", format=",.0f")]
+            )
+            st.altair_chart(chart, use_container_width=True)
+            df["Price (Rp)"] = format_currency_column(df["Price (Rp)"])
+            st.dataframe(df, hide_index=True, use_container_width=True)
+            return
+        
+        col_name = fields[1]
+        col_label = SWEEP_FIELD_LABELS.get(col_name, col_name)
+        col_values = [_sweep_value_label(v) for v in ranges[col_name]]
+        long_df = pd.DataFrame({
+            row_label: [v for v in row_values for _ in col_values],
+            col_label: col_values * len(row_values),
+            "Price (Rp)": prices.ravel()
+        })
+        heatmap = alt.Chart(long_df).mark_rect().encode(
+            x=alt.X(f"{col_label}:N", sort=col_values),
+            y=alt.Y(f"{row_label}:N", sort=row_values),
+            color=alt.Color("Price (Rp):Q", scale=alt.Scale(scheme="blues")),
+            tooltip=[row_label, col_label, alt.Tooltip("Price (Rp):Q", format=",.0f")]
+        )
+        st.altair_chart(heatmap, use_container_width=True)
+        
+        table = pd.DataFrame(format_currency_column(prices).reshape(prices.shape), index=row_values, columns=col_values)
+        table.index.name = row_label
+        st.dataframe(table, use_container_width=True)
+
+def render_risk_simulation_panel(questionnaire: Dict[str, Any], production_vars: Dict[str, Any], rate_card: Any):
+    """
+    Render the Monte Carlo risk simulation for the current quote.
+    Results are cached per input hash, so unchanged reruns do not resimulate.
+    """
+    with st.expander("Risk Simulation", expanded=False):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            draws = st.selectbox("Draws", [10_000, 100_000, 500_000], index=1, format_func=lambda n: f"{n:,}", key="sim_draws")
+        with col2:
+            distribution = st.selectbox(
+                "Distribution",
+                SIMULATION_DISTRIBUTIONS,
+                key="sim_distribution",
+                help="How each line item is spread between its low and high estimate."
+            )
+        with col3:
+            target_confidence = st.slider("Target Confidence", 0.50, 0.99, 0.90, step=0.01, key="sim_confidence")
+        with col4:
+            seed = int(st.number_input("Seed", min_value=0, value=0, step=1, key="sim_seed"))
+        
+        summary = simulate_quote(
+            questionnaire, production_vars, rate_card,
+            draws=draws, distribution=distribution,
+            target_confidence=target_confidence, seed=seed
+        )
+        
+        p_cols = st.columns(3)
+        p_cols[0].metric("P10", format_currency(summary["p10"]))
+        p_cols[1].metric("P50", format_currency(summary["p50"]))
+        p_cols[2].metric("P90", format_currency(summary["p90"]))
+        
+        risk_cols = st.columns(2)
+        if summary["prob_exceed_budget"] is None:
+            risk_cols[0].metric("Chance of Exceeding Budget", "No budget set")
+        else:
+            risk_cols[0].metric(
+                f"Chance of Exceeding {format_currency(summary['budget_max'])}",
+                f"{summary['prob_exceed_budget'] * 100:.1f}%"
+            )
+        risk_cols[1].metric(
+            f"Contingency for {target_confidence * 100:.0f}% Confidence",
+            f"{summary['required_contingency_percent']:.1f}%",
+            help="Contingency on the low subtotal that covers this share of simulated outcomes."
+        )
+        
+        edges = summary["histogram"]["edges"]
+        hist_df = pd.DataFrame({
+            "Price (Rp)": [(lo + hi) / 2 for lo, hi in zip(edges[:-1], edges[1:])],
+            "Draws": summary["histogram"]["counts"]
+        })
+        chart = alt.Chart(hist_df).mark_bar().encode(
+            x=alt.X("Price (Rp):Q", axis=alt.Axis(format=",.0f")),
+            y="Draws:Q"
+        )
+        st.altair_chart(chart, use_container_width=True)
+
+def render_budget_solver_panel(questionnaire: Dict[str, Any], production_vars: Dict[str, Any],
+                               rate_card: Any, objectives: List[str]) -> Dict[str, Any] | None:
+    """
+    Render the budget solver: the best production setups whose recommended price fits the budget.
+    
+    Returns:
+        The production variables the user chose to apply, or None
+    """
+    with st.expander("Budget Solver", expanded=False):
+        budget_min = questionnaire.get("budget_min") or 0
+        budget_max = questionnaire.get("budget_max") or 0
+        if not budget_max:
+            st.info("Set a maximum budget in the questionnaire to search for configurations that fit it.")
+            return None
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            objective = st.selectbox(
+                "Optimise For",
+                objectives,
+                format_func=lambda key: (
+                    f"Lowest {key[1:].replace('_', ' ')}" if key.startswith("-") else f"Most {key.replace('_', ' ')}"
+                ),
+                key="solver_objective",
+                help="Configurations are ranked by this first, then by lower recommended price."
+            )
+        with col2:
+            top_n = int(st.number_input("Results", min_value=1, max_value=50, value=10, step=1, key="solver_top_n"))
+        
+        if st.button("Find Configurations", key="solver_run"):
+            start = time.perf_counter()
+            st.session_state["solver_results"] = find_configurations(
+                questionnaire, production_vars, rate_card,
+                budget_min=budget_min, budget_max=budget_max,
+                objective=[objective], top_n=top_n
+            )
+            st.session_state["solver_elapsed"] = time.perf_counter() - start
+        
+        solved = st.session_state.get("solver_results")
+        if not solved:
+            return None
+        if not solved["results"]:
+            st.warning(f"No configuration fits {format_currency(budget_min)} – {format_currency(budget_max)}.")
+            return None
+        
+        rows = []
+        for entry in solved["results"]:
+            config = entry["production_vars"]
+            rows.append({
+                "Shooting Days": config["shooting_days"],
+                "Crew Size": config["crew_size"],
+                "Location": config["location"],
+                "Talent": config["talent_count"],
+                "Props & Set Design": config["props_design"],
+                "Footage Volume": config["footage_volume"],
+                "Contingency %": config["contingency"],
+                "Recommended": format_currency(entry["recommended_quote"])
+            })
+        st.dataframe(pd.DataFrame(rows), use_container_width=True)
+        stats = solved["stats"]
+        st.caption(
+            f"Searched {stats['nodes']:,} branches ({stats['pruned_budget'] + stats['pruned_objective']:,} pruned), "
+            f"priced {stats['rows_priced']:,} configurations in {st.session_state.get('solver_elapsed', 0):.2f}s."
+        )
+        
+        choice = st.selectbox(
+            "Configuration",
+            range(len(solved["results"])),
+            format_func=lambda i: f"#{i + 1} – {format_currency(solved['results'][i]['recommended_quote'])}",
+            key="solver_choice"
+        )
+        if st.button("Apply Configuration", key="solver_apply"):
+            return dict(solved["results"][choice]["production_vars"])
+    return None
 
 def render_customer_form(customer=None):
     """
@@ -590,9 +979,8 @@ def render_customer_details(customer):
         
         # Format currency
         if 'quote_amount' in projects_df.columns:
-            projects_df['quote_amount'] = projects_df['quote_amount'].apply(
-                lambda x: f"Rp {'{:,.0f}'.format(x).replace(',', '.')}" if x else "N/A"
-            )
+            amounts = projects_df['quote_amount']
+            projects_df['quote_amount'] = format_currency_column(amounts.where(amounts.fillna(0) != 0))
         
         # Reorder and rename columns for display
         cols_order = ['project_id', 'project_name', 'date', 'status', 'quote_amount']
@@ -628,9 +1016,6 @@ def render_customer_quotes(quotes: List[Dict[str, Any]]) -> str | None:
     
     selected_quote_to_load = None
     
-    # Define possible statuses
-    QUOTE_STATUSES = ["Draft", "Quoted", "Approved", "Rejected", "Invoiced", "Paid", "Archived"]
-    
     # Prepare data for display (convert datetime for display)
     display_data = []
     for quote in quotes:
@@ -719,6 +1104,118 @@ def render_customer_quotes(quotes: List[Dict[str, Any]]) -> str | None:
                 
     return selected_quote_to_load 
 
+# Quote list sort options: label -> query_quotes() sort key
+QUOTE_SORT_OPTIONS = {"Date Created": "creation_date", "Status": "status", "Amount": "amount"}
+
+# Fields the quote list displays
+QUOTE_LIST_FIELDS = ("quote_id", "project_name", "creation_date", "status", "recommended_quote")
+
+def render_customer_quote_pages(customer_id: str, page_size: int = QUOTE_PAGE_SIZE) -> str | None:
+    """
+    Renders one page of a customer's quotes with sort, status filter and paging controls.
+
+    Only the current page is queried from storage; Previous/Next walk a stack
+    of keyset cursors kept in session state.
+
+    Returns:
+        The quote_id if a 'Load' button is pressed, otherwise None
+    """
+    sort_col, order_col, status_col = st.columns((1, 1, 2))
+    with sort_col:
+        sort_label = st.selectbox("Sort by", list(QUOTE_SORT_OPTIONS), key="quote_list_sort")
+    with order_col:
+        descending = st.toggle("Newest / largest first", value=True, key="quote_list_descending")
+    with status_col:
+        statuses = st.multiselect("Status", QUOTE_STATUSES, key="quote_list_statuses", placeholder="All statuses")
+
+    # Start from the first page whenever the customer, order or filter changes
+    query_key = (customer_id, sort_label, descending, tuple(statuses), page_size)
+    if st.session_state.get("quote_list_query") != query_key:
+        st.session_state.quote_list_query = query_key
+        st.session_state.quote_list_cursors = [None]
+    cursors = st.session_state.quote_list_cursors
+
+    page = query_quotes(
+        customer_id=customer_id,
+        statuses=statuses or None,
+        sort=QUOTE_SORT_OPTIONS[sort_label],
+        descending=descending,
+        limit=page_size,
+        cursor=cursors[-1],
+        fields=QUOTE_LIST_FIELDS
+    )
+    selected_quote_to_load = render_customer_quotes(page["quotes"])
+
+    if page["total"] > page_size:
+        pages = -(-page["total"] // page_size)
+        prev_col, info_col, next_col = st.columns((1, 2, 1))
+        with prev_col:
+            if st.button("Previous", key="quote_list_prev", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+        with info_col:
+            st.caption(f"Page {len(cursors)} of {pages} ({page['total']} quotes)")
+        with next_col:
+            if st.button("Next", key="quote_list_next", disabled=page["next_cursor"] is None):
+                cursors.append(page["next_cursor"])
+                st.rerun()
+    return selected_quote_to_load
+
+def render_batch_export_panel(customer_names: Dict[str, str]):
+    """
+    Render the batch export panel: PDF or Excel files of every matching quote in one ZIP, or one workbook or HTML report.
+    Quotes are rendered by a process pool with a progress bar; the file is kept on disk until the next export.
+    """
+    with st.expander("Batch Export", expanded=False):
+        customer_col, status_col, format_col = st.columns((2, 2, 1))
+        with customer_col:
+            customer_ids = [None] + sorted(customer_names, key=lambda cid: customer_names[cid])
+            customer_id = st.selectbox(
+                "Customer", customer_ids, format_func=lambda cid: "All customers" if cid is None else customer_names[cid],
+                key="batch_export_customer"
+            )
+        with status_col:
+            statuses = st.multiselect("Status", QUOTE_STATUSES, default=["Quoted"], key="batch_export_statuses")
+        with format_col:
+            kind = st.radio("Format", BATCH_FORMATS, format_func=str.title, key="batch_export_format")
+
+        total = count_quotes(customer_id, statuses or None)
+        if st.button(f"Export {total} quotes", disabled=total == 0, key="batch_export_run"):
+            previous = st.session_state.get("batch_export_path")
+            if previous and os.path.exists(previous):
+                os.remove(previous)
+            suffix = {"workbook": ".xlsx", "report": ".html"}.get(kind, ".zip")
+            fd, path = tempfile.mkstemp(prefix="lapis_quotes_", suffix=suffix)
+            os.close(fd)
+            bar = st.progress(0.0, text="Rendering quotes...")
+            summary = batch_export(
+                select_quotes(customer_id, statuses or None), path, kind,
+                progress=lambda done: bar.progress(min(done / total, 1.0), text=f"{done}/{total} quotes")
+            )
+            st.session_state.batch_export_path = path
+            st.success(f"Exported {summary['exported']} quotes in {summary['seconds']:.1f}s.")
+            if summary["failed"]:
+                st.warning(f"{len(summary['failed'])} quotes could not be rendered.")
+                st.write(summary["failed"][:20])
+
+        path = st.session_state.get("batch_export_path")
+        if path and os.path.exists(path):
+            def read_export():
+                with open(path, "rb") as f:
+                    return f.read()
+            extension = os.path.splitext(path)[1][1:]
+            label, mime = {
+                "xlsx": ("Download Workbook", EXPORT_FORMATS["excel"][2]),
+                "html": ("Download Report", "text/html"),
+            }.get(extension, ("Download ZIP", "application/zip"))
+            st.download_button(
+                label,
+                data=read_export,
+                file_name=f"lapis_quotes_{datetime.now().strftime('%Y%m%d')}.{extension}",
+                mime=mime,
+                key="batch_export_download"
+            )
+
 def render_sidebar_customer_selector(selected_customer, show_customer_form, DEFAULT_QUESTIONNAIRE, DEFAULT_PRODUCTION_VARS, search_customers, save_customer, get_customer):
     """
     Render the customer search/select/add UI in the sidebar.
@@ -731,7 +1228,7 @@ def render_sidebar_customer_selector(selected_customer, show_customer_form, DEFA
     action = None
     results = []
     if search_query:
-        results = search_customers(search_query)
+        results = search_customers(search_query, CUSTOMER_SEARCH_LIMIT)
         if results:
             options = ["Select a customer..."] + [f"{c['name']} ({c['email']})" for c in results]
             selected_option = st.sidebar.selectbox("Search Results", options, key="sidebar_customer_select")